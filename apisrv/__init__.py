@@ -31,6 +31,7 @@ Flask API Server
 """
 import builtins
 import sys
+import threading
 import os
 import re
 import logging
@@ -42,6 +43,7 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_sqlalchemy import SQLAlchemy
 import nglib
+import nglib.query
 
 logger = logging.getLogger(__name__)
 
@@ -110,10 +112,31 @@ limiter = Limiter(
     global_limits=flask_limits
 )
 
+# Initialize nglib once, the bolt driver is pooled for the life of the server
+nglib.verbose = debug
+nglib.init_nglib(config_file)
+
+# Plan the path queries before taking requests
+if nglib.dbpool.check():
+    nglib.query.templates.warm_queries()
+
+# Limit concurrent requests running queries to the number of DB workers
+workers = threading.BoundedSemaphore(nglib.workers)
+
 @app.before_request
 def init_db():
-    nglib.verbose = debug
-    nglib.init_nglib(config_file)
+    """Reserve a DB worker and health check this thread's Neo4j session"""
+    workers.acquire()
+    g.db_worker = True
+    if not nglib.dbpool.check():
+        return make_response(jsonify(error="Database Unavailable", status=503), 503)
+
+@app.teardown_request
+def release_db(error):
+    """Release the request's Neo4j session and DB worker"""
+    if g.pop('db_worker', None):
+        nglib.dbpool.release()
+        workers.release()
 
 @app.teardown_appcontext
 def close_db(error):
@@ -28,13 +28,16 @@
 """
 NetGrph API Views
 """
+import io
+import csv
+import json
 import logging
 import nglib
 import nglib.query
 import nglib.report
 import nglib.netdb.switch
 from nglib.exceptions import ResultError
-from flask import jsonify, request
+from flask import jsonify, request, Response
 from apisrv import app, auth, config, errors
 
 # Setup
@@ -218,6 +221,47 @@ def get_nets():
         except ResultError as e:
             return jsonify(errors.json_error(e.expression, e.message))
 
+@app.route('/netgrph/api/<ver>/iplist', methods=['POST'])
+@auth.login_required
+def get_iplist(ver):
+    """ Bulk resolve IPs to networks
+
+    POST body is a list of IPs (whitespace or comma separated, or a JSON list)
+
+    Options:
+        format - csv (default) or json (one object per line)
+        vrf    - only match networks in this VRF
+    """
+
+    rformat = request.args.get('format', 'csv').lower()
+    vrf = request.args.get('vrf', None)
+
+    ips = request.get_json(silent=True)
+    if not isinstance(ips, list):
+        ips = nglib.query.net.parse_ip_list(request.get_data(as_text=True))
+    ips = [str(ip) for ip in ips]
+
+    results = nglib.query.net.resolve_ips(ips, vrf=vrf)
+
+    if rformat == 'json':
+        def generate():
+            for row in results:
+                yield json.dumps(row, sort_keys=True) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    def generate():
+        line = io.StringIO()
+        excsv = csv.DictWriter(line, fieldnames=nglib.query.net.ip_fields)
+        excsv.writeheader()
+        yield line.getvalue()
+        for row in results:
+            line.seek(0)
+            line.truncate()
+            excsv.writerow(row)
+            yield line.getvalue()
+    return Response(generate(), mimetype='text/csv')
+
+
 # L2 VLAN Queries
 @app.route('/netgrph/api/<ver>/vlans', methods=['GET'])
 @auth.login_required
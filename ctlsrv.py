@@ -102,7 +102,7 @@ elif args.run:
     # Localhost development server
     else:
         logger.warning("HTTPS is not configured, defaulting to localhost only")
-        app.run(debug=debug, port=int(config['apisrv']['port']))
+        app.run(debug=debug, port=int(config['apisrv']['port']), threaded=True)
 
 # Add user to DB
 elif args.adduser:
@@ -89,6 +89,8 @@ parser.add_argument("-dev", help="Get the Details for a Device (Switch/Router/FW
                     action="store_true")
 parser.add_argument("-ip", help="Network Details for an IP",
                     action="store_true")
+parser.add_argument("-iplist", help="Bulk Network Details for a file of IPs (- for stdin)",
+                    action="store_true")
 parser.add_argument("-net", help="All networks within a CIDR (eg. 10.0.0.0/8)",
                     action="store_true")
 parser.add_argument("-nlist", help="Get all networks in an alert group",
@@ -121,6 +123,9 @@ parser.add_argument("-allpaths",
 parser.add_argument("-depth", metavar="20",
                     help="Path Depth (default 20)",
                     type=int)
+parser.add_argument("-nologs",
+                    help="Skip Firewall Log Searches on Security Paths",
+                    action="store_true")
 parser.add_argument("-output", metavar='TREE',
                     help="Return Format: TREE, TABLE, CSV, JSON, YAML", type=str)
 parser.add_argument("-vrange", metavar='1[-4096]', help="VLAN Range (default 1-1999)",
@@ -243,7 +248,8 @@ if args.fpath:
         print("Error: API Currently Not Supported for this call, " \
               "use quick path: netgrph src dst", file=sys.stderr)
         sys.exit(1)
-    nglib.query.path.get_fw_path(args.fpath, args.search, {"depth": depth})
+    nglib.query.path.get_fw_path(args.fpath, args.search,
+                                {"depth": depth, "logs": not args.nologs})
 
 elif args.spath:
     rtype = "TREE"
@@ -304,6 +310,37 @@ elif args.ip:
     else:
         nglib.query.net.get_net(args.search, rtype=rtype, days=args.days)
 
+elif args.iplist:
+    rtype = "CSV"
+    if args.output:
+        rtype = args.output
+    if args.search == '-':
+        ips = sys.stdin.read()
+    else:
+        with open(args.search) as ipfile:
+            ips = ipfile.read()
+    if use_api:
+        requrl = api['url'] + 'iplist?format=' + rtype.lower()
+        if args.vrf != 'default':
+            requrl = requrl + '&vrf=' + args.vrf
+        try:
+            r = requests.post(requrl, data=ips, stream=True, \
+                auth=(api['user'], api['pass']), verify=api['verify'])
+        except requests.exceptions.RequestException as e:
+            print("Failed to Connect to API Server:", requrl, e)
+            sys.exit(1)
+        if r.status_code == 200:
+            for line in r.iter_lines(decode_unicode=True):
+                print(line)
+        else:
+            print("API Request Error:", r.status_code, r.text)
+    else:
+        vrf = None
+        if args.vrf != 'default':
+            vrf = args.vrf
+        nglib.query.net.get_ip_list(nglib.query.net.parse_ip_list(ips), \
+            rtype=rtype, vrf=vrf)
+
 elif args.net:
     rtype = "TREE"
     if args.output:
@@ -44,15 +44,23 @@ import pwd
 import datetime
 import configparser
 import logging
+from timeit import default_timer as timer
 
 try:
     from neo4j.v1 import TRUST_ON_FIRST_USE, TRUST_SIGNED_CERTIFICATES, SSL_AVAILABLE
     from neo4j.v1.exceptions import CypherError, ProtocolError
     from neo4j.v1 import GraphDatabase, basic_auth
-    from py2neo import Node, Relationship, Graph
 except ImportError:
     pass
 
+# py2neo (REST) is optional, all library queries use bolt
+try:
+    from py2neo import Node, Relationship, Graph
+    use_py2neo = True
+except ImportError:
+    use_py2neo = False
+
+import nglib.dbpool
 
 logger = logging.getLogger(__name__)
 
@@ -63,10 +71,26 @@ config = None
 # Save user for library
 user = pwd.getpwuid(os.getuid())[0]
 
-# DB Sessions accessed globally
+# DB Sessions accessed globally (thread local proxies from nglib.dbpool)
 bolt_ses = None
 py2neo_ses = None
 
+# Worker threads for concurrent queries (sizes the bolt connection pool)
+workers = 8
+
+# Rows per transaction for batched imports (see nglib.dbpool.write_batches)
+batch_size = 1000
+
+# Routed path engine: cypher (default) or memory (nglib.query.routegraph)
+path_engine = 'cypher'
+
+# Path result cache size (0 disables) and max age in seconds
+path_cache = 256
+path_cache_ttl = 300
+
+# Firewall log search timeout in seconds (0 waits forever)
+logtimeout = 30
+
 # Topology Variables
 max_distance = 100
 dev_seeds = None
@@ -74,20 +98,22 @@ dev_seeds = None
 # NetDB Enabled
 use_netdb = False
 
+# Import generation stamps for in-process caches (see get_generation)
+gen_check = 2
+gen_cache = dict()
+
 
 def get_db_client(dbhost, dbuser, dbpass, bolt=False):
-    """Return a Neo4j DB session. bolt=True uses bolt driver"""    
+    """Return a Neo4j DB session. bolt=True uses bolt driver, else py2neo (optional)"""
 
     if verbose > 4:
         print("DB Creds", dbhost, dbuser, dbpass)
 
     if bolt:
-        bolt_url = "bolt://" + dbhost
-        auth_token = basic_auth(dbuser, dbpass)
         try:
-            driver = GraphDatabase.driver(bolt_url, auth=auth_token)
-            bolt_session = driver.session()
-            return bolt_session
+            dbpool = nglib.dbpool.init_pool(dbhost, dbuser, dbpass, workers=workers)
+            dbpool.get_session()
+            return nglib.dbpool.LocalSession()
         except Exception as e:
             print("Database connection/authentication error:", e)
             sys.exit(1)
@@ -130,6 +156,44 @@ def get_time(hours=None):
     return time
 
 
+def get_generation(name):
+    """Returns the import generation stamp for name, None if never imported
+
+    Process caches (eg. nglib.query.netindex) compare this against the stamp
+    they were built with. Database reads are throttled to once per gen_check
+    seconds per name.
+    """
+
+    cached = gen_cache.get(name)
+    if cached and timer() - cached[1] < gen_check:
+        return cached[0]
+
+    results = nglib.dbpool.execute(
+        'MATCH (g:Generation {name:{name}}) RETURN g.gen AS gen', name=name)
+
+    gen = None
+    if len(results):
+        gen = results[0].gen
+
+    gen_cache[name] = (gen, timer())
+    return gen
+
+
+def bump_generation(*names):
+    """Stamp a new import generation for names, invalidates process caches"""
+
+    gen = get_time()
+
+    logger.debug("Bumping %s generation to %s", ','.join(names), gen)
+    nglib.dbpool.execute(
+        'UNWIND {names} AS name MERGE (g:Generation {name:name}) SET g.gen = {gen} RETURN g',
+        names=list(names), gen=gen)
+
+    for name in names:
+        gen_cache[name] = (gen, timer())
+    return gen
+
+
 def getEntry(l, pos=0):
     """Returns first entry in a list, or at position pos=x"""
 
@@ -160,6 +224,7 @@ def init_nglib(configFile):
     - Sets global variables in library for use with other modules
     - Configures debugging and sets up logging
     - Modifies py2neo and bolt library levels
+    - Bolt driver is pooled, calling this again reuses the existing pool
 
     """
 
@@ -170,6 +235,12 @@ def init_nglib(configFile):
     global bolt_ses
     global py2neo_ses
     global use_netdb
+    global workers
+    global batch_size
+    global path_engine
+    global path_cache
+    global path_cache_ttl
+    global logtimeout
 
     if verbose > 1:
         print("Config File", configFile)
@@ -194,11 +265,32 @@ def init_nglib(configFile):
     dbpass = config['nglib']['dbpass']
     dbhost = config['nglib']['dbhost']
 
-    # Login to DB for parent Variables
-    if verbose > 1:
-        logger.info("Connecting to Neo4j: %s %s", dbhost, dbuser)
+    # Concurrent Workers
+    if 'workers' in config['nglib']:
+        workers = int(config['nglib']['workers'])
+
+    # Batched Imports
+    if 'batch_size' in config['nglib']:
+        batch_size = int(config['nglib']['batch_size'])
+
+    # Routed Path Engine
+    if 'path_engine' in config['nglib']:
+        path_engine = config['nglib']['path_engine']
+
+    # Path Result Cache
+    if 'path_cache' in config['nglib']:
+        path_cache = int(config['nglib']['path_cache'])
+    if 'path_cache_ttl' in config['nglib']:
+        path_cache_ttl = int(config['nglib']['path_cache_ttl'])
+
+    # Firewall Log Searches
+    if 'logtimeout' in config['nglib']:
+        logtimeout = int(config['nglib']['logtimeout'])
+
+    # Login to DB for parent Variables (sessions are per thread)
     bolt_ses = get_db_client(dbhost, dbuser, dbpass, bolt=True)
-    py2neo_ses = get_db_client(dbhost, dbuser, dbpass)
+    if use_py2neo:
+        py2neo_ses = nglib.dbpool.LocalGraph()
 
     # Topology
     max_distance = int(config['topology']['max_distance'])
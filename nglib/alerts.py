@@ -48,7 +48,7 @@ def gen_new_network_alerts():
     newNets = []
 
     # Find any new networks
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH(n:NewNetwork) return n.vrfcidr AS vrfcidr')
 
     ncount = len(results)
@@ -79,7 +79,7 @@ def gen_new_network_alerts():
 
     # Deleting NewNetwork Objects
     if not verbose:
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH(n:NewNetwork) delete n')
 
 def gen_new_vlan_alerts():
@@ -89,7 +89,7 @@ def gen_new_vlan_alerts():
     groups = []
 
     # Find any new networks
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH(v:NewVLAN) return v.name AS name')
 
     ncount = len(results)
@@ -115,7 +115,7 @@ def gen_new_vlan_alerts():
         
         # Deleting NewVLAN Objects
         if not verbose:
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH(n:NewVLAN) delete n')
 
 def loadGroups(gAlert):
@@ -128,13 +128,20 @@ def loadGroups(gAlert):
 def loadNetAlerts(gAlert, newNets):
     """Add networks to each group after filtering attributes"""
 
+    nets = nglib.query.net.get_nets_props(newNets)
+
+    # Compile each group filter once
+    filters = dict()
+    for group in gAlert.keys():
+        filters[group] = nglib.query.get_filter(group=group)
+
     for net in newNets:
 
-        netDict = nglib.query.net.get_net_props(net)
+        netDict = nets.get(net, dict())
 
         if len(netDict.keys()):
             for group in gAlert.keys():
-                if nglib.query.check_net_filter(netDict, group):
+                if filters[group].match(netDict):
                     logger.debug("Adding " + netDict['CIDR'] + " to alerts for " + group)
                     gAlert[group].append(netDict)
 
@@ -31,7 +31,7 @@
 """NetGrph Cache Management"""
 
 import logging
-from nglib.query.nNode import getRelationship, getLabel, getJSONProperties
+from nglib.query.nNode import getRelationship, getLabel, get_properties
 import nglib
 
 logger = logging.getLogger(__name__)
@@ -49,16 +49,16 @@ def clear_edges(hours):
     # Time shifted datetime
     age = nglib.get_time(hours=hours)
 
-    edges = nglib.py2neo_ses.cypher.execute(
-        'MATCH ()-[e]->() WHERE e.time < {age} RETURN e',
+    edges = nglib.dbpool.execute(
+        'MATCH (s)-[e]->(t) WHERE e.time < {age} RETURN s, e, t',
         age=age)
 
     if len(edges) > 0:
         for e in edges:
-            neighbors = getRelationship(e.e)
+            neighbors = getRelationship(e.e, e.s, e.t)
             logger.info("Expired Edge: " + neighbors)
 
-        count = nglib.py2neo_ses.cypher.execute(
+        count = nglib.dbpool.execute(
             'MATCH ()-[e]->() WHERE e.time < {age} RETURN count(e) as count',
             age=age)
 
@@ -66,10 +66,13 @@ def clear_edges(hours):
             logger.info("Expired Edges: " + str(count[0].count))
         else:
             logger.info("Deleting Edges: " + str(count[0].count))
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH ()-[e]->() WHERE e.time < {age} DELETE e',
                 age=age)
 
+            # Expired routed edges invalidate the routed path graph
+            nglib.bump_generation('networks')
+
 
 def clear_nodes(hours):
     """
@@ -83,7 +86,7 @@ def clear_nodes(hours):
     # Time shifted datetime
     age = nglib.get_time(hours=hours)
 
-    nodes = nglib.py2neo_ses.cypher.execute(
+    nodes = nglib.dbpool.execute(
         'MATCH (n) WHERE n.time < {age} RETURN n',
         age=age)
 
@@ -91,10 +94,10 @@ def clear_nodes(hours):
 
         for r in nodes:
             label = getLabel(r.n)
-            pj = getJSONProperties(r.n)
+            pj = get_properties(r.n)
             logger.info("Expired Node: " + label + pj['name'])
 
-        count = nglib.py2neo_ses.cypher.execute(
+        count = nglib.dbpool.execute(
             'MATCH (n) WHERE n.time < {age} RETURN count(n) as count',
             age=age)
 
@@ -103,14 +106,17 @@ def clear_nodes(hours):
         if not nglib.verbose:
             logger.info("Deleting Nodes: " + str(count[0].count))
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (n)-[e]-() WHERE n.time < {age} DELETE e',
                 age=age)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (n) WHERE n.time < {age} DELETE n',
                 age=age)
 
+            # Expired Networks invalidate the network index and routed path graph
+            nglib.bump_generation('networks')
+
 
 def swap_quotes(myString):
     """Swap Quote Types for JSON from Neo4j"""
@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+#
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph Database Connection Pool
+- Owns a single pooled bolt driver for the life of the process
+- Hands out sessions per thread (or per API request)
+- Health checks idle sessions and transparently reconnects on failure
+
+Call init_pool() once (init_nglib does this), then use get_session(), or
+execute() to run a statement and get back a list of Records (stream() for
+a generator of Records). write_batches() writes rows in batched transactions.
+
+nglib.bolt_ses and nglib.py2neo_ses are LocalSession and LocalGraph proxies,
+every attribute lookup resolves to the calling thread's own session so
+concurrent API requests never share a result stream.
+"""
+import threading
+import logging
+from timeit import default_timer as timer
+import nglib
+
+try:
+    from neo4j.v1 import GraphDatabase, basic_auth
+    from neo4j.v1.exceptions import ProtocolError
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# Process wide pool (see init_pool)
+pool = None
+
+# Seconds a session can sit idle before it gets a health check
+max_idle = 30
+
+
+def _conn_errors():
+    """Return a tuple of exceptions that indicate a broken connection"""
+
+    errors = [ConnectionError, OSError]
+    try:
+        errors.append(ProtocolError)
+    except NameError:
+        pass
+
+    # Newer drivers raise these on lost connections
+    try:
+        from neo4j.exceptions import ServiceUnavailable, SessionExpired
+        errors.extend([ServiceUnavailable, SessionExpired])
+    except ImportError:
+        pass
+
+    return tuple(errors)
+
+
+class DBPool(object):
+    """
+    Pooled bolt driver with thread local sessions
+
+    The driver is thread safe and pools its own connections, sessions are not,
+    so every thread gets its own session from the shared driver.
+    """
+
+    def __init__(self, dbhost, dbuser, dbpass, workers=8):
+
+        self.dbhost = dbhost
+        self.dbuser = dbuser
+        self.dbpass = dbpass
+        self.workers = workers
+        self.driver = None
+        self.errors = _conn_errors()
+
+        # Bumped on every reconnect so threads drop stale sessions
+        self.epoch = 0
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.connect()
+
+    def connect(self):
+        """Create (or recreate) the bolt driver"""
+
+        with self._lock:
+            if self.driver:
+                try:
+                    self.driver.close()
+                except Exception:
+                    pass
+
+            if nglib.verbose > 1:
+                logger.info("Connecting to Neo4j: %s %s", self.dbhost, self.dbuser)
+
+            bolt_url = "bolt://" + self.dbhost
+            auth_token = basic_auth(self.dbuser, self.dbpass)
+            self.driver = GraphDatabase.driver(bolt_url, auth=auth_token,
+                                               max_pool_size=self.workers)
+            self.epoch += 1
+
+    def get_session(self):
+        """Get the bolt session for the current thread"""
+
+        local = self._local
+        if getattr(local, 'session', None) is None or local.epoch != self.epoch:
+            self.release()
+            local.session = self.driver.session()
+            local.epoch = self.epoch
+        local.last_used = timer()
+
+        return local.session
+
+    def get_graph(self):
+        """Get a py2neo Graph for the current thread (REST, optional)"""
+
+        local = self._local
+        if getattr(local, 'graph', None) is None:
+            local.graph = nglib.get_db_client(self.dbhost, self.dbuser, self.dbpass)
+
+        return local.graph
+
+    def release(self):
+        """Close the bolt session for the current thread (end of request)"""
+
+        session = getattr(self._local, 'session', None)
+        self._local.session = None
+
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def check(self):
+        """
+        Health check the current session if it has been idle, reconnecting
+        the driver on failure. Returns True if the database is reachable.
+        """
+
+        last_used = getattr(self._local, 'last_used', None)
+        if last_used and timer() - last_used < max_idle:
+            return True
+
+        try:
+            self.get_session().run('RETURN 1').consume()
+            return True
+        except self.errors as e:
+            logger.warning("Neo4j health check failed, reconnecting: %s", e)
+
+        try:
+            self.connect()
+            self.get_session().run('RETURN 1').consume()
+            return True
+        except self.errors as e:
+            logger.error("Neo4j reconnect failed: %s", e)
+            return False
+
+    def run(self, statement, params=None):
+        """Run a statement on the thread's session, reconnecting once on failure"""
+
+        try:
+            return self.get_session().run(statement, params)
+        except self.errors as e:
+            logger.warning("Neo4j connection lost, reconnecting: %s", e)
+            self.connect()
+            return self.get_session().run(statement, params)
+
+    def execute(self, statement, params=None):
+        """Run a statement and return all rows as Records, reconnecting once on failure"""
+
+        try:
+            return [Record(zip(r.keys(), r.values()))
+                    for r in self.get_session().run(statement, params)]
+        except self.errors as e:
+            logger.warning("Neo4j connection lost, reconnecting: %s", e)
+            self.connect()
+            return [Record(zip(r.keys(), r.values()))
+                    for r in self.get_session().run(statement, params)]
+
+    def write(self, statement, params=None):
+        """Run a statement in an explicit transaction, reconnecting once on failure"""
+
+        try:
+            return self._write(statement, params)
+        except self.errors as e:
+            logger.warning("Neo4j connection lost, reconnecting: %s", e)
+            self.connect()
+            return self._write(statement, params)
+
+    def _write(self, statement, params):
+        """Run statement in a new transaction and commit it"""
+
+        tx = self.get_session().begin_transaction()
+        try:
+            tx.run(statement, params).consume()
+            tx.commit()
+        except Exception:
+            if not tx.closed():
+                tx.rollback()
+            raise
+
+    def close(self):
+        """Close the driver and all pooled connections"""
+
+        self.release()
+        with self._lock:
+            if self.driver:
+                self.driver.close()
+                self.driver = None
+
+
+class Record(dict):
+    """A result row as a dict, columns are also available as attributes"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class LocalSession(object):
+    """Proxy to the calling thread's bolt session (nglib.bolt_ses)"""
+
+    def run(self, statement, params=None):
+        """Run a statement on this thread's session"""
+        return pool.run(statement, params)
+
+    def __getattr__(self, name):
+        return getattr(pool.get_session(), name)
+
+
+class LocalGraph(object):
+    """Proxy to the calling thread's py2neo Graph (nglib.py2neo_ses)"""
+
+    def __getattr__(self, name):
+        return getattr(pool.get_graph(), name)
+
+
+def init_pool(dbhost, dbuser, dbpass, workers=8):
+    """Initialize the process wide pool, reuses an existing pool on the same DB"""
+
+    global pool
+
+    if pool and (pool.dbhost, pool.dbuser, pool.dbpass) == (dbhost, dbuser, dbpass):
+        return pool
+
+    if pool:
+        pool.close()
+
+    pool = DBPool(dbhost, dbuser, dbpass, workers=workers)
+
+    return pool
+
+
+def get_session():
+    """Returns the bolt session for the current thread"""
+
+    return pool.get_session()
+
+
+def execute(statement, params=None, **kwparams):
+    """
+    Run a Cypher statement over bolt and return a list of Records
+
+    Parameters can be passed as a dict or as keyword arguments, eg.
+    execute('MATCH (s:Switch {name:{name}}) RETURN s.mgmt AS mgmt', name=switch)
+    """
+
+    if kwparams:
+        params = dict(params or {}, **kwparams)
+
+    return pool.execute(statement, params)
+
+
+def stream(statement, params=None, **kwparams):
+    """
+    Run a Cypher statement and yield Records as they arrive
+
+    Use for large results that are written out row by row, the thread's
+    session is busy until the generator is exhausted.
+    """
+
+    if kwparams:
+        params = dict(params or {}, **kwparams)
+
+    for r in pool.run(statement, params):
+        yield Record(zip(r.keys(), r.values()))
+
+
+def write_batches(statement, rows, name="Rows", batch_size=None):
+    """
+    Write rows in batches of batch_size (default nglib.batch_size)
+
+    statement gets each batch as the {batch} parameter, eg.
+    'UNWIND {batch} AS row MATCH ... SET ...', and every batch is committed
+    in its own transaction. Logs progress and rows/second per batch.
+    Returns the number of rows written.
+    """
+
+    batch_size = batch_size or nglib.batch_size
+
+    try:
+        total = len(rows)
+    except TypeError:
+        total = None
+
+    count = 0
+    start = timer()
+    batch = []
+
+    def write_batch():
+        bstart = timer()
+        pool.write(statement, {"batch": batch})
+        now = timer()
+
+        logger.info("%s: %s%s written, batch of %s in %.3fs (%.0f/s overall)",
+                    name, count, "/" + str(total) if total is not None else "",
+                    len(batch), now - bstart, count / max(now - start, 1e-6))
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            count += len(batch)
+            write_batch()
+            batch = []
+
+    if batch:
+        count += len(batch)
+        write_batch()
+
+    if count:
+        logger.info("%s: Wrote %s in %.3fs", name, count, timer() - start)
+
+    return count
+
+
+def release():
+    """Release the current thread's session back to the driver"""
+
+    if pool:
+        pool.release()
+
+
+def check():
+    """Health check the pool (reconnects if needed)"""
+
+    if not pool:
+        return False
+    return pool.check()
@@ -124,7 +124,7 @@ def import_switch(switch, group, time, seed, devinfo):
     # Only import switches with MGMT Group (switch,mgmtgroup=GROUP)
     if group:
 
-        result = nglib.py2neo_ses.cypher.execute(
+        result = nglib.dbpool.execute(
             'MATCH (s:Switch {name:{switch}}) return s',
             switch=switch)
 
@@ -132,7 +132,7 @@ def import_switch(switch, group, time, seed, devinfo):
         if len(result) == 0:
             logger.info("New: Inserting %s INTO switch, s:%s d:%s", switch, isSeed, distance)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'CREATE (s:Switch {name:{switch}, distance:{distance}, seed:{seed}, '
                 + 'mgmt:{group}, location:{location}, time:{time}, model:{model}, '
                 + 'version:{version}, FQDN:{fqdn}, Platform:{platform}})'
@@ -143,7 +143,7 @@ def import_switch(switch, group, time, seed, devinfo):
         else:
             logger.debug("Switch Exists %s", switch)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (s:Switch {name:{switch}}) SET s += '
                 + '{time:{time}, seed:{seed}, mgmt:{group}, location:{location},'
                 + 'model:{model}, version:{version}, FQDN:{fqdn}, Platform:{platform}} RETURN s',
@@ -179,13 +179,13 @@ def import_router(router, group, time, seed, rType, devinfo):
         group = "Unknown"
 
     rtrSearch = 'MATCH(r:Switch {name:{router}}) return r.router AS router'
-    result = nglib.py2neo_ses.cypher.execute(rtrSearch, router=router)
+    result = nglib.dbpool.execute(rtrSearch, router=router)
 
     # New Router, insert
     if len(result) == 0:
         logger.info("New: Inserting %s INTO router", router)
 
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'CREATE (r:Switch:Router {name:{router}, seed:{seed}, distance:{distance}, '
             + 'standby:{standby}, mgmt:{group}, location:{location}, '
             + 'model:{model}, version:{version}, Platform:{platform}, FQDN:{fqdn}, time:{time}})',
@@ -195,7 +195,7 @@ def import_router(router, group, time, seed, rType, devinfo):
 
     else:
         logger.debug("Router Exists %s, updating timestamp", router)
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'MATCH (s:Switch:Router {name:{router}}) SET s += '
             + '{time:{time},seed:{seed},standby:{standby}, '
             + 'location:{location}, model:{model}, version:{version}, '
@@ -216,7 +216,7 @@ def link_router_to_vrf(router, vrf):
 
     time = nglib.get_time()
 
-    result = nglib.py2neo_ses.cypher.execute(
+    result = nglib.dbpool.execute(
         'MATCH( s:Switch:Router {name:{router}})<-[r:VRF_ON]-'
         + '(v:VRF {name:{vrf}}) RETURN r',
         router=router, vrf=vrf)
@@ -224,7 +224,7 @@ def link_router_to_vrf(router, vrf):
     if len(result) == 0:
         logger.info("New: Creating VRF_ON Relationship %s to %s", router, vrf)
 
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'MATCH (r:Switch:Router {name:{router}}), (v:VRF {name:{vrf}}) '
             + 'CREATE (r)<-[e:VRF_ON {time:{time}}]-(v)',
             router=router, vrf=vrf, time=time)
@@ -232,7 +232,7 @@ def link_router_to_vrf(router, vrf):
         logger.debug("Debug: %s already linked to VRF %s, updating timestamp",
                      router, vrf)
 
-        result = nglib.py2neo_ses.cypher.execute(
+        result = nglib.dbpool.execute(
             'MATCH( s:Switch:Router {name:{router}})<-[r:VRF_ON]-(v:VRF {name:{vrf}}) ' +
             'SET r += {time:{time}} RETURN r',
             router=router, vrf=vrf, time=time)
@@ -247,16 +247,16 @@ def reseed_neighbors():
     logger.info("Reseeding all Switches and Deleting all Neighbors")
 
     # Reset all Distance Values to Default
-    nglib.py2neo_ses.cypher.execute(
+    nglib.dbpool.execute(
         'MATCH (s:Switch) SET s.distance={max_distance} RETURN s',
         max_distance=nglib.max_distance)
 
     # Reset Seeds to Distance 0
-    nglib.py2neo_ses.cypher.execute(
+    nglib.dbpool.execute(
         'MATCH (s:Switch) WHERE s.seed = 1 SET s.distance=0 RETURN s')
 
     # Clear all NEI and NEI_EQ Relationships
-    nglib.py2neo_ses.cypher.execute(
+    nglib.dbpool.execute(
         'MATCH(s:Switch)-[e:NEI|NEI_EQ]-() DELETE e')
 
 
@@ -285,12 +285,12 @@ def import_neighbors(fileName):
                 print("Debug importNeighbors", localName, localPort, remoteName,
                       remotePort)
 
-            checkLocal = nglib.py2neo_ses.cypher.execute(
+            checkLocal = nglib.dbpool.execute(
                 'MATCH (s:Switch {name:{name}}) RETURN '
                 + 's.distance AS distance, s.seed AS seed',
                 name=localName)
 
-            checkRemote = nglib.py2neo_ses.cypher.execute(
+            checkRemote = nglib.dbpool.execute(
                 'MATCH (s:Switch {name:{name}}) RETURN s.distance AS distance, s.seed AS seed',
                 name=remoteName)
 
@@ -298,8 +298,8 @@ def import_neighbors(fileName):
             if len(checkLocal) and len(checkRemote):
 
                 # Get Distances
-                localD = checkLocal.records[0].distance
-                remoteD = checkRemote.records[0].distance
+                localD = checkLocal[0].distance
+                remoteD = checkRemote[0].distance
 
                 import_adjacent_neighbors(en, localD, remoteD, time)
 
@@ -322,7 +322,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
         logger.debug("Debug: Found Neighbor with Higher Distance %s --> %s",
                      localName, remoteName)
 
-        existingNei = nglib.py2neo_ses.cypher.execute(
+        existingNei = nglib.dbpool.execute(
             'MATCH (l:Switch {name:{local}})'
             + '-[e:NEI {pPort:{localPort}, cPort:{remotePort}}]'
             + '-(r:Switch {name:{remote}}) RETURN r',
@@ -333,7 +333,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
             logger.debug("Updated NEI %s:%s --> %s:%s",
                          localName, localPort, remoteName, remotePort)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (l:Switch {name:{local}})'
                 + '-[e:NEI {pPort:{localPort}, cPort:{remotePort}}]'
                 + '->(r:Switch {name:{remote}})'
@@ -345,7 +345,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
             logger.info("New: Creating NEI Relationship %s --> %s",
                         localName, remoteName)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (r:Switch {name:{local}}), (s:Switch {name:{remote}}) '
                 + 'CREATE (r)-[e:NEI {time:{time}, pSwitch:{local}, pPort:{localPort}, '
                 + 'cSwitch:{remote}, cPort:{remotePort}}]->(s)',
@@ -358,7 +358,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
                      localName, remoteName)
 
         # NEI_EQ can be bidirectional, only allow one
-        existingNei1 = nglib.py2neo_ses.cypher.execute(
+        existingNei1 = nglib.dbpool.execute(
             'MATCH (l:Switch {name:{local}})'
             + '-[e:NEI_EQ {pPort:{localPort}, cPort:{remotePort}}]'
             + '->(r:Switch {name:{remote}}) RETURN r',
@@ -368,7 +368,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
         # Bidirectional Check, don't do anything if matches
         existingNei2 = []
 
-        existingNei2 = nglib.py2neo_ses.cypher.execute(
+        existingNei2 = nglib.dbpool.execute(
             'MATCH (l:Switch {name:{local}})'
             + '<-[e:NEI_EQ {cPort:{localPort}, pPort:{remotePort}}]'
             + '-(r:Switch {name:{remote}}) RETURN r',
@@ -380,7 +380,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
             logger.debug("Updated NEI_EQ %s:%s --> %s:%s",
                          localName, localPort, remoteName, remotePort)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (l:Switch {name:{local}})'
                 + '-[e:NEI_EQ {pPort:{localPort}, cPort:{remotePort}}]'
                 + '-(r:Switch {name:{remote}})'
@@ -414,7 +414,7 @@ def import_adjacent_neighbors(en, localD, remoteD, time):
             logger.info("New: Creating NEI_EQ Relationship %s --> %s",
                         localName, remoteName)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (s:Switch {name:{local}}), (r:Switch {name:{remote}}) '
                 + 'CREATE (s)-[e:NEI_EQ {time:{time}, pSwitch:{local}, pPort:{localPort}, '
                 + 'cSwitch:{remote}, cPort:{remotePort}}]->(r)',
@@ -442,7 +442,7 @@ def update_distance(switch):
     if not exclude:
 
         # Find Neighbors to this node and get their distance
-        nei = nglib.py2neo_ses.cypher.execute(
+        nei = nglib.dbpool.execute(
             'MATCH (l:Switch {name:{switch}})-[e:NEI]-(r:Switch) '
             + 'RETURN l.seed AS seed, l.distance AS ldist, r.distance AS rdist',
             switch=switch)
@@ -455,15 +455,15 @@ def update_distance(switch):
             lowDist = nglib.max_distance
 
             # Start local distance value equal to current distance
-            distance = nei.records[0].ldist
+            distance = nei[0].ldist
 
             # Skip calculations on seed devices
-            if nei.records[0].seed != 1:
+            if nei[0].seed != 1:
 
                 newdist = distance
 
                 # Look through neighbors for distance values
-                for r in nei.records:
+                for r in nei:
                     # Find the lowest distance neighbor
                     if int(r.rdist) < lowDist:
                         lowDist = r.rdist
@@ -481,7 +481,7 @@ def update_distance(switch):
                     logger.info("New: Switch Distance: %s (%s-->%s)",
                                 switch, distance, newdist)
 
-                    nglib.py2neo_ses.cypher.execute(
+                    nglib.dbpool.execute(
                         'MATCH (s:Switch {name:{switch}}) SET s.distance={newdist} RETURN s',
                         switch=switch, newdist=newdist)
 
@@ -508,7 +508,7 @@ def import_single_vrf(vrf, seczone=0, desc=None):
     """Import a single VRF in to the database"""
 
     time = nglib.get_time()
-    result = nglib.py2neo_ses.cypher.execute(
+    result = nglib.dbpool.execute(
         'MATCH (v:VRF {name:{vrf}}) RETURN v',
         vrf=vrf)
 
@@ -516,14 +516,14 @@ def import_single_vrf(vrf, seczone=0, desc=None):
     if len(result) == 0:
         logger.info("Creating new VRF: " + vrf)
 
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'CREATE (v:VRF {name:{vrf}, seczone:{seczone}, time:{time}, desc:{desc}})',
             vrf=vrf, seczone=seczone, time=time, desc=desc)
 
     else:
         logger.debug("Updating Existing VRF: " + vrf)
 
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'MATCH (v:VRF {name:{vrf}}) '
             + 'SET v.seczone={seczone}, v.time={time}, v.desc={desc}',
             vrf=vrf, seczone=seczone, time=time, desc=desc)
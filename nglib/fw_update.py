@@ -46,6 +46,9 @@ def import_fw(fileName):
     # Import FW Ints to DB
     import_fw_ints(fwdb)
 
+    # Invalidate VRF security path matrices in running processes
+    nglib.bump_generation('fw')
+
 
 def import_fw_ints(fwdb):
     """Import Firewall Interfaces from FW File"""
@@ -69,7 +72,7 @@ def import_fw_ints(fwdb):
         vlan = vlanInt.replace('Vlan', '')
 
         # Search for existing Firewall
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (fw:Switch:Router:FW {name:{name}}) RETURN fw',
             name=name)
 
@@ -77,7 +80,7 @@ def import_fw_ints(fwdb):
         if len(results) == 0:
             logger.info("Creating New Firewall: " + name)
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'CREATE (fw:Switch:Router:FW {name:{name}, hostname:{hostname}, '
                 + 'logIndex:{logIndex}, time:{time}}) RETURN fw',
                 name=name, hostname=hostname, logIndex=logIndex, time=time)
@@ -86,13 +89,13 @@ def import_fw_ints(fwdb):
         else:
             logger.debug("Updating Firewall: " + name)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (fw:Switch:Router:FW {name:{name}}) SET fw += '
                 + '{hostname:{hostname}, logIndex:{logIndex}, time:{time}} RETURN fw',
                 name=name, hostname=hostname, logIndex=logIndex, time=time)
 
         # Search for existing Vlan
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vid:{vlan}})-[e:ROUTED_FW]->'
             + '(fw:Switch:Router:FW {name:{name}}) '
             + 'RETURN e',
@@ -101,7 +104,7 @@ def import_fw_ints(fwdb):
         if len(results) == 0:
             logger.info("Creating New ROUTED_FW Link: %s --> %s", vlan, name)
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vid:{vlan}}), (fw:Switch:Router:FW {name:{name}})'
                 + 'CREATE (n)-[e:ROUTED_FW '
                 + '{desc:{desc}, seclevel:{seclevel}, time:{time}}]->(fw)',
@@ -111,7 +114,7 @@ def import_fw_ints(fwdb):
         else:
             logger.debug("Updating ROUTED_FW: %s --> %s", vlan, name)
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vid:{vlan}})-[e:ROUTED_FW]->'
                 + '(fw:Switch:Router:FW {name:{name}})'
                 + 'SET e += {desc:{desc}, seclevel:{seclevel}, time:{time}} '
@@ -63,6 +63,9 @@ def import_networks(fileName, ignore_new=False):
     for en in ndb:
         import_single_net(en, ignore_new, vrfmap)
 
+    # Invalidate network indexes in running processes
+    nglib.bump_generation('networks')
+
 
 def import_single_net(net, ignore_new, vrfmap):
     """Import a CIDR Entry in to NetGrph"""
@@ -96,10 +99,14 @@ def import_single_net(net, ignore_new, vrfmap):
 
     vrfcidr = '{0}-{1}'.format(vrf, cidr) #unique key
 
+    # Numeric address range for indexed range queries
+    nstart, nend, plen = get_net_range(cidr)
+    gwint = get_ip_int(gateway)
+
     # Check the Router VRF Cache only once to add new relationship to routers
     check_vrf_cache(router, vrf)
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (n:Network {vrfcidr:{vrfcidr}}) RETURN n',
         vrfcidr=vrfcidr)
 
@@ -107,17 +114,18 @@ def import_single_net(net, ignore_new, vrfmap):
     if len(results) == 0:
         logger.info("New: Inserting CIDR %s", vrfcidr)
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'CREATE (n:Network {cidr:{cidr}, vrfcidr:{vrfcidr}, name:{vrfcidr}, '
-            + 'vrf:{vrf}, desc:{desc}, vid:{vlan}, '
-            + 'gateway:{gateway}, time:{time}}) RETURN n',
+            + 'vrf:{vrf}, desc:{desc}, vid:{vlan}, gateway:{gateway}, '
+            + 'gwint:{gwint}, nstart:{nstart}, nend:{nend}, plen:{plen}, '
+            + 'time:{time}}) RETURN n',
             cidr=cidr, vrfcidr=vrfcidr, vrf=vrf, vlan=vlan, desc=desc, gateway=gateway,
-            time=time)
+            gwint=gwint, nstart=nstart, nend=nend, plen=plen, time=time)
 
         # Record New Network Unless Ignoring initial run
         if not ignore_new:
             # Store a NewNetwork Object for alerting
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'CREATE (n:NewNetwork {cidr:{cidr}, vrfcidr:{vrfcidr}, name:{vrfcidr}, '
                 + 'vrf:{vrf}, desc:{desc}, vid:{vlan}, gateway:{gateway}, time:{time}}) RETURN n',
                 cidr=cidr, vrfcidr=vrfcidr, vrf=vrf, vlan=vlan, desc=desc,
@@ -126,14 +134,16 @@ def import_single_net(net, ignore_new, vrfmap):
     # Else update record
     else:
         logger.debug("Updating CIDR in Network %s", vrfcidr)
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}}) SET n += {desc:{desc}, vid:{vlan}, '
-            + 'gateway:{gateway}, time:{time}} RETURN n',
-            vrfcidr=vrfcidr, desc=desc, vlan=vlan, gateway=gateway, time=time)
+            + 'gateway:{gateway}, gwint:{gwint}, nstart:{nstart}, nend:{nend}, '
+            + 'plen:{plen}, time:{time}} RETURN n',
+            vrfcidr=vrfcidr, desc=desc, vlan=vlan, gateway=gateway, gwint=gwint,
+            nstart=nstart, nend=nend, plen=plen, time=time)
 
 
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:VRF_IN]->() RETURN e',
         vrfcidr=vrfcidr)
 
@@ -141,7 +151,7 @@ def import_single_net(net, ignore_new, vrfmap):
     if len(results) == 0:
         logger.info("New: Creating VRF Relationship %s -> %s ", net['Subnet'], net['VRF'])
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}}), (v:VRF {name:{vrf}}) '
             + 'CREATE (n)-[e:VRF_IN]->(v) RETURN e',
             vrfcidr=vrfcidr, vrf=vrf)
@@ -149,7 +159,7 @@ def import_single_net(net, ignore_new, vrfmap):
     else:
         logger.debug("Found existing VRF Relationship %s -> %s ", net['Subnet'], net['VRF'])
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:VRF_IN]->(v:VRF {name:{vrf}}) '
             + 'SET e.time={time} RETURN e',
             vrfcidr=vrfcidr, vrf=vrf, time=time)
@@ -157,7 +167,7 @@ def import_single_net(net, ignore_new, vrfmap):
     # Make sure Routed By Primary and not p2p link
     if not standby and not p2p:
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED_BY]->'
             + '(r:Switch:Router {name:{router}}) RETURN e',
             vrfcidr=vrfcidr, router=router)
@@ -167,7 +177,7 @@ def import_single_net(net, ignore_new, vrfmap):
             logger.info("New: Creating Router Relationship "
                         + "{0} -> {1} ".format(net['Subnet'], net['Router']))
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}}), (r:Switch:Router {name:{router}}) '
                 + 'CREATE (n)-[e:ROUTED_BY {vrf:{vrf}, time:{time}}]->(r) RETURN e',
                 vrfcidr=vrfcidr, vrf=vrf, time=time, router=router)
@@ -181,7 +191,7 @@ def import_single_net(net, ignore_new, vrfmap):
             logger.debug("Updating Existing Router Relationship: "
                          + "{0} -> {1}".format(net['Subnet'], net['Router']))
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED_BY]->'
                 + '(r:Switch:Router {name:{router}}) '
                 + 'SET e += {vrf:{vrf}, time:{time}} RETURN n',
@@ -189,7 +199,7 @@ def import_single_net(net, ignore_new, vrfmap):
 
     # Standby Router for Network
     elif standby and not p2p:
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED_STANDBY]->'
             + '(r:Switch:Router {name:{router}}) RETURN e',
             vrfcidr=vrfcidr, router=router)
@@ -199,7 +209,7 @@ def import_single_net(net, ignore_new, vrfmap):
             logger.info("New: Creating Standby Router Relationship "
                         + "{0} -> {1} ".format(net['Subnet'], net['Router']))
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}}), (r:Switch:Router {name:{router}}) '
                 + 'CREATE (n)-[e:ROUTED_STANDBY {vrf:{vrf}, time:{time}}]->(r) RETURN e',
                 vrfcidr=vrfcidr, vrf=vrf, time=time, router=router)
@@ -213,7 +223,7 @@ def import_single_net(net, ignore_new, vrfmap):
             logger.debug("Updating Existing Standby Router Relationship: "
                          + "{0} -> {1}".format(net['Subnet'], net['Router']))
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED_STANDBY]->'
                 + '(r:Switch:Router {name:{router}}) SET e += {vrf:{vrf}, time:{time}} RETURN n',
                 vrfcidr=vrfcidr, vrf=vrf, router=router, time=time)
@@ -221,7 +231,7 @@ def import_single_net(net, ignore_new, vrfmap):
     # P2P Routed Network. Use Special ROUTED Label for each VRF
     elif p2p:
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED {vrf:{vrf}}]->'
             + '(r:Switch:Router {name:{router}}) RETURN e',
             vrfcidr=vrfcidr, vrf=vrf, router=router)
@@ -232,7 +242,7 @@ def import_single_net(net, ignore_new, vrfmap):
                         + "{0} -> {1} ({2})".format(net['Subnet'], net['Router'], vrf))
 
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}}), (r:Switch:Router {name:{router}}) '
                 + 'CREATE (n)-[e:ROUTED {vrf:{vrf}, gateway:{gateway}, time:{time}}]->(r) RETURN e',
                 vrfcidr=vrfcidr, vrf=vrf, time=time, gateway=gateway, router=router)
@@ -246,7 +256,7 @@ def import_single_net(net, ignore_new, vrfmap):
             logger.debug("Updating Existing P2P Router Relationship: "
                          + "{0} -> {1} ({2})".format(net['Subnet'], net['Router'], vrf))
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (n:Network {vrfcidr:{vrfcidr}})-[e:ROUTED]->'
                 + '(r:Switch:Router {name:{router}}) '
                 + 'SET e += {vrf:{vrf}, gateway:{gateway}, time:{time}} RETURN n',
@@ -255,36 +265,57 @@ def import_single_net(net, ignore_new, vrfmap):
     # Link up L2 to L3 info
     link_l3_to_l2(vrfcidr, vlan, router, time)
 
+def get_net_range(cidr):
+    """Returns (start, end, prefixlen) of cidr as integers (IPv4 only)"""
+
+    net = ipaddress.ip_network(cidr, strict=False)
+
+    # Neo4j integers are 64bit
+    if net.version != 4:
+        return (None, None, net.prefixlen)
+
+    return (int(net.network_address), int(net.broadcast_address), net.prefixlen)
+
+
+def get_ip_int(ip):
+    """Returns an IPv4 address as an integer (for sorting), None if invalid"""
+
+    try:
+        return int(ipaddress.IPv4Address(ip))
+    except ValueError:
+        return None
+
+
 def link_l3_to_l2(vrfcidr, vlan, router, time):
     """Create relationship on from L3 Vlan to L2 Vlan based on router"""
     group = None
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (n:Network {name:{name}})-[e:L3toL2]->(v:VLAN {vid:{vlan}}) RETURN e',
         name=vrfcidr, vlan=vlan)
 
-    mgmt = nglib.py2neo_ses.cypher.execute(
+    mgmt = nglib.dbpool.execute(
         'MATCH (s:Switch {name:{router}}) RETURN s.mgmt as mgmt',
         router=router)
 
     if len(mgmt) > 0:
-        group = mgmt.records[0].mgmt
+        group = mgmt[0].mgmt
 
     if len(results) == 0 and group:
-        l2vlan = nglib.py2neo_ses.cypher.execute(
+        l2vlan = nglib.dbpool.execute(
             'MATCH (r:Router {name:{name}})<-[e:Switched]-'
             + '(v:VLAN {vid:{vlan}}) RETURN v.name as name',
             name=router, vlan=vlan)
 
         if len(l2vlan) > 0:
 
-            vname = l2vlan.records[0].name
+            vname = l2vlan[0].name
             #print(vname,vrfcidr,router,vlan)
 
             logger.info("New: Creating L3toL2 Relationship "
                         + "{0} vid:{1} -> {2} through {3}".format(vrfcidr, vlan, vname, router))
 
-            l2vlan = nglib.py2neo_ses.cypher.execute(
+            l2vlan = nglib.dbpool.execute(
                 'MATCH (n:Network {name:{name}}), (v:VLAN {name:{vname}}) '
                 + 'CREATE (n)-[e:L3toL2 {time:{time}}]->(v) RETURN e',
                 name=vrfcidr, vname=vname, time=time)
@@ -293,7 +324,7 @@ def link_l3_to_l2(vrfcidr, vlan, router, time):
         logger.debug("Updating L3toL2 Relationship "
                      + "{0} vid:{1} -> {1} through {2}".format(vrfcidr, vlan, router))
 
-        nglib.py2neo_ses.cypher.execute(
+        nglib.dbpool.execute(
             'MATCH (n:Network {name:{name}})-[e:L3toL2]->(v:VLAN {vid:{vlan}}) '
             + 'SET e += {time:{time}} RETURN e',
             name=vrfcidr, vlan=vlan, time=time)
@@ -339,21 +370,21 @@ def import_supernet(snet):
     secure = snet['secure']
 
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (n:Supernet {cidr:{cidr}}) RETURN n', cidr=cidr)
 
     # Insert new supernet
     if len(results) == 0:
         logger.info("New: Inserting Supernet: " + cidr)
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'CREATE (n:Supernet {cidr:{cidr}, name:{cidr}, desc:{desc}, role:{role}, '
             + 'secure:{secure}, time:{time}}) RETURN n',
             cidr=cidr, role=role, desc=desc, secure=secure, time=time)
     # Update existing Supernet
     else:
         logger.debug("Supernet Exists, updating: " + cidr)
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:Supernet {cidr:{cidr}}) '
             + 'SET n += {desc:{desc}, role:{role}, secure:{secure}, time:{time}} RETURN n',
             cidr=cidr, role=role, desc=desc, secure=secure, time=time)
@@ -368,12 +399,12 @@ def update_supernet_links():
     snet = dict()
 
     # Load Supernets as dictionary
-    results = nglib.py2neo_ses.cypher.execute('MATCH (n:Supernet) RETURN n.cidr as cidr')
+    results = nglib.dbpool.execute('MATCH (n:Supernet) RETURN n.cidr as cidr')
     for record in results:
         snet[record.cidr] = 1
 
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (n:Network) RETURN n.cidr as cidr, n.vrfcidr as vrfcidr')
 
     # Scan all networks and try to link to supernet
@@ -396,7 +427,7 @@ def superLink(vrfcidr, supercidr):
 
     time = nglib.get_time()
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (sn:Supernet {cidr:{supercidr}})'
         + '<-[e:SUPER]-(n:Network {vrfcidr:{vrfcidr}}) RETURN e',
         vrfcidr=vrfcidr, supercidr=supercidr)
@@ -405,14 +436,14 @@ def superLink(vrfcidr, supercidr):
     if len(results) == 0:
         logger.info("New: Creating %s -[SUPER]-> %s Link", vrfcidr, supercidr)
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (sn:Supernet {cidr:{supercidr}}), (n:Network {vrfcidr:{vrfcidr}}) '
             + 'CREATE (sn)<-[e:SUPER {time:{time}}]-(n) RETURN e',
             vrfcidr=vrfcidr, supercidr=supercidr, time=time)
     else:
         logger.debug("Super Exists: %s -[SUPER]-> %s Link", vrfcidr, supercidr)
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (sn:Supernet {cidr:{supercidr}})<-[e:SUPER]-'
             + '(n:Network {vrfcidr:{vrfcidr}}) SET e.time={time} RETURN e',
             vrfcidr=vrfcidr, supercidr=supercidr, time=time)
@@ -35,7 +35,6 @@ import re
 import os
 import sys
 import logging
-import functools
 import configparser
 import ipaddress
 import nglib
@@ -43,6 +42,7 @@ import nglib.ngtree
 import nglib.query.vlan
 import nglib.query.dev
 import nglib.query.net
+import nglib.query.netindex
 import nglib.query.nNode
 import nglib.query.path
 
@@ -68,38 +68,40 @@ def exp_ngtree(ngtree, rtype):
 def display_mgmt_groups():
     """Print all Management Groups to the Screen"""
 
-    mgmt = nglib.py2neo_ses.cypher.execute(
+    mgmt = nglib.dbpool.execute(
         'MATCH (s:Switch) RETURN DISTINCT(s.mgmt) as name ORDER BY name')
 
     if len(mgmt) > 0:
         print("Available Groups:")
-        for s in mgmt.records:
+        for s in mgmt:
             print("> " + str(s.name))
     else:
         print("No management groups found in DB")
 
 
 def print_dict_csv(netList):
-    """Print out List of Dictionary Objects as CSV"""
+    """Print out List (or generator) of Dictionary Objects as CSV
 
-    netKeys = []
-
-    # Get Dict keys for CSV Out
-    for key in sorted(netList[0].keys()):
-        if key != "__values__":
-            netKeys.append(key)
+    Keys are taken from the first entry, returns the number of entries
+    """
 
+    netKeys = None
     netWriter = csv.writer(sys.stdout)
-    netWriter.writerow(netKeys)
+    count = 0
 
     # Go through all entries and dump them to CSV
     for en in netList:
-        netValues = []
-        for key in sorted(en.keys()):
-            if key != "__values__":
-                netValues.append(en[key])
+
+        # Get Dict keys for CSV Out
+        if netKeys is None:
+            netKeys = [key for key in sorted(en.keys()) if key != "__values__"]
+            netWriter.writerow(netKeys)
+
         # Write Values to CSV
-        netWriter.writerow(netValues)
+        netWriter.writerow([en.get(key) for key in netKeys])
+        count += 1
+
+    return count
 
 
 def get_net_filter(group):
@@ -134,79 +136,137 @@ def check_net_filter(netDict, group=None, nFilter=None):
     com = default:printer
     """
 
-    if group:
-        vDict = get_filter_dict(group=group)
-    elif nFilter:
-        vDict = get_filter_dict(nFilter=nFilter)
-
-    # Check filter against vDict
-    for vrf in vDict.keys():
-        if netDict['VRF'] == vrf or vrf == "all":
-            #print("VRF MATCH", vrf, netDict['VRF'])
-            for role in vDict[vrf]:
-                if netDict['NetRole'] == role or role == "all":
-                    if nglib.verbose > 1:
-                        logger.debug("VRF and Role MATCH: %s, %s, %s, %s, %s",
-                                    group, vrf, netDict['VRF'], netDict['NetRole'], netDict['CIDR'])
-                    return True
+    netFilter = get_filter(group=group, nFilter=nFilter)
 
-                # No supernet role associated (none=None)
-                elif role == "none" and not netDict['NetRole']:
-                    if nglib.verbose > 1:
-                        logger.debug("VRF and Role MATCH on Null Role: %s, %s, %s, %s, %s",
-                                    group, vrf, netDict['VRF'], netDict['NetRole'], netDict['CIDR'])
-                    return True
-
-                # No Match
-                elif nglib.verbose > 3:
-                    logger.debug("NOMATCH VRF and Role: %s, %s, %s, %s, %s",
-                                 group, vrf, netDict['VRF'], netDict['NetRole'], netDict['CIDR'])
+    if netFilter.match(netDict):
+        if nglib.verbose > 1:
+            logger.debug("VRF and Role MATCH: %s, %s, %s, %s",
+                         netFilter.name, netDict['VRF'], netDict['NetRole'], netDict['CIDR'])
+        return True
 
     if nglib.verbose > 2:
-        logger.debug("No Network Match for %s on %s", netDict['CIDR'], group)
+        logger.debug("No Network Match for %s on %s", netDict['CIDR'], netFilter.name)
     return False
 
 
-@functools.lru_cache(maxsize=1)
-def get_filter_dict(group=None, nFilter=None):
-    """Process config for group or custom filter and cache it for each call"""
+class NetFilter:
+    """
+    Compiled vrf:role network filter (see check_net_filter)
+
+    - vrfs maps each VRF (or "all") to a frozenset of roles, "all" matches
+      any role and "none" matches networks without a supernet role
+    - match() is a couple of set lookups per network
+    - cypher() compiles the filter to a WHERE expression
+    """
+
+    def __init__(self, fString, name=None):
+        self.filter = fString
+        self.name = name or fString
+        self.vrfs = dict()
+
+        # Split all VRFs by spaces
+        for f in fString.split():
+
+            # Roles specified
+            if ':' in f:
+                (vrf, roles) = f.split(':')
+                self.vrfs[vrf] = frozenset(roles.split('|'))
+
+            # All roles for VRF
+            else:
+                self.vrfs[f] = frozenset(["all"])
+
+        self.allvrfs = self.vrfs.get("all")
+
+        if nglib.verbose > 1:
+            print("NetFilter Contents", self.name, str(self.vrfs))
+
+    def match(self, netDict):
+        """Returns True if the network properties dict matches the filter"""
+
+        role = netDict['NetRole']
 
-    vDict = dict()
-    gFilter = None
+        for roles in (self.vrfs.get(netDict['VRF']), self.allvrfs):
+            if roles:
+                if "all" in roles or role in roles or (not role and "none" in roles):
+                    return True
+
+        return False
+
+    def cypher(self):
+        """
+        Returns (where, params) Cypher for the filter
+
+        Expects v (VRF) and s (Supernet, may be null) bound in the query
+        """
+
+        clauses = []
+        params = dict()
+
+        for num, vrf in enumerate(sorted(self.vrfs.keys())):
+            clause = []
+
+            if vrf != "all":
+                params['fvrf' + str(num)] = vrf
+                clause.append('v.name = {fvrf' + str(num) + '}')
+
+            roles = self.vrfs[vrf]
+            if "all" not in roles:
+                rclause = []
+                named = sorted(role for role in roles if role != "none")
+                if named:
+                    params['froles' + str(num)] = named
+                    rclause.append('s.role IN {froles' + str(num) + '}')
+                if "none" in roles:
+                    rclause.append("s.role IS NULL OR s.role = ''")
+                clause.append('(' + ' OR '.join(rclause) + ')')
+
+            if not clause:
+                return ('true', dict())
+
+            clauses.append('(' + ' AND '.join(clause) + ')')
+
+        if not clauses:
+            return ('false', dict())
+
+        return (' OR '.join(clauses), params)
+
+
+# Compiled NetFilters by filter string
+filter_cache = dict()
+filter_cache_size = 256
+
+
+def get_filter(group=None, nFilter=None):
+    """Returns a cached NetFilter for a config group or custom filter"""
 
     if group:
-        gFilter = nglib.config['NetAlertFilter'][group]
+        fString = nglib.config['NetAlertFilter'][group]
     elif nFilter:
-        gFilter = nFilter
+        fString = nFilter
     else:
         raise Exception("Must pass in group or filter")
 
-    # Split all VRFs by spaces
-    vrfFilters = gFilter.rsplit()
+    netFilter = filter_cache.get(fString)
 
-    # Process Filters
-    for f in vrfFilters:
+    if netFilter is None:
+        if len(filter_cache) >= filter_cache_size:
+            filter_cache.clear()
+        netFilter = NetFilter(fString, name=group)
+        filter_cache[fString] = netFilter
+
+    return netFilter
 
-        # Multiple roles specified
-        if re.search(':', f):
-            (vrf, roles) = f.split(':')
-            vDict[vrf] = []                   # Empty vDict List
-            if re.search('|', roles):
-                rList = roles.split('|')      # Split up multiple roles if exists
-                for r in rList:
-                    vDict[vrf].append(r)      # Append multiple roles to List
-            else:
-                vDict[vrf].append(roles)      # Append single role to list
 
-        # All roles for VRF
-        else:
-            vDict[f] = []
-            vDict[f].append("all")
+def get_filter_cypher(group=None, nFilter=None):
+    """
+    Compile a group or custom vrf:role filter to a Cypher WHERE expression
+
+    Returns (where, params), see NetFilter.cypher()
+    """
 
-    if nglib.verbose > 1:
-        print("vDict Contents", str(vDict))
+    return get_filter(group=group, nFilter=nFilter).cypher()
 
-    return vDict
 
 def universal_text_search(text, vrange, rtype="TREE"):
     """
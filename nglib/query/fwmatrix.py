@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph VRF Security Path Matrix
+- Shortest VRF_IN|ROUTED_FW|SWITCHED_FW path between every pair of VRFs
+- One query builds the whole matrix, there are only a few dozen VRFs
+- Cached in process and rebuilt when the fw or networks generation changes
+  (import_fw and import_networks bump them)
+"""
+import threading
+import logging
+from timeit import default_timer as timer
+import nglib
+import nglib.query.templates
+
+logger = logging.getLogger(__name__)
+
+# Process wide matrix (see get_matrix)
+matrix = None
+_lock = threading.Lock()
+
+
+class FWMatrix:
+    """(src VRF, dst VRF) -> shortest security Path"""
+
+    def __init__(self, gen=None):
+        self.gen = gen
+        self.paths = dict()
+
+    def load(self):
+        """Compute every VRF pair's shortest path up to the max depth"""
+
+        start = timer()
+
+        results = nglib.dbpool.execute(
+            'MATCH (sv:VRF), (dv:VRF) '
+            + 'OPTIONAL MATCH p = shortestPath((sv)-[:VRF_IN|ROUTED_FW|:SWITCHED_FW*0..'
+            + str(nglib.query.templates.depth_buckets[-1]) + ']-(dv)) '
+            + 'RETURN sv.name AS svrf, dv.name AS dvrf, p')
+
+        for r in results:
+            if r.p is not None:
+                self.paths[(r.svrf, r.dvrf)] = r.p
+
+        logger.debug("FWMatrix: Loaded %s VRF paths in %.3fs",
+                     len(self.paths), timer() - start)
+
+        return self
+
+    def get_path(self, svrf, dvrf, depth):
+        """Returns the Path between two VRFs within depth, or None"""
+
+        path = self.paths.get((svrf, dvrf))
+
+        if path is not None and len(path.relationships) <= depth:
+            return path
+
+        return None
+
+
+def get_matrix():
+    """Returns the shared FWMatrix, rebuilding it after fw or network imports"""
+
+    global matrix
+
+    gen = (nglib.get_generation('fw'), nglib.get_generation('networks'))
+    fwmatrix = matrix
+
+    if fwmatrix is None or fwmatrix.gen != gen:
+        with _lock:
+            if matrix is None or matrix.gen != gen:
+                matrix = FWMatrix(gen).load()
+            fwmatrix = matrix
+
+    return fwmatrix
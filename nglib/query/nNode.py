@@ -30,24 +30,50 @@
 #    delete this exception statement from all source files in the program,
 #    then also delete it in the license file.
 """
-Py2Neo Node Properties (Deprecated)
+Neo4j Node Properties
+
+- get_properties() maps node or edge properties straight to a dict
+- NodeRecord classes give optional typed, attribute style access
 
 """
 import logging
-import json
 import nglib
+import nglib.dbpool
 
 logger = logging.getLogger(__name__)
 
 
-def getJSONProperties(node):
-    """Returns Properties for a node from JSON as a nested dictionary"""
+class NodeRecord(nglib.dbpool.Record):
+    """Node properties as a dict with attribute access (eg. net.cidr)"""
+
+    label = None
+
+    @classmethod
+    def from_node(cls, node):
+        """Build a record from a node without any serialization"""
+        return cls(get_properties(node))
+
+
+class NetworkRecord(NodeRecord):
+    """Network node properties"""
+    label = 'Network'
+
+
+class SwitchRecord(NodeRecord):
+    """Switch and Router node properties"""
+    label = 'Switch'
 
-    json_string = swapQuotes(str(node.properties))
-    if nglib.verbose > 1:
-        print("JSON:", json_string)
-    parsed_json = json.loads(json_string)
-    return parsed_json
+
+def get_properties(node):
+    """Returns the properties of a node or edge as a dict (no JSON round trip)"""
+
+    # Bolt 1.0-1.4 and py2neo expose a properties dict, newer bolt nodes are mappings
+    try:
+        props = node.properties
+    except AttributeError:
+        props = node
+
+    return dict(props)
 
 
 def getLabel(node):
@@ -64,21 +90,20 @@ def getEdge(edge):
     """Return Edge Type"""
     return str(edge.type)
 
-def getRelationship(edge):
-    """Get Relationship on edge for printing"""
+def getRelationship(edge, snode=None, enode=None):
+    """
+    Get Relationship on edge for printing
+
+    Bolt relationships only carry node ids, so pass in the start and end nodes
+    """
 
-    snode = edge.start_node
-    snodeProp = getJSONProperties(snode)
-    enode = edge.end_node
-    enodeProp = getJSONProperties(enode)
+    if snode is None:
+        snode = edge.start_node
+    snodeProp = get_properties(snode)
+    if enode is None:
+        enode = edge.end_node
+    enodeProp = get_properties(enode)
     relation = getLabel(snode) + "{name:" + snodeProp['name'] + "}-[" + getEdge(edge)
     relation += "]->"  + getLabel(enode) + "{name:" + enodeProp['name'] + "}"
 
     return relation
-
-
-def swapQuotes(myString):
-    """Swaps single quote with double quotes"""
-
-    myString = myString.replace("'", '"')
-    return myString
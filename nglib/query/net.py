@@ -32,18 +32,39 @@
 """
 import sys
 import re
+import csv
+import json
 import socket
 from operator import itemgetter, attrgetter
 import ipaddress
 import logging
 import nglib
 import nglib.netdb.ip
+import nglib.query.netindex
 from nglib.exceptions import OutputError, ResultError
 
-from nglib.query.nNode import getJSONProperties
+from nglib.query.nNode import NetworkRecord, SwitchRecord
 
 logger = logging.getLogger(__name__)
 
+# Network properties projection, follows a MATCH on (n:Network)
+net_props_match = (
+    'MATCH (n)-[:VRF_IN]->(v:VRF) '
+    + 'OPTIONAL MATCH (n)-[:ROUTED_BY|ROUTED]->(r:Switch:Router) '
+    + 'WITH n, v, head(collect(r)) AS r '
+    + 'OPTIONAL MATCH (n)-[:ROUTED_STANDBY]->(rs:Switch:Router) '
+    + 'WITH n, v, r, head(collect(rs)) AS rs '
+    + 'OPTIONAL MATCH (n)--(s:Supernet) '
+    + 'WITH n, v, r, rs, head(collect(s)) AS s ')
+
+net_props_return = (
+    'RETURN n.cidr AS CIDR, n.vid AS VLAN, '
+    + 'n.gateway as Gateway, n.location as Location, n.desc AS Description, '
+    + 'r.name AS Router, s.role AS NetRole, v.name as VRF, v.seczone AS SecurityLevel, '
+    + 'r.mgmt AS Mgmt, rs.name AS StandbyRouter, n.name AS vrfcidr')
+
+net_props_query = net_props_match + net_props_return
+
 
 def get_net(ip, rtype="TREE", days=7, verbose=True):
     """Find a network for ip and return text output"""
@@ -77,7 +98,7 @@ def get_net(ip, rtype="TREE", days=7, verbose=True):
 def get_net_extended_tree(net, ip=None, ngtree=None, ngname="Networks"):
     """Built a Network ngtree with extended subnet attributes"""
 
-    network = nglib.py2neo_ses.cypher.execute(
+    network = nglib.dbpool.execute(
         'MATCH (n:Network { cidr:{net} })-[e:ROUTED_BY]->(r) '
         + 'OPTIONAL MATCH (n)-[:ROUTED_STANDBY]->(sr) RETURN n,r,sr',
         net=net)
@@ -89,15 +110,15 @@ def get_net_extended_tree(net, ip=None, ngtree=None, ngname="Networks"):
     matches = dict()
 
     if len(network) > 0:
-        for n in network.records:
+        for n in network:
 
             # Get node properties
-            nProp = getJSONProperties(n.n)
-            rProp = getJSONProperties(n.r)
+            nProp = NetworkRecord.from_node(n.n)
+            rProp = SwitchRecord.from_node(n.r)
 
             standby = None
             if n.sr:
-                standby = getJSONProperties(n.sr)['name']
+                standby = SwitchRecord.from_node(n.sr).name
 
             # Cache: Not already found
             if nProp['vrfcidr'] not in matches.keys():
@@ -172,45 +193,23 @@ def get_networks_on_filter(group=None, nFilter=None, rtype="NGTREE"):
             raise Exception("Must pass in group or nFilter")
 
 
-        # Get all networks
-        networks = nglib.bolt_ses.run(
-            'MATCH(n:Network), (n)--(v:VRF), (n)-[:ROUTED_BY]->(r:Switch:Router) '
-            + 'OPTIONAL MATCH (n)--(s:Supernet) OPTIONAL MATCH '
-            + '(n)-[:ROUTED_STANDBY]->(rs:Switch:Router) '
-            + 'RETURN n.cidr AS CIDR, n.vid AS VLAN, '
-            + 'n.gateway as Gateway, n.location as Location, n.desc AS Description, '
-            + 'r.name AS Router, rs.name AS StandbyRouter, s.role AS NetRole, '
-            + 'r.mgmt AS Mgmt, v.name as VRF, n.vrfcidr AS vrfcidr, '
-            + 'v.seczone AS SecurityLevel ORDER BY CIDR')
-
-
-        # Sort results by gateway IP
-        sort_nets = {}
-        for n in networks:
-            sort_nets[ipaddress.IPv4Address(n['Gateway'])] = n
-        for net in sorted(sort_nets.keys(), key=ipaddress.get_mixed_type_key):
-            net = sort_nets[net]
-
-            # Build a proper dict
-            netDict = dict()
-            for key in net:
-                netDict[key] = net[key]
-
-            # Matches Filter
-            if len(netDict) and nglib.query.check_net_filter(netDict, group=group, nFilter=nFilter):
+        # Filter is compiled to Cypher, only matching networks are returned
+        if group:
+            (where, params) = nglib.query.get_filter_cypher(group=group)
+        else:
+            (where, params) = nglib.query.get_filter_cypher(nFilter=nFilter)
 
-                netList.append(netDict)
-                netDict['_type'] = "CIDR"
-                netDict['Name'] = netDict['CIDR']
-                netDict['data'] = []
+        networks = nglib.dbpool.stream(
+            'MATCH (n:Network) WHERE (n)-[:ROUTED_BY]->(:Switch:Router) '
+            + net_props_match + 'WHERE ' + where + ' '
+            + net_props_return + ' ORDER BY n.gwint, n.vrf', params)
 
-                # Cleanup Results
-                netDict.pop('__values__', None)
-                netDict.pop('_ccount', None)
-                nglib.ngtree.add_child_ngtree(ngtree, netDict)
+        for netDict in networks:
+            netList.append(netDict)
+            add_net_ngtree(ngtree, netDict)
 
         # Check for results
-        if '_ccount' in ngtree:
+        if ngtree['_ccount']:
             ngtree['Count'] = ngtree['_ccount']
 
             # CSV Prints locally for now
@@ -232,8 +231,10 @@ def get_networks_on_filter(group=None, nFilter=None, rtype="NGTREE"):
 def get_networks_on_cidr(cidr, rtype="CSV"):
     """
     Pass in CIDR, get results as a network list
-    Refactoring with Bolt Driver (hybrid)
-    Notes: Need to convert to get_net_extended_tree but ran in to bugs
+
+    Returns the networks that fall entirely inside CIDR. Single range query
+    on the indexed Network nstart/nend properties (IPv4 only), CSV rows are
+    streamed out as they arrive
     """
 
     rtypes = ('CSV', 'TREE', 'JSON', 'YAML', "NGTREE")
@@ -242,54 +243,38 @@ def get_networks_on_cidr(cidr, rtype="CSV"):
 
         logger.info("Query: Network CIDRs in %s for %s", cidr, nglib.user)
 
-        netList = []
-        ngtree = nglib.ngtree.get_ngtree("IN CIDR", tree_type="NET")
-        ngtree['CIDR'] = cidr
-
-        networks = nglib.bolt_ses.run(
-            'MATCH (n:Network) RETURN n.gateway AS gateway, n.name AS vrfcidr ORDER BY gateway')
-
-        # Sort results by gateway IP
-        sort_nets = {}
-        for n in networks:
-            sort_nets[ipaddress.IPv4Address(n['gateway'])] = n
-        for net in sorted(sort_nets.keys(), key=ipaddress.get_mixed_type_key):
-            net = sort_nets[net]
+        subnet = ipaddress.ip_network(cidr)
 
-            # Check to see if gateway IP within CIDR (subnet boundary won't match)
-            if net['gateway']:
-                if ipaddress.ip_address(net['gateway']) in ipaddress.ip_network(cidr):
+        # Address ranges are only stored on IPv4 Networks (64bit integers)
+        if subnet.version != 4:
+            print("No Results for", cidr)
+            return
 
-                    netDict = get_net_props(net['vrfcidr'])
+        query = ('MATCH (n:Network) WHERE n.nstart >= {start} AND n.nend <= {end} '
+                 + net_props_query + ' ORDER BY n.nstart, n.vrf')
+        params = dict(start=int(subnet.network_address), end=int(subnet.broadcast_address))
 
-                    # # Get extended net tree for subnet and pull out child element
-                    if nglib.verbose > 2:
-                        logging.debug(netDict['CIDR'] + " in Supernet " + cidr)
-                    netList.append(netDict)
+        # CSV Handled locally for now
+        if rtype == "CSV":
+            if not nglib.query.print_dict_csv(nglib.dbpool.stream(query, params)):
+                print("No Results for", cidr)
+            return
 
-                    # NGTree
-                    netDict['_type'] = "CIDR"
-                    netDict['Name'] = netDict['CIDR']
-                    netDict['data'] = []
-                    netDict['_ccount'] = 0
+        ngtree = nglib.ngtree.get_ngtree("IN CIDR", tree_type="NET")
+        ngtree['CIDR'] = cidr
 
-                    cleanND = netDict.copy()
-                    cleanND.pop('__values__', None)
-                    cleanND.pop('_ccount', None)
-                    nglib.ngtree.add_child_ngtree(ngtree, cleanND)
+        for netDict in nglib.dbpool.stream(query, params):
+            if nglib.verbose > 2:
+                logging.debug(netDict['CIDR'] + " in Supernet " + cidr)
+            add_net_ngtree(ngtree, netDict)
 
         # Results
-        if len(netList) > 0:
+        if ngtree['_ccount']:
             ngtree['Count'] = ngtree['_ccount']
 
-            # CSV Handled locally for now
-            if rtype == "CSV":
-                nglib.query.print_dict_csv(netList)
-            # Export NG Trees
-            else:
-                # Export NGTree
-                ngtree = nglib.query.exp_ngtree(ngtree, rtype)
-                return ngtree
+            # Export NGTree
+            ngtree = nglib.query.exp_ngtree(ngtree, rtype)
+            return ngtree
         else:
             print("No Results for", cidr)
 
@@ -297,9 +282,21 @@ def get_networks_on_cidr(cidr, rtype="CSV"):
         raise OutputError("RType Not Supported", str(rtypes))
 
 
+def add_net_ngtree(ngtree, netDict):
+    """Add a network properties dict to ngtree as a CIDR child"""
 
-def find_cidr(ip):
-    """Finds most specific CIDR in Networks"""
+    netDict = dict(netDict)
+    netDict['_type'] = "CIDR"
+    netDict['Name'] = netDict['CIDR']
+    netDict['data'] = []
+    nglib.ngtree.add_child_ngtree(ngtree, netDict)
+
+
+def find_cidr(ip, vrf=None):
+    """Finds most specific CIDR in Networks (optionally within a VRF)
+
+    Uses the shared longest prefix match index in nglib.query.netindex
+    """
 
     # Check for non-ip, try DNS
     if not re.search(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$', ip):
@@ -311,19 +308,92 @@ def find_cidr(ip):
     # Always start with default route
     mostSpecific = "0.0.0.0/0"
 
-    # All networks
-    networks = nglib.py2neo_ses.cypher.execute('MATCH (n:Network) RETURN n.cidr as cidr')
+    found = nglib.query.netindex.get_index().find(ip, vrf=vrf)
 
-    if len(networks) > 1:
-        for r in networks.records:
-            if ipaddress.ip_address(ip) in ipaddress.ip_network(r.cidr):
-                if nglib.verbose > 1:
-                    print("find_cidr", ip + " in " + r.cidr)
-                mostSpecific = compare_cidr(mostSpecific, r.cidr)
+    if found:
+        mostSpecific = found[0]
+        if nglib.verbose > 1:
+            print("find_cidr", ip + " in " + mostSpecific, sorted(found[1]))
 
     return mostSpecific
 
 
+def parse_ip_list(text):
+    """Returns a list of IPs from text (whitespace or comma separated)"""
+
+    return [ip for ip in re.split(r'[\s,]+', text) if ip]
+
+
+def resolve_ips(ips, vrf=None):
+    """
+    Bulk resolve IPs to their most specific Network
+
+    All lookups run against the shared prefix index and attribute table,
+    only the first call after a network import touches the database.
+    Returns a generator of dicts (see ip_fields), one per VRF the network
+    exists in (or only vrf if set). Unresolved IPs return an empty CIDR.
+    No DNS lookups are done in bulk mode.
+    """
+
+    netindex = nglib.query.netindex.get_index()
+    table = nglib.query.netindex.get_table(netindex)
+
+    def resolve():
+        for ip in ips:
+            ip = ip.strip()
+            try:
+                found = netindex.find(ip, vrf=vrf)
+            except ValueError:
+                logger.debug("resolve_ips: Invalid IP %s", ip)
+                found = None
+
+            if not found:
+                yield dict(IP=ip)
+                continue
+
+            for nvrf in sorted(found[1]):
+                if vrf and nvrf != vrf:
+                    continue
+                net = table.get(found[1][nvrf])
+                if not net:
+                    yield dict(IP=ip, CIDR=found[0], VRF=nvrf)
+                    continue
+                yield dict(IP=ip, CIDR=net.cidr, VRF=net.vrf,
+                           Router=','.join(net.routers),
+                           StandbyRouter=','.join(net.standby),
+                           VLAN=net.vid, Gateway=net.gateway,
+                           Description=net.desc)
+
+    return resolve()
+
+
+# Bulk IP resolution CSV fields
+ip_fields = ('IP', 'CIDR', 'VRF', 'Router', 'StandbyRouter', 'VLAN',
+             'Gateway', 'Description')
+
+
+def get_ip_list(ips, rtype="CSV", vrf=None):
+    """Resolve a list of IPs and stream results as CSV or JSON (one per line)"""
+
+    rtypes = ('CSV', 'JSON')
+
+    if rtype not in rtypes:
+        raise OutputError("RType Not Supported", str(rtypes))
+
+    logger.info("Query: Bulk IP lookup of %s IPs for %s", len(ips), nglib.user)
+
+    results = resolve_ips(ips, vrf=vrf)
+
+    if rtype == "CSV":
+        excsv = csv.DictWriter(sys.stdout, fieldnames=ip_fields)
+        excsv.writeheader()
+        for row in results:
+            excsv.writerow(row)
+    else:
+        for row in results:
+            print(json.dumps(row, sort_keys=True))
+
+
 def get_ipv4net(cidr):
     """Returns an IPv4Network Object"""
 
@@ -337,7 +407,7 @@ def compare_cidr(first, second):
     mask1 = first.split('/')
     mask2 = second.split('/')
 
-    if mask1[1] > mask2[1]:
+    if int(mask1[1]) > int(mask2[1]):
         return first
     else:
         return second
@@ -346,19 +416,19 @@ def compare_cidr(first, second):
 def get_net_props(vrfcidr):
     """Use bolt to get a network returned as a true dict()"""
 
-    resultDict = dict()
+    return get_nets_props([vrfcidr]).get(vrfcidr, dict())
+
+
+def get_nets_props(vrfcidrs):
+    """Bulk get_net_props, returns {vrfcidr: dict()} in one query"""
+
+    nets = dict()
 
-    result = nglib.bolt_ses.run(
-        'MATCH(n:Network {vrfcidr:{vrfcidr}}), (n)--(v:VRF), (n)--(r:Switch:Router)'
-        + ' OPTIONAL MATCH (n)--(s:Supernet), (n)-[:ROUTED_STANDBY]->(rs:Switch:Router)'
-        + ' RETURN n.cidr AS CIDR, n.vid AS VLAN,'
-        + ' n.gateway as Gateway, n.location as Location, n.desc AS Description, '
-        + 'r.name AS Router, s.role AS NetRole, v.name as VRF, v.seczone AS SecurityLevel, '
-        + 'r.mgmt AS Mgmt, rs.name AS StandbyRouter, n.name AS vrfcidr',
-        {"vrfcidr": vrfcidr})
+    results = nglib.dbpool.stream(
+        'UNWIND {vrfcidrs} AS vrfcidr MATCH (n:Network {vrfcidr:vrfcidr}) '
+        + net_props_query, vrfcidrs=list(vrfcidrs))
 
-    for r in result:
-        for key in r:
-            resultDict[key] = r[key]
+    for r in results:
+        nets[r.vrfcidr] = dict(r)
 
-    return resultDict
+    return nets
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph Network Prefix Index
+- In-process longest prefix match index over all Network CIDRs
+- Path compressed binary (Patricia) trie per IP version, keyed on integers
+- Every prefix stores the VRFs it exists in, lookups can filter by VRF
+- Built lazily and shared across threads, rebuilt when the networks
+  import generation changes (see nglib.bump_generation)
+- get_table() adds Network attributes for bulk IP resolution
+"""
+import ipaddress
+import threading
+import logging
+from timeit import default_timer as timer
+import nglib
+
+logger = logging.getLogger(__name__)
+
+# Process wide index (see get_index)
+index = None
+_lock = threading.Lock()
+
+
+class TrieNode:
+    """Prefix node, value is set only when a network ends here"""
+
+    __slots__ = ('key', 'plen', 'value', 'children')
+
+    def __init__(self, key, plen, value=None):
+        self.key = key
+        self.plen = plen
+        self.value = value
+        self.children = [None, None]
+
+
+class PrefixTrie:
+    """Patricia trie over bits wide integer prefixes"""
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.root = TrieNode(0, 0)
+        self.size = 0
+
+    def _bit(self, key, pos):
+        """Bit of key at pos (0 is the most significant bit)"""
+        return (key >> (self.bits - 1 - pos)) & 1
+
+    def _mask(self, key, plen):
+        """Key masked to plen bits"""
+        return key >> (self.bits - plen) << (self.bits - plen) if plen else 0
+
+    def insert(self, key, plen):
+        """Returns the node for key/plen, creating it if necessary"""
+
+        key = self._mask(key, plen)
+        node = self.root
+
+        while True:
+            if node.plen == plen:
+                return node
+
+            bit = self._bit(key, node.plen)
+            child = node.children[bit]
+
+            if child is None:
+                child = TrieNode(key, plen)
+                node.children[bit] = child
+                self.size += 1
+                return child
+
+            # Common prefix length of key and child
+            diff = key ^ child.key
+            common = self.bits - diff.bit_length() if diff else self.bits
+            common = min(common, plen, child.plen)
+
+            if common == child.plen:
+                node = child
+                continue
+
+            # Split the edge with an intermediate node
+            mid = TrieNode(self._mask(key, common), common)
+            mid.children[self._bit(child.key, common)] = child
+            node.children[bit] = mid
+            if common == plen:
+                self.size += 1
+                return mid
+
+            leaf = TrieNode(key, plen)
+            mid.children[self._bit(key, common)] = leaf
+            self.size += 1
+            return leaf
+
+    def lookup(self, addr, match=None):
+        """Returns the longest prefix node containing addr
+
+        match is an optional function on node values to filter candidates
+        """
+
+        best = None
+        node = self.root
+
+        while node is not None:
+            if self._mask(addr, node.plen) != node.key:
+                break
+            if node.value is not None and (match is None or match(node.value)):
+                best = node
+            if node.plen == self.bits:
+                break
+            node = node.children[self._bit(addr, node.plen)]
+
+        return best
+
+
+class NetIndex:
+    """Longest prefix match index of Network CIDRs across VRFs"""
+
+    def __init__(self, gen=None):
+        self.gen = gen
+        self.tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self.table = None
+
+    def add(self, cidr, vrf, vrfcidr):
+        """Add a Network to the index"""
+
+        net = ipaddress.ip_network(cidr, strict=False)
+        trie = self.tries[net.version]
+        node = trie.insert(int(net.network_address), net.prefixlen)
+
+        if node.value is None:
+            node.value = dict()
+        node.value[vrf] = vrfcidr
+
+    def find(self, ip, vrf=None):
+        """Returns (cidr, {vrf: vrfcidr}) of the most specific network for ip
+
+        Restricts the search to a single VRF if vrf is set, None if no match
+        """
+
+        addr = ipaddress.ip_address(ip)
+        trie = self.tries[addr.version]
+
+        match = None
+        if vrf:
+            match = lambda value: vrf in value
+
+        node = trie.lookup(int(addr), match)
+
+        if node is None:
+            return None
+
+        cidr = str(ipaddress.ip_network((node.key, node.plen)))
+        return cidr, node.value
+
+    def __len__(self):
+        return self.tries[4].size + self.tries[6].size
+
+
+def build_index(gen=None):
+    """Build a NetIndex of all Networks in the database"""
+
+    start = timer()
+    netindex = NetIndex(gen)
+
+    networks = nglib.dbpool.execute(
+        'MATCH (n:Network) RETURN n.cidr AS cidr, n.vrf AS vrf, n.vrfcidr AS vrfcidr')
+
+    for r in networks:
+        try:
+            netindex.add(r.cidr, r.vrf, r.vrfcidr)
+        except ValueError:
+            logger.warning("NetIndex: Skipping invalid CIDR %s", r.vrfcidr)
+
+    logger.debug("NetIndex: Indexed %s networks in %.3fs",
+                 len(netindex), timer() - start)
+
+    return netindex
+
+
+def build_table():
+    """Returns {vrfcidr: Record} of Network, Router and Standby attributes"""
+
+    start = timer()
+    table = dict()
+
+    networks = nglib.dbpool.execute(
+        'MATCH (n:Network) OPTIONAL MATCH (n)-[:ROUTED_BY]->(r) '
+        + 'OPTIONAL MATCH (n)-[:ROUTED_STANDBY]->(sr) '
+        + 'RETURN n.vrfcidr AS vrfcidr, n.cidr AS cidr, n.vrf AS vrf, n.vid AS vid, '
+        + 'n.gateway AS gateway, n.desc AS desc, collect(DISTINCT r.name) AS routers, '
+        + 'collect(DISTINCT sr.name) AS standby')
+
+    for r in networks:
+        table[r.vrfcidr] = r
+
+    logger.debug("NetIndex: Loaded %s network attributes in %.3fs",
+                 len(table), timer() - start)
+
+    return table
+
+
+def get_index():
+    """Returns the shared NetIndex, rebuilding it after network imports"""
+
+    global index
+
+    gen = nglib.get_generation('networks')
+    netindex = index
+
+    if netindex is None or netindex.gen != gen:
+        with _lock:
+            if index is None or index.gen != gen:
+                index = build_index(gen)
+            netindex = index
+
+    return netindex
+
+
+def get_table(netindex=None):
+    """Returns the Network attribute table for netindex (default shared index)"""
+
+    if netindex is None:
+        netindex = get_index()
+
+    if netindex.table is None:
+        with _lock:
+            if netindex.table is None:
+                netindex.table = build_table()
+
+    return netindex.table
+
+
+def invalidate():
+    """Drop the shared index, rebuilt on next lookup"""
+
+    global index
+    index = None
@@ -31,18 +31,62 @@
 Network Path Algorithms Between Switches and Routers
 
 """
+import os
 import re
 import sys
+import signal
+import copy
 import logging
 import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from timeit import default_timer as timer
 import nglib
 import nglib.query.nNode
+import nglib.query.routegraph
+import nglib.query.fwmatrix
 import nglib.netdb.ip
 from nglib.exceptions import ResultError
+from nglib.query import pathcache, templates
 
 logger = logging.getLogger(__name__)
 
-
+# Path query templates (depth buckets, see nglib.query.templates)
+templates.register(
+    'routed_path',
+    'MATCH (sn:Network)-[:ROUTED_BY|ROUTED_STANDBY]-(sr), '
+    + '(dn:Network)-[:ROUTED_BY|ROUTED_STANDBY]-(dr), rp = allShortestPaths '
+    + '((sr)-[:ROUTED*0..$BUCKET]-(dr)) '
+    + 'WHERE ALL(v IN rels(rp) WHERE v.vrf = {vrf}) '
+    + 'AND sn.cidr =~ {net1} AND dn.cidr =~ {net2} '
+    + 'WITH sn, rp WHERE length(rp) <= {depth} '
+    + 'UNWIND nodes(rp) as r1 UNWIND nodes(rp) as r2 '
+    + 'MATCH (r1)<-[l1:ROUTED]-(n:Network {vrf:{vrf}})-[l2:ROUTED]->(r2) '
+    + 'OPTIONAL MATCH (n)-[:L3toL2]->(v:VLAN) '
+    + 'RETURN DISTINCT r1.name AS r1name, l1.gateway AS r1ip, '
+    + 'r2.name AS r2name, l2.gateway as r2ip, v.vid AS vid, '
+    + 'LENGTH(shortestPath((sn)<-[:ROUTED|ROUTED_BY|ROUTED_STANDBY*0..12]->(r1))) '
+    + 'AS distance ORDER BY distance',
+    {"net1": "", "net2": "", "vrf": "default"})
+
+templates.register(
+    'switched_path',
+    'MATCH (ss:Switch), (ds:Switch), '
+    + 'sp = allShortestPaths((ss)-[:NEI|NEI_EQ*0..$BUCKET]-(ds)) '
+    + 'WHERE ss.name =~ {switch1} AND ds.name =~ {switch2} '
+    + 'WITH ss, sp WHERE length(sp) <= {depth} '
+    + 'UNWIND nodes(sp) as s1 UNWIND nodes(sp) as s2 '
+    + 'MATCH (s1)<-[nei:NEI|NEI_EQ]-(s2), plen = shortestPath((ss)-[:NEI*0..20]-(s1)) '
+    + 'RETURN DISTINCT s1.name AS csw, s2.name AS psw, '
+    + 's1.model AS cmodel, s1.version AS cver, s2.model AS pmodel, s2.version AS pver, '
+    + 'nei.pPort AS pport, nei.cPort as cport, nei.native AS native, '
+    + 'nei.cPc as cPc, nei.pPc AS pPc, nei.vlans AS vlans, nei.rvlans as rvlans, '
+    + 'nei._rvlans AS p_rvlans, '
+    + 'LENGTH(plen) as distance ORDER BY distance, s1.name, s2.name',
+    {"switch1": "", "switch2": ""})
+
+
+@pathcache.cached_path
 def get_full_path(src, dst, popt, rtype="NGTREE"):
     """ Gets the full path (switch->rt->VRF->rt->switch)
 
@@ -69,66 +113,95 @@ def get_full_path(src, dst, popt, rtype="NGTREE"):
 
         net1, net2 = src, dst
         n1tree, n2tree = None, None
-
-        # Translate IPs to CIDRs
-        n1tree = nglib.query.net.get_net(net1, rtype="NGTREE", verbose=popt['verbose'])
-        if n1tree:
-            net1 = n1tree['data'][0]['Name']
-
-        n2tree = nglib.query.net.get_net(net2, rtype="NGTREE", verbose=popt['verbose'])
-        if n2tree:
-            net2 = n2tree['data'][0]['Name']
-
-        if not n1tree or not n2tree:
-            errort = nglib.ngtree.get_ngtree("Path Error", tree_type="L3-PATH")
-            errort['Error'] = 'Network Lookup Error'
-            errort["Lx Path"] = src + " -> " + dst
-            return errort
-
         srctree, dsttree, srcswp, dstswp = None, None, None, None
 
-        if 'vrfcidr' not in n1tree['data'][0]:
-            print("Warning: Could not locate", src, file=sys.stderr)
-            return
-        if 'vrfcidr' not in n2tree['data'][0]:
-            print("Warning: Could not locate", dst, file=sys.stderr)
-            return          
-
-        # Routing Check
-        routing = True
-        if n1tree['data'][0]['vrfcidr'] == n2tree['data'][0]['vrfcidr']:
-            routing = False
-
-        if nglib.use_netdb:
-            srctree = nglib.netdb.ip.get_netdb_ip(src)
-            dsttree = nglib.netdb.ip.get_netdb_ip(dst)
-
-        # Find Switched Path from Source to Router
-        if srctree:
-            router = n1tree['data'][0]['Router']
-            if 'StandbyRouter' in n1tree['data'][0]:
-                router = router + '|' + n1tree['data'][0]['StandbyRouter']
-            if 'Switch' in srctree and srctree['Switch']:
-                srcswp = get_switched_path(srctree['Switch'], router, popt)
-            else:
-                srctree = None
-                print("Warning: Could not find source switch data in NetDB:", src, file=sys.stderr)
-
-        # Find Switched Path from Router to Destination
-        if dsttree:
-            router = n2tree['data'][0]['Router']
-            if 'StandbyRouter' in n2tree['data'][0]:
-                router = router + '|' + n2tree['data'][0]['StandbyRouter']
-            if 'Switch' in dsttree and dsttree['Switch']:
-                dstswp = get_switched_path(router, dsttree['Switch'], popt)
-            else:
-                dsttree = None
-                print("Warning: Could not find destination switch data in NetDB", \
-                    dst, file=sys.stderr)
+        # Independent lookups run concurrently, dependent stages are
+        # submitted as soon as the results they need are in
+        stages = PathStages("Full Path")
+        try:
+            # Translate IPs to CIDRs
+            stages.submit('src net', nglib.query.net.get_net, net1,
+                          rtype="NGTREE", verbose=popt['verbose'])
+            stages.submit('dst net', nglib.query.net.get_net, net2,
+                          rtype="NGTREE", verbose=popt['verbose'])
+
+            if nglib.use_netdb:
+                stages.submit('src netdb', nglib.netdb.ip.get_netdb_ip, src)
+                stages.submit('dst netdb', nglib.netdb.ip.get_netdb_ip, dst)
+
+            n1tree = stages.result('src net')
+            if n1tree:
+                net1 = n1tree['data'][0]['Name']
+
+            n2tree = stages.result('dst net')
+            if n2tree:
+                net2 = n2tree['data'][0]['Name']
+
+            if not n1tree or not n2tree:
+                errort = nglib.ngtree.get_ngtree("Path Error", tree_type="L3-PATH")
+                errort['Error'] = 'Network Lookup Error'
+                errort["Lx Path"] = src + " -> " + dst
+                return errort
+
+            if 'vrfcidr' not in n1tree['data'][0]:
+                print("Warning: Could not locate", src, file=sys.stderr)
+                return
+            if 'vrfcidr' not in n2tree['data'][0]:
+                print("Warning: Could not locate", dst, file=sys.stderr)
+                return
 
-            # If only switching, update srcswp to show switched path
-            if not routing and srctree and dsttree:
-                srcswp = get_switched_path(srctree['Switch'], dsttree['Switch'], popt)
+            # Routing Check
+            routing = True
+            if n1tree['data'][0]['vrfcidr'] == n2tree['data'][0]['vrfcidr']:
+                routing = False
+
+            ## Check for routed paths (inter/intra VRF)
+            stages.submit('routed path', get_full_routed_path, src, dst, popt.copy())
+
+            if nglib.use_netdb:
+                srctree = stages.result('src netdb')
+                dsttree = stages.result('dst netdb')
+
+            # Source switch data required for a switched path
+            if srctree:
+                if 'Switch' not in srctree or not srctree['Switch']:
+                    srctree = None
+                    print("Warning: Could not find source switch data in NetDB:", src,
+                          file=sys.stderr)
+
+            # Find Switched Path from Router to Destination
+            if dsttree:
+                router = n2tree['data'][0]['Router']
+                if 'StandbyRouter' in n2tree['data'][0]:
+                    router = router + '|' + n2tree['data'][0]['StandbyRouter']
+                if 'Switch' in dsttree and dsttree['Switch']:
+                    stages.submit('dst switched path', get_switched_path,
+                                  router, dsttree['Switch'], popt.copy())
+                else:
+                    dsttree = None
+                    print("Warning: Could not find destination switch data in NetDB", \
+                        dst, file=sys.stderr)
+
+            # Find Switched Path from Source to Router
+            # If only switching, show the switched path between src and dst
+            if srctree:
+                if not routing and dsttree:
+                    stages.submit('src switched path', get_switched_path,
+                                  srctree['Switch'], dsttree['Switch'], popt.copy())
+                else:
+                    router = n1tree['data'][0]['Router']
+                    if 'StandbyRouter' in n1tree['data'][0]:
+                        router = router + '|' + n1tree['data'][0]['StandbyRouter']
+                    stages.submit('src switched path', get_switched_path,
+                                  srctree['Switch'], router, popt.copy())
+
+            if srctree:
+                srcswp = stages.result('src switched path')
+            if dsttree:
+                dstswp = stages.result('dst switched path')
+            rtree = stages.result('routed path')
+        finally:
+            stages.close()
 
         # Same switch/vlan check
         switching = True
@@ -182,8 +255,7 @@ def get_full_path(src, dst, popt, rtype="NGTREE"):
                     + '|' + n1tree['data'][0]['StandbyRouter']
             nglib.ngtree.add_child_ngtree(ngtree, n1tree['data'][0])
 
-        ## Check for routed paths (inter/intra VRF)
-        rtree = get_full_routed_path(src, dst, popt)
+        ## Add routed paths (inter/intra VRF)
         if rtree and 'PATH' in rtree['_type']:
 
             # Breakdown L4 Path
@@ -227,6 +299,58 @@ def get_full_path(src, dst, popt, rtype="NGTREE"):
         else:
             raise ResultError("No Path Results", "Could not find a path from %s -> %s" % (src, dst))
 
+
+class PathStages:
+    """
+    Runs the stages of a path query concurrently
+
+    submit() starts a stage on the thread pool, result() waits for it.
+    Submit dependent stages once the results they need are in. close()
+    shuts down the pool and prints per stage timing in verbose mode.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.start = timer()
+        self.futures = dict()
+        self.times = dict()
+        self.executor = ThreadPoolExecutor(max_workers=nglib.workers)
+
+    def run(self, stage, func, args, kwargs):
+        """Run and time a stage, returns the pooled session after"""
+
+        start = timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.times[stage] = timer() - start
+            nglib.dbpool.release()
+
+    def submit(self, stage, func, *args, **kwargs):
+        """Start func(*args, **kwargs) as stage"""
+
+        self.futures[stage] = self.executor.submit(self.run, stage, func, args, kwargs)
+
+    def result(self, stage):
+        """Wait for and return the result of stage"""
+
+        return self.futures[stage].result()
+
+    def close(self):
+        """Wait for all stages and report timing"""
+
+        self.executor.shutdown(wait=True)
+
+        if nglib.verbose:
+            print("\n{:} timing: {:.3f}s".format(self.name, timer() - self.start),
+                  file=sys.stderr)
+            for stage in self.futures:
+                if stage in self.times:
+                    print("  {:<20} {:.3f}s".format(stage, self.times[stage]),
+                          file=sys.stderr)
+
+
+@pathcache.cached_path
 def get_full_routed_path(src, dst, popt, rtype="NGTREE"):
     """ Gets the full L3 Path between src -> dst IPs including inter-vrf routing
     """
@@ -293,6 +417,7 @@ def get_full_routed_path(src, dst, popt, rtype="NGTREE"):
         return ngtree
 
 
+@pathcache.cached_path
 def get_routed_path(net1, net2, popt, rtype="NGTREE"):
     """
     Find the routed path between two CIDRs and return all interfaces and
@@ -343,36 +468,34 @@ def get_routed_path(net1, net2, popt, rtype="NGTREE"):
         ngtree['Name'] = ngtree['Path']
 
         # Fixup Depth (double routed paths)
-        popt['depth'] = str(int(popt['depth']) * 2)
+        depth = templates.get_depth(popt['depth'], maxdepth=templates.depth_buckets[-1] // 2)
+        popt['depth'] = str(depth * 2)
 
         pathList = []
         pathRec = []
 
+        # In-memory engine (see nglib.query.routegraph)
+        if nglib.path_engine == 'memory':
+            rtrp = nglib.query.routegraph.get_routed_links(
+                net1, net2, popt['VRF'], popt['depth'])
+
         # Finds all paths, then finds the relationships
-        rtrp = nglib.py2neo_ses.cypher.execute(
-            'MATCH (sn:Network)-[:ROUTED_BY|ROUTED_STANDBY]-(sr), '
-            + '(dn:Network)-[:ROUTED_BY|ROUTED_STANDBY]-(dr), rp = allShortestPaths '
-            + '((sr)-[:ROUTED*0..' + popt['depth'] + ']-(dr)) '
-            + 'WHERE ALL(v IN rels(rp) WHERE v.vrf = {vrf}) '
-            + 'AND sn.cidr =~ {net1} AND dn.cidr =~ {net2}'
-            + 'UNWIND nodes(rp) as r1 UNWIND nodes(rp) as r2 '
-            + 'MATCH (r1)<-[l1:ROUTED]-(n:Network {vrf:{vrf}})-[l2:ROUTED]->(r2) '
-            + 'OPTIONAL MATCH (n)-[:L3toL2]->(v:VLAN) '
-            + 'RETURN DISTINCT r1.name AS r1name, l1.gateway AS r1ip, '
-            + 'r2.name AS r2name, l2.gateway as r2ip, v.vid AS vid, '
-            + 'LENGTH(shortestPath((sn)<-[:ROUTED|ROUTED_BY|ROUTED_STANDBY*0..12]->(r1))) '
-            + 'AS distance ORDER BY distance',
-            {"net1": net1, "net2": net2, "vrf": popt['VRF']})
+        else:
+            (query, depth) = templates.get_query('routed_path', popt['depth'])
+            rtrp = nglib.dbpool.execute(
+                query, {"net1": net1, "net2": net2, "vrf": popt['VRF'], "depth": depth})
 
         # Empty Query
         if len(rtrp) == 0:
             return ngtree
 
         allpaths = dict()
+        pairRecs = dict()
         # Load all paths into tuples with distance value
         for rec in rtrp:
             p = (rec["r1name"], rec["r2name"])
             allpaths[p] = rec["distance"]
+            pairRecs.setdefault(p, []).append(rec)
 
 
         # Find tuple with shortest distance (r1, core1) vs (core1, r1)
@@ -386,50 +509,54 @@ def get_routed_path(net1, net2, popt, rtype="NGTREE"):
         # Sort path records by distance, src router, dst router
         pathRec = sorted(pathRec, key=lambda tup: (tup[2], tup[0], tup[1]))
 
+        # Switched paths between each distinct router pair (concurrent)
+        spaths = dict()
+        if popt['l2path']:
+            spaths = get_switched_paths([(path[0], path[1]) for path in pathRec], popt)
+
         # Build Trees and pathList from pathRecs
         for path in pathRec:
-            for rec in rtrp:
-                if path[0] == rec['r1name'] and path[1] == rec['r2name']:
-                    #print(path[0], rec['r1ip'], '-->', path[1], rec['r2ip'])
-                    rtree = nglib.ngtree.get_ngtree("Hop", tree_type="L3-HOP")
-                    rtree['From Router'] = rec['r1name']
-                    rtree['From IP'] = rec['r1ip']
-                    rtree['To Router'] = rec['r2name']
-                    rtree['To IP'] = rec['r2ip']
-                    rtree['VLAN'] = rec['vid']
-
-                    # Calculate hop distance
-                    # Distance of 1 is correct, other distances should be:
-                    #   ((dist - 1) / 2) + 1
-                    distance = rec['distance']
-                    if distance != 1:
-                        distance = int((distance - 1) / 2) + 1
-
-                    # Save distance
-                    rtree['distance'] = distance
-
-                    # Rename rtree
-                    rtree['Name'] = "#{:} {:}({:}) -> {:}({:})".format( \
-                    distance, rec['r1name'], rec['r1ip'], rec['r2name'], rec['r2ip'])
-
-                    if 'VLAN' in rtree and rtree['VLAN'] != '0':
-                        rtree['Name'] = rtree['Name'] + ' [vid:' + str(rtree['VLAN']) + ']'
-
-                    # Add Switchpath if requested
-                    if popt['l2path']:
-                        spath = get_switched_path(rec['r1name'], rec['r2name'], popt)
-                        if spath:
-                            for sp in spath['data']:
-                                if '_rvlans' in sp:
-                                    vrgx = r'[^0-9]*' + rec['vid'] + '[^0-9]*'
-                                    if re.search(vrgx, sp['_rvlans']):
-                                        nglib.ngtree.add_child_ngtree(rtree, sp)
-
-                    # Single / Multi-path
-                    if not popt['onepath'] or distance not in hopSet:
-                        hopSet.add(distance)
-                        nglib.ngtree.add_child_ngtree(ngtree, rtree)
-                    pathList.append(rtree)
+            for rec in pairRecs[(path[0], path[1])]:
+                #print(path[0], rec['r1ip'], '-->', path[1], rec['r2ip'])
+                rtree = nglib.ngtree.get_ngtree("Hop", tree_type="L3-HOP")
+                rtree['From Router'] = rec['r1name']
+                rtree['From IP'] = rec['r1ip']
+                rtree['To Router'] = rec['r2name']
+                rtree['To IP'] = rec['r2ip']
+                rtree['VLAN'] = rec['vid']
+
+                # Calculate hop distance
+                # Distance of 1 is correct, other distances should be:
+                #   ((dist - 1) / 2) + 1
+                distance = rec['distance']
+                if distance != 1:
+                    distance = int((distance - 1) / 2) + 1
+
+                # Save distance
+                rtree['distance'] = distance
+
+                # Rename rtree
+                rtree['Name'] = "#{:} {:}({:}) -> {:}({:})".format( \
+                distance, rec['r1name'], rec['r1ip'], rec['r2name'], rec['r2ip'])
+
+                if 'VLAN' in rtree and rtree['VLAN'] != '0':
+                    rtree['Name'] = rtree['Name'] + ' [vid:' + str(rtree['VLAN']) + ']'
+
+                # Add Switchpath if requested
+                if popt['l2path']:
+                    spath = copy.deepcopy(spaths.get((rec['r1name'], rec['r2name'])))
+                    if spath:
+                        for sp in spath['data']:
+                            if '_rvlans' in sp:
+                                vrgx = r'[^0-9]*' + rec['vid'] + '[^0-9]*'
+                                if re.search(vrgx, sp['_rvlans']):
+                                    nglib.ngtree.add_child_ngtree(rtree, sp)
+
+                # Single / Multi-path
+                if not popt['onepath'] or distance not in hopSet:
+                    hopSet.add(distance)
+                    nglib.ngtree.add_child_ngtree(ngtree, rtree)
+                pathList.append(rtree)
 
         # Check Results
         if pathList:
@@ -458,6 +585,7 @@ def get_routed_path(net1, net2, popt, rtype="NGTREE"):
                 file=sys.stderr)
 
 
+@pathcache.cached_path
 def get_switched_path(switch1, switch2, popt, rtype="NGTREE"):
     """
     Find the path between two switches and return all interfaces and
@@ -493,19 +621,9 @@ def get_switched_path(switch1, switch2, popt, rtype="NGTREE"):
         ngtree["Name"] = str(switch1) + " -> " + str(switch2)
         ngtree['Search Depth'] = popt['depth']
 
-        swp = nglib.py2neo_ses.cypher.execute(
-            'MATCH (ss:Switch), (ds:Switch), '
-            + 'sp = allShortestPaths((ss)-[:NEI|NEI_EQ*0..' + popt['depth'] + ']-(ds)) '
-            + 'WHERE ss.name =~ {switch1} AND ds.name =~ {switch2}'
-            + 'UNWIND nodes(sp) as s1 UNWIND nodes(sp) as s2 '
-            + 'MATCH (s1)<-[nei:NEI|NEI_EQ]-(s2), plen = shortestPath((ss)-[:NEI*0..20]-(s1)) '
-            + 'RETURN DISTINCT s1.name AS csw, s2.name AS psw, '
-            + 's1.model AS cmodel, s1.version AS cver, s2.model AS pmodel, s2.version AS pver, '
-            + 'nei.pPort AS pport, nei.cPort as cport, nei.native AS native, '
-            + 'nei.cPc as cPc, nei.pPc AS pPc, nei.vlans AS vlans, nei.rvlans as rvlans, '
-            + 'nei._rvlans AS p_rvlans, '
-            + 'LENGTH(plen) as distance ORDER BY distance, s1.name, s2.name',
-            {"switch1": switch1, "switch2": switch2, "depth": str(popt['depth'])})
+        (query, depth) = templates.get_query('switched_path', popt['depth'])
+        swp = nglib.dbpool.execute(
+            query, {"switch1": switch1, "switch2": switch2, "depth": depth})
 
         # Empty Query Check
         if len(swp) == 0:
@@ -593,6 +711,33 @@ def get_switched_path(switch1, switch2, popt, rtype="NGTREE"):
     return
 
 
+def get_switched_paths(pairs, popt):
+    """
+    Switched paths for a list of (switch1, switch2) pairs
+
+    Each distinct pair is queried once, concurrently on up to nglib.workers
+    threads. Returns {(switch1, switch2): ngtree}, copy trees that get reused.
+    """
+
+    pairs = list(OrderedDict.fromkeys(pairs))
+    spaths = dict()
+
+    if not pairs:
+        return spaths
+
+    def fetch(pair):
+        try:
+            return get_switched_path(pair[0], pair[1], popt.copy())
+        finally:
+            nglib.dbpool.release()
+
+    with ThreadPoolExecutor(max_workers=min(nglib.workers, len(pairs))) as executor:
+        for pair, spath in zip(pairs, executor.map(fetch, pairs)):
+            spaths[pair] = spath
+
+    return spaths
+
+
 def spath_direction(swp):
     """ Adds directionality to spath queries
         All spath queries traverse the directed paths from the core out
@@ -639,6 +784,7 @@ def path_coverage(inc, total):
     return percent[0] + '%'
 
 
+@pathcache.cached_path
 def get_fw_path(src, dst, popt, rtype="TEXT"):
     """Discover the Firewall Path between two IP addresses"""
 
@@ -652,13 +798,12 @@ def get_fw_path(src, dst, popt, rtype="TEXT"):
             popt['verbose'] = True
         if 'depth' not in popt:
             popt['depth'] = '20'
+        if 'logs' not in popt:
+            popt['logs'] = True
 
         if popt['verbose']:
             logger.info("Query: Security Path %s -> %s for %s", src, dst, nglib.user)
 
-        logcmd = nglib.config['nglib']['logcmd']
-        logurl = nglib.config['nglib']['logurl']
-
         srcnet = nglib.query.net.find_cidr(src)
         dstnet = nglib.query.net.find_cidr(dst)
 
@@ -666,32 +811,40 @@ def get_fw_path(src, dst, popt, rtype="TEXT"):
         if nglib.verbose:
             print("\nFinding security path from {:} -> {:}:\n".format(srcnet, dstnet))
 
-        # Shortest path between VRFs
-        path = nglib.py2neo_ses.cypher.execute(
+        # Shortest path between VRFs (precomputed, see nglib.query.fwmatrix)
+        depth = templates.get_depth(popt['depth'])
+        fwmatrix = nglib.query.fwmatrix.get_matrix()
+
+        path = []
+        nets = nglib.dbpool.execute(
             'MATCH (s:Network { cidr:{src} })-[e1:VRF_IN]->(sv:VRF), '
-            + '(d:Network {cidr:{dst}})-[e2:VRF_IN]->(dv:VRF), '
-            + 'p = shortestPath((sv)-[:VRF_IN|ROUTED_FW|:SWITCHED_FW*0..'
-            + popt['depth'] + ']-(dv)) RETURN s,d,p',
+            + '(d:Network {cidr:{dst}})-[e2:VRF_IN]->(dv:VRF) '
+            + 'RETURN s, d, sv.name AS svrf, dv.name AS dvrf',
             src=srcnet, dst=dstnet)
 
+        for r in nets:
+            vpath = fwmatrix.get_path(r.svrf, r.dvrf, depth)
+            if vpath is not None:
+                path.append(nglib.dbpool.Record(s=r.s, d=r.d, p=vpath))
+
         fwsearch = dict()
 
         ngtree = nglib.ngtree.get_ngtree("Security Path", tree_type="L4-PATH")
 
         # Go through all nodes in the path
         if len(path) > 0:
-            for r in path.records:
+            for r in path:
                 sn = r.s
-                snp = nglib.query.nNode.getJSONProperties(sn)
+                snp = nglib.query.nNode.get_properties(sn)
                 dn = r.d
-                dnp = nglib.query.nNode.getJSONProperties(dn)
+                dnp = nglib.query.nNode.get_properties(dn)
 
                 path = ""
 
                 # Path
                 nodes = r.p.nodes
                 for node in nodes:
-                    nProp = nglib.query.nNode.getJSONProperties(node)
+                    nProp = nglib.query.nNode.get_properties(node)
                     label = nglib.query.nNode.getLabel(node)
                     tlabel = re.search(r'(\w+)', label)
                     hop = nglib.ngtree.get_ngtree(tlabel.group(1), tree_type="L4-HOP")
@@ -730,41 +883,80 @@ def get_fw_path(src, dst, popt, rtype="TEXT"):
                 if rtype == "TEXT":
                     print("\nSecurity Path: " + path)
 
-                    for fw in fwsearch.keys():
-                        (hostname, logIndex) = fwsearch[fw].split(',')
+                    get_fw_logs(fwsearch, src, dst, popt)
+
+                    # Space out
+                    print()
+
+            # Export NGTree
+            ngtree = nglib.query.exp_ngtree(ngtree, rtype)
+            return ngtree
 
-                        # Splunk Specific Log Search, may need site specific adjustment
-                        cmd = "{:} 'index={:} host::{:} {:} {:}'".format(
-                            logcmd, logIndex, hostname, src, dst)
-                        query = 'index={:} host::{:} {:} {:}'.format(
-                            logIndex, hostname, src, dst)
 
-                        query = query.replace(" ", "%20")
+def get_fw_logs(fwsearch, src, dst, popt):
+    """
+    Search each firewall's logs for src -> dst concurrently, printing the
+    results for a firewall as soon as its search completes. Searches are
+    bounded by nglib.logtimeout and skipped if popt['logs'] is False.
+    """
 
-                        print("\n{:} (15min): {:}{:}".format(fw, logurl, query))
+    logcmd = nglib.config['nglib']['logcmd']
+    logurl = nglib.config['nglib']['logurl']
 
-                        if popt['verbose']:
-                            print(cmd)
+    searches = OrderedDict()
+    for fw in fwsearch.keys():
+        (hostname, logIndex) = fwsearch[fw].split(',')
 
-                        proc = subprocess.Popen(
-                            [cmd + " 2> /dev/null"],
-                            stdout=subprocess.PIPE,
-                            shell=True,
-                            universal_newlines=True)
+        # Splunk Specific Log Search, may need site specific adjustment
+        query = 'index={:} host::{:} {:} {:}'.format(logIndex, hostname, src, dst)
+        cmd = "{:} '{:}'".format(logcmd, query)
+        searches[fw] = (cmd, query.replace(" ", "%20"))
 
-                        (out, err) = proc.communicate()
+    if not popt['logs']:
+        for fw in searches:
+            print("\n{:} (15min): {:}{:}".format(fw, logurl, searches[fw][1]))
+        return
 
-                        if err:
-                            print(err)
-                        elif out:
-                            print(out)
+    with ThreadPoolExecutor(max_workers=nglib.workers) as executor:
+        futures = dict()
+        for fw in searches:
+            futures[executor.submit(run_log_cmd, searches[fw][0], nglib.logtimeout)] = fw
 
-                    # Space out
-                    print()
+        for future in as_completed(futures):
+            fw = futures[future]
+            (cmd, query) = searches[fw]
+
+            print("\n{:} (15min): {:}{:}".format(fw, logurl, query))
+
+            if popt['verbose']:
+                print(cmd)
+
+            out = future.result()
+            if out:
+                print(out)
+            sys.stdout.flush()
+
+
+def run_log_cmd(cmd, timeout):
+    """Run a log search command, returns its output or a timeout notice"""
+
+    proc = subprocess.Popen(
+        [cmd + " 2> /dev/null"],
+        stdout=subprocess.PIPE,
+        shell=True,
+        universal_newlines=True,
+        start_new_session=True)
+
+    try:
+        out = proc.communicate(timeout=timeout or None)[0]
+    except subprocess.TimeoutExpired:
+        # Kill the shell and the search it started
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.communicate()
+        return "Log search timed out after {:}s".format(timeout)
+
+    return out
 
-            # Export NGTree
-            ngtree = nglib.query.exp_ngtree(ngtree, rtype)
-            return ngtree
 
 def get_router(ngtree):
     """ Return router and standby router properties if they exist"""
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph Path Result Cache
+- Bounded LRU cache of NGTREE path results with a max age
+- Cleared whenever the topology generation changes (bumped by ngupdate)
+- Results are deep copied in and out, callers are free to modify them
+- Size and age are path_cache and path_cache_ttl under [nglib]
+"""
+import copy
+import functools
+import threading
+import logging
+from collections import OrderedDict
+from timeit import default_timer as timer
+import nglib
+
+logger = logging.getLogger(__name__)
+
+
+class PathCache:
+    """LRU cache invalidated by a generation stamp"""
+
+    def __init__(self, gen_name='topology'):
+        self.gen_name = gen_name
+        self.gen = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def check_gen(self):
+        """Clear the cache if the generation changed"""
+
+        gen = nglib.get_generation(self.gen_name)
+        if gen != self.gen:
+            with self._lock:
+                if self.entries:
+                    logger.debug("PathCache: %s generation changed, clearing %s entries",
+                                 self.gen_name, len(self.entries))
+                self.entries.clear()
+                self.gen = gen
+
+    def get(self, key):
+        """Returns a copy of the cached value or None"""
+
+        self.check_gen()
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and timer() - entry[0] < nglib.path_cache_ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            elif entry:
+                del self.entries[key]
+            self.misses += 1
+
+        return None
+
+    def put(self, key, value):
+        """Cache a copy of value"""
+
+        self.check_gen()
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self.entries[key] = (timer(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > nglib.path_cache:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+
+        with self._lock:
+            self.entries.clear()
+
+
+# Process wide path cache
+cache = PathCache()
+
+
+def cached_path(func):
+    """
+    Cache decorator for path queries, func(src, dst, popt, rtype)
+
+    Only NGTREE results are cached (API and nested path queries), keyed on
+    the query, src, dst and path options. Path queries fill in defaults on
+    popt, the updated popt is saved and restored on a cache hit.
+    """
+
+    rdefault = func.__defaults__[-1]
+
+    @functools.wraps(func)
+    def wrapper(src, dst, popt, rtype=rdefault):
+
+        if rtype != "NGTREE" or nglib.path_cache <= 0:
+            return func(src, dst, popt, rtype=rtype)
+
+        key = (func.__name__, src, dst,
+               tuple(sorted((k, str(v)) for k, v in popt.items())))
+
+        result = cache.get(key)
+        if result:
+            (ngtree, npopt) = result
+            popt.update(npopt)
+            logger.debug("PathCache: Hit on %s %s -> %s", func.__name__, src, dst)
+            return ngtree
+
+        ngtree = func(src, dst, popt, rtype=rtype)
+        if ngtree:
+            cache.put(key, (ngtree, popt))
+
+        return ngtree
+
+    return wrapper
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph In-Memory Routed Path Engine
+- Optional replacement for the allShortestPaths Cypher in get_routed_path,
+  enable with path_engine = memory under [nglib] in netgrph.ini
+- Loads the L3 topology (Network-ROUTED/ROUTED_BY/ROUTED_STANDBY-Router)
+  once per networks import generation and answers queries with BFS
+- Returns the same link rows as the Cypher query (r1name, r1ip, r2name,
+  r2ip, vid, distance) so get_routed_path builds an identical ngtree
+"""
+import re
+import threading
+import logging
+from collections import defaultdict, deque
+from timeit import default_timer as timer
+import nglib
+import nglib.dbpool
+
+logger = logging.getLogger(__name__)
+
+# Process wide graph (see get_graph)
+graph = None
+_lock = threading.Lock()
+
+
+def bfs(adj, start, limit=None, targets=None):
+    """
+    Breadth first search distances from start over adj
+
+    Stops at limit hops or once every node in targets is reached
+    """
+
+    dist = {start: 0}
+    queue = deque([start])
+    remaining = set(targets) - {start} if targets else None
+
+    while queue:
+        node = queue.popleft()
+        ndist = dist[node] + 1
+        if limit is not None and ndist > limit:
+            break
+        for nei in adj.get(node, ()):
+            if nei not in dist:
+                dist[nei] = ndist
+                queue.append(nei)
+                if remaining is not None:
+                    remaining.discard(nei)
+        if remaining is not None and not remaining:
+            break
+
+    return dist
+
+
+def on_path(node, sdist, ddist, plen):
+    """True if node is on a plen hop shortest path, given distances from both ends"""
+
+    return node in sdist and node in ddist and sdist[node] + ddist[node] == plen
+
+
+class RouteGraph:
+    """
+    L3 topology adjacency
+
+    Nodes are ('R', router name) and ('N', vrfcidr) tuples
+    - adj: all ROUTED, ROUTED_BY and ROUTED_STANDBY edges (hop distance)
+    - vrfadj: per VRF ROUTED edges (the routed path graph)
+    - links: (network vrf, r1, r2) -> [(r1ip, r2ip, vid)] for P2P networks
+    - routers: network -> routers it is routed by (primary or standby)
+    - cidrs: cidr -> networks
+    """
+
+    def __init__(self, gen=None):
+        self.gen = gen
+        self.adj = defaultdict(set)
+        self.vrfadj = defaultdict(lambda: defaultdict(set))
+        self.links = defaultdict(list)
+        self.routers = defaultdict(set)
+        self.cidrs = defaultdict(set)
+
+    def load(self):
+        """Load the topology from the database"""
+
+        start = timer()
+
+        results = nglib.dbpool.execute(
+            'MATCH (n:Network)-[:ROUTED_BY|ROUTED_STANDBY]-(r) '
+            + 'RETURN n.vrfcidr AS net, n.cidr AS cidr, r.name AS router')
+
+        for rec in results:
+            net = ('N', rec.net)
+            router = ('R', rec.router)
+            self.cidrs[rec.cidr].add(net)
+            self.routers[net].add(router)
+            self.adj[net].add(router)
+            self.adj[router].add(net)
+
+        results = nglib.dbpool.execute(
+            'MATCH (n:Network)-[l:ROUTED]->(r) OPTIONAL MATCH (n)-[:L3toL2]->(v:VLAN) '
+            + 'RETURN n.vrfcidr AS net, n.cidr AS cidr, n.vrf AS nvrf, l.vrf AS vrf, '
+            + 'r.name AS router, l.gateway AS gateway, id(l) AS lid, '
+            + 'collect(v.vid) AS vids')
+
+        p2p = defaultdict(list)
+        for rec in results:
+            net = ('N', rec.net)
+            router = ('R', rec.router)
+            self.cidrs[rec.cidr].add(net)
+            self.adj[net].add(router)
+            self.adj[router].add(net)
+            self.vrfadj[rec.vrf][net].add(router)
+            self.vrfadj[rec.vrf][router].add(net)
+            p2p[net].append(rec)
+
+        # Every ordered pair of distinct ROUTED edges on a network is a link
+        for net in p2p:
+            for l1 in p2p[net]:
+                for l2 in p2p[net]:
+                    if l1.lid != l2.lid:
+                        for vid in l1.vids or [None]:
+                            self.links[(l1.nvrf, ('R', l1.router), ('R', l2.router))].append(
+                                (l1.gateway, l2.gateway, vid))
+
+        logger.debug("RouteGraph: Loaded %s nodes and %s links in %.3fs",
+                     len(self.adj), len(self.links), timer() - start)
+
+        return self
+
+    def find_nets(self, cidr):
+        """Networks matching cidr (Cypher =~ semantics as a fallback)"""
+
+        if cidr in self.cidrs:
+            return set(self.cidrs[cidr])
+
+        nets = set()
+        try:
+            rgx = re.compile(cidr)
+        except re.error:
+            return nets
+
+        for ncidr in self.cidrs:
+            if ncidr and rgx.fullmatch(ncidr):
+                nets.update(self.cidrs[ncidr])
+
+        return nets
+
+    def get_routed_links(self, net1, net2, vrf, depth):
+        """
+        All links between consecutive routers on every shortest path
+
+        Shortest paths run from each router of net1 to each router of net2
+        over vrf ROUTED edges (up to depth hops), distance is the hop count
+        from net1 to the first router over all routed edges
+        """
+
+        snets = self.find_nets(net1)
+        dnets = self.find_nets(net2)
+
+        srouters = set(r for n in snets for r in self.routers[n])
+        drouters = set(r for n in dnets for r in self.routers[n])
+
+        vadj = self.vrfadj.get(vrf, dict())
+
+        # Distances back from each destination router
+        ddist = dict()
+        for dr in drouters:
+            ddist[dr] = bfs(vadj, dr, limit=depth)
+
+        # Router pairs linked by a network on a shortest path
+        pairs = set()
+        for sr in srouters:
+            sdist = bfs(vadj, sr, limit=depth)
+
+            for dr in drouters:
+                if dr not in sdist:
+                    continue
+
+                plen = sdist[dr]
+                dd = ddist[dr]
+
+                for r1 in sdist:
+                    if r1[0] != 'R' or not on_path(r1, sdist, dd, plen):
+                        continue
+                    for net in vadj.get(r1, ()):
+                        if sdist.get(net) != sdist[r1] + 1 or not on_path(net, sdist, dd, plen):
+                            continue
+                        for r2 in vadj[net]:
+                            if sdist.get(r2) == sdist[net] + 1 and on_path(r2, sdist, dd, plen):
+                                pairs.add((r1, r2))
+                                pairs.add((r2, r1))
+
+        # Hop distance from each source network to every first router
+        targets = set(pair[0] for pair in pairs)
+        sndist = [bfs(self.adj, sn, targets=targets) for sn in snets]
+
+        # Source networks that cannot reach r1 have no row (as in the Cypher MATCH)
+        rows = set()
+        for (r1, r2) in pairs:
+            for (r1ip, r2ip, vid) in self.links.get((vrf, r1, r2), ()):
+                for dist in sndist:
+                    if r1 in dist:
+                        rows.add((r1[1], r1ip, r2[1], r2ip, vid, dist[r1]))
+
+        rows = sorted(rows, key=lambda row: (
+            row[5], row[0], row[2], str(row[1]), str(row[3]), str(row[4])))
+
+        return [nglib.dbpool.Record(r1name=row[0], r1ip=row[1], r2name=row[2],
+                                    r2ip=row[3], vid=row[4], distance=row[5])
+                for row in rows]
+
+
+def get_graph():
+    """Returns the shared RouteGraph, reloading it after network imports"""
+
+    global graph
+
+    gen = nglib.get_generation('networks')
+    rgraph = graph
+
+    if rgraph is None or rgraph.gen != gen:
+        with _lock:
+            if graph is None or graph.gen != gen:
+                graph = RouteGraph(gen).load()
+            rgraph = graph
+
+    return rgraph
+
+
+def get_routed_links(net1, net2, vrf, depth):
+    """Routed path link rows between two CIDRs (see RouteGraph.get_routed_links)"""
+
+    return get_graph().get_routed_links(net1, net2, vrf, int(depth))
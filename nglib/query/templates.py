@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph Query Templates
+- Registry of variable length path queries with a fixed set of depth buckets
+- Neo4j caches plans by query text, so every depth in a bucket shares a plan
+- Queries post filter on the requested {depth} parameter, results match
+  a query built with the exact depth
+- warm_queries() plans every template and bucket ahead of time (apisrv)
+"""
+import logging
+import nglib
+from nglib.exceptions import ResultError
+
+logger = logging.getLogger(__name__)
+
+# Depth buckets for variable length patterns, larger depths are rejected
+depth_buckets = (10, 20, 40, 80, 160)
+
+# Registered templates, name -> (query, sample params)
+templates = dict()
+
+# Token in templates replaced by the depth bucket
+BUCKET = '$BUCKET'
+
+
+def register(name, query, params=None):
+    """Register a query template, use $BUCKET for the variable length bound"""
+
+    templates[name] = (query, params or dict())
+
+
+def get_depth(depth, maxdepth=depth_buckets[-1]):
+    """Validate a path depth (int or str) up to maxdepth, returns an int"""
+
+    try:
+        depth = int(str(depth).strip())
+    except ValueError:
+        raise ResultError("Invalid Depth", "Path depth must be an integer: %s" % depth)
+
+    if depth < 0:
+        raise ResultError("Invalid Depth", "Path depth must be positive: %s" % depth)
+
+    if depth > maxdepth:
+        raise ResultError("Invalid Depth", "Path depth must be %s or less: %s" % (maxdepth, depth))
+
+    return depth
+
+
+def get_bucket(depth):
+    """Smallest depth bucket that covers depth"""
+
+    for bucket in depth_buckets:
+        if depth <= bucket:
+            return bucket
+
+    return depth_buckets[-1]
+
+
+def get_query(name, depth):
+    """Returns (query, depth) for a template at a validated depth"""
+
+    depth = get_depth(depth)
+    query = templates[name][0].replace(BUCKET, str(get_bucket(depth)))
+
+    return (query, depth)
+
+
+def warm_queries():
+    """EXPLAIN every template at every depth bucket to fill the plan cache"""
+
+    count = 0
+
+    for name in sorted(templates):
+        (query, params) = templates[name]
+        for bucket in depth_buckets:
+            try:
+                nglib.dbpool.execute('EXPLAIN ' + query.replace(BUCKET, str(bucket)),
+                                     dict(params, depth=bucket))
+                count += 1
+            except Exception as e:
+                logger.warning("Failed to warm query %s at depth %s: %s", name, bucket, e)
+
+    logger.debug("Warmed %s query plans", count)
+
+    return count
@@ -36,11 +36,25 @@ import os
 import re
 import logging
 import nglib
-from nglib.query.nNode import getJSONProperties
 from nglib.exceptions import OutputError, ResultError
 
 logger = logging.getLogger(__name__)
 
+# VLAN bridge tree properties for each v (see get_bridge_vlans)
+bridge_vlan_props = (
+    'OPTIONAL MATCH (v)-[sw:Switched]->(s:Switch) '
+    + 'WITH v, collect(s.name) AS switches, '
+    + 'SUM(sw.pcount) AS pcount, SUM(sw.mcount) AS mcount '
+    + 'OPTIONAL MATCH (v)-[:ROOT]->(rs:Switch) '
+    + 'WITH v, switches, pcount, mcount, head(collect(rs.name)) AS root '
+    + 'OPTIONAL MATCH (v)<-[:L3toL2]-(n:Network)-[:ROUTED_BY|ROUTED]->(r:Router) '
+    + 'WITH v, switches, pcount, mcount, root, '
+    + 'head(collect({cidr:n.cidr, gateway:n.gateway, vrf:n.vrf, router:r.name})) AS l3 '
+    + 'OPTIONAL MATCH (v)-[b:BRIDGE]->(bv:VLAN) '
+    + 'RETURN v.name AS vname, v.lstp AS lstp, v.lroot AS lroot, v.vid AS vid, '
+    + 'v.desc AS desc, switches, pcount, mcount, root, l3, '
+    + 'collect({vname:bv.name, pswitch:b.pswitch, cswitch:b.cswitch}) AS children ')
+
 
 def get_vlan_range(vlanRange):
     """Return the Low and High Values for a range"""
@@ -68,8 +82,12 @@ def get_vlan(vlan, rtype="NGTREE", allSwitches=True):
     else:
         return search_vlan_id(vlan, rtype=rtype, allSwitches=allSwitches)
 
-def search_vlan_id(vid, rtype="NGTREE", allSwitches=True):
-    """Search a VLAN ID for all Bridge Groups"""
+def search_vlan_id(vid, rtype="NGTREE", allSwitches=True, snapshot=None):
+    """
+    Search a VLAN ID for all Bridge Groups
+
+    Notes: Pass a VLANSnapshot to build the trees without querying (reports)
+    """
 
     rtypes = ('TREE', 'JSON', 'YAML', 'NGTREE', 'QTREE')
 
@@ -82,7 +100,7 @@ def search_vlan_id(vid, rtype="NGTREE", allSwitches=True):
         if rtype != "NGTREE":
             logger.info("Query: VLAN ID %s for %s", vid, nglib.user)
 
-        vnames = get_vlan_bridges(vid)
+        vnames = get_vlan_bridges(vid, snapshot=snapshot)
 
         # Attach trees to parent tree if count more than 1
         pngtree = nglib.ngtree.get_ngtree(str(vid), tree_type="VID")
@@ -93,10 +111,10 @@ def search_vlan_id(vid, rtype="NGTREE", allSwitches=True):
 
             # Truncate switches on tree returns
             if rtype == "TREE":
-                ngtree = load_bridge_tree(vn, getSW=allSwitches)
+                ngtree = load_bridge_tree(vn, getSW=allSwitches, snapshot=snapshot)
                 nglib.ngtree.add_child_ngtree(pngtree, ngtree)
             else:
-                ngtree = load_bridge_tree(vn, getSW=allSwitches)
+                ngtree = load_bridge_tree(vn, getSW=allSwitches, snapshot=snapshot)
                 nglib.ngtree.add_child_ngtree(pngtree, ngtree)
 
         # Export Results
@@ -128,13 +146,32 @@ def get_vtree(vname, rtype="NGTREE", allSwitches=True):
         raise OutputError("RType Not Supported", str(rtypes))
 
 
-def load_bridge_tree(vname, root=True, getSW=False):
+def load_bridge_tree(vname, root=True, getSW=False, snapshot=None):
     """
     Create a Bridge Tree in NetGrph Object Format
     Recursively Build Trees for child vnames
     Starts from the root device and builds out from there.
 
-    Notes: getSW returns all switches instead of truncated (JSON/YAML)
+    Notes: getSW returns all switches instead of truncated (JSON/YAML),
+           snapshot builds the tree from a VLANSnapshot instead of querying
+    """
+
+    # Fetch the VNAME and every VLAN bridged below it in one query
+    if snapshot:
+        vlans = snapshot.vlans
+    else:
+        vlans = get_bridge_vlans(vname)
+
+    if vname not in vlans:
+        raise ResultError("No VLAN Name Found", "Expecting VNAME eg. Core-16: " + vname)
+
+    return build_bridge_tree(vlans, vname, root, getSW, set())
+
+
+def build_bridge_tree(vlans, vname, root, getSW, parents):
+    """
+    Build the Bridge Tree for vname from get_bridge_vlans() records
+    parents guards against BRIDGE loops back up the tree
     """
 
     sMax = 7
@@ -144,100 +181,92 @@ def load_bridge_tree(vname, root=True, getSW=False):
     # Initialize Empty Tree
     ngtree = nglib.ngtree.get_ngtree(vname, tree_type="VNAME")
 
-    # Find VLAN
-    vlan = get_vlan_from_vname(vname)
-
-    # Find Switches for VLAN
-    swtree = get_sw_from_vlan(vname)
-
-    if len(vlan) > 0:
-        vrec = vlan.records[0]
-        vname = vrec.vname
-        scount = len(swtree)
+    vrec = vlans[vname]
+    scount = len(vrec.switches)
+
+    # L3 Search
+    l3 = vrec.l3 or dict()
+
+    # Populate ngtree with variables
+    if l3.get('cidr'):
+        ngtree['CIDR'] = l3['cidr']
+    if l3.get('vrf'):
+        ngtree['VRF'] = l3['vrf']
+    if l3.get('router'):
+        ngtree['Router'] = l3['router']
+    if l3.get('gateway'):
+        ngtree['Gateway'] = l3['gateway']
+    if vrec.lroot:
+        ngtree['localroot'] = vrec.lroot
+    if vrec.lstp:
+        ngtree['localstp'] = vrec.lstp
+    if root:
+        ngtree['VLAN ID'] = vrec.vid
+    ngtree['Description'] = vrec.desc
+    if vrec.root:
+        ngtree['Root'] = vrec.root
+    ngtree['Switch Count'] = scount
+
+    # NetDB Port and MAC Counts
+    if vrec.pcount:
+        ngtree['Port Count'] = vrec.pcount
+    if vrec.mcount:
+        ngtree['MAC Count'] = vrec.mcount
+
+    # SW Tree Search for list and counts
+    if scount:
+        slist = []
+        scount = 0
+        for sw in vrec.switches:
+            if scount < sMax:
+                slist.append(sw)
+            if scount == sMax:
+                slist.append("...")
+            scount = scount+1
+        ngtree['Switches'] = slist
+
+    # Bridge data for each child, the last BRIDGE edge wins
+    bridges = dict()
+    for c in vrec.children:
+        if c['vname'] and c['cswitch'] and c['pswitch']:
+            bridges[c['vname']] = c['cswitch'] + ' <-> ' + c['pswitch']
+
+    # Child VLANs
+    parents = parents | {vname}
+    for c in vrec.children:
+        cvname = c['vname']
+        if cvname in vlans and cvname not in parents:
+            cngtree = build_bridge_tree(vlans, cvname, False, getSW, parents)
+            if cvname in bridges:
+                cngtree['Bridge'] = bridges[cvname]
+            nglib.ngtree.add_child_ngtree(ngtree, cngtree)
+        elif cvname in parents:
+            logger.warning("VLAN Bridge loop from %s back to %s", vname, cvname)
 
-        # Get NetDB Port and MAC Counts if they exist
-        (pcount, mcount) = get_vlan_counts(vname)
+    return ngtree
 
-        # Root Search
-        vroot = None
-        rootSearch = get_root_from_vlan(vname)
-        if len(rootSearch) > 0:
-            vroot = rootSearch.records[0].root
 
-        # L3 Search FIXME (get dict)
-        cidr = None
-        vrf = None
-        router = None
-        gateway = None
+def get_bridge_vlans(vname):
+    """
+    Get vname and all VLANs bridged below it with their switches, NetDB
+    counts, root, L3 network and child bridges, keyed on VNAME
+    """
 
-        l3search = get_l3_from_l2(vname)
-        if len(l3search) > 0:
-            cidr = l3search.records[0].cidr
-            vrf = l3search.records[0].vrf
-            router = l3search.records[0].router
-            gateway = l3search.records[0].gateway
+    vlans = dict()
 
-        # Populate ngtree with variables
-        if cidr:
-            ngtree['CIDR'] = cidr
-        if vrf:
-            ngtree['VRF'] = vrf
-        if router:
-            ngtree['Router'] = router
-        if gateway:
-            ngtree['Gateway'] = gateway
-        if vrec.lroot:
-            ngtree['localroot'] = vrec.lroot
-        if vrec.lstp:
-            ngtree['localstp'] = vrec.lstp
-        if root:
-            ngtree['VLAN ID'] = vrec.vid
-        ngtree['Description'] = vrec.desc
-        if vroot:
-            ngtree['Root'] = vroot
-        ngtree['Switch Count'] = scount
-
-        # NetDB Port and MAC Counts
-        if pcount:
-            ngtree['Port Count'] = pcount
-        if mcount:
-            ngtree['MAC Count'] = mcount
-
-        # SW Tree Search for list and counts
-        if len(swtree):
-            slist = []
-            scount = 0
-            for sw in swtree:
-                if scount < sMax:
-                    slist.append(sw.name)
-                if scount == sMax:
-                    slist.append("...")
-                scount = scount+1
-            ngtree['Switches'] = slist
-
-
-        # # Only Find Parent for root vname searches
-        # if root:
-        #     # Find Parent VLAN
-        #     parent = get_parent_vlan(vname)
-        #     if len(parent) > 0:
-        #         ngtree['Not Root']
-
-
-        # Find Child VLANs
-        children = get_child_vlans(vname)
-        if len(children) > 0:
-            for c in children:
-                cvname = c.vname
-                cngtree = load_bridge_tree(cvname, root=False, getSW=getSW)
-                cngtree = add_bridge_data(cngtree, vname, cvname)
-                if cngtree:
-                    nglib.ngtree.add_child_ngtree(ngtree, cngtree)
+    results = nglib.dbpool.execute(
+        'MATCH (pv:VLAN {name:{vname}}) '
+        + 'OPTIONAL MATCH (pv)-[:BRIDGE*]->(cv:VLAN) '
+        + 'WITH [pv] + collect(DISTINCT cv) AS vlans '
+        + 'UNWIND vlans AS v '
+        + 'WITH DISTINCT v '
+        + bridge_vlan_props,
+        vname=vname)
 
-    else:
-        raise ResultError("No VLAN Name Found", "Expecting VNAME eg. Core-16: " + vname)
+    for r in results:
+        vlans[r.vname] = r
 
-    return ngtree
+    return vlans
 
 
 def get_parent_ngtree(vname):
@@ -250,13 +279,13 @@ def get_parent_ngtree(vname):
     ngtree = nglib.ngtree.get_ngtree(vname, tree_type="Parent")
 
     if len(vlan) > 0:
-        vrec = vlan.records[0]
+        vrec = vlan[0]
 
         # L2 Search
         vroot = None
         rootSearch = get_root_from_vlan(vname)
         if len(rootSearch) > 0:
-            vroot = rootSearch.records[0].root
+            vroot = rootSearch[0].root
 
         # L3 Search
         cidr = None
@@ -266,10 +295,10 @@ def get_parent_ngtree(vname):
 
         l3search = get_l3_from_l2(vname)
         if len(l3search) > 0:
-            cidr = l3search.records[0].cidr
-            vrf = l3search.records[0].vrf
-            router = l3search.records[0].router
-            gateway = l3search.records[0].gateway
+            cidr = l3search[0].cidr
+            vrf = l3search[0].vrf
+            router = l3search[0].router
+            gateway = l3search[0].gateway
 
         # Populate ngtree with variables
         if cidr:
@@ -289,69 +318,38 @@ def get_parent_ngtree(vname):
     return ngtree
 
 
-def get_vlan_bridges(vid):
+def get_vlan_bridges(vid, snapshot=None):
     """
     Get all distinct vlan bridges returning the root node of the tree for each
-    Used for VLAN ID Searches
+    Used for VLAN ID Searches, snapshot uses a VLANSnapshot instead of querying
     """
 
-    vfound = dict()
     vname = dict()
     vid = str(vid)
 
-    vnames = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {vid:{vid}}) RETURN v.name AS name, v.vid AS vid',
-        vid=vid)
-
+    if snapshot:
+        vnames = snapshot.get_vid(vid)
+    else:
+        vnames = nglib.dbpool.execute(
+            'MATCH (v:VLAN {vid:{vid}}) RETURN v.name AS name, v.vid AS vid',
+            vid=vid)
 
     # Found VID
     if len(vnames) > 0:
-        for vn in vnames.records:
+        if snapshot:
+            domains = snapshot.domains
+        else:
+            domains = get_bridge_domains(vid)
+
+        for vn in vnames:
             if nglib.verbose > 2:
                 print("Found", vn.name, vn.vid)
 
-            if vn.name not in vfound.keys():
-
-                # Mark VName as found
-                vfound[vn.name] = 1
-
-                vbridges = nglib.py2neo_ses.cypher.execute(
-                    'MATCH (v:VLAN {name:{vname}})-[:BRIDGE*]-(rv:VLAN) RETURN rv.name AS rname',
-                    vname=vn.name)
-
-                # Standalone VLAN
-                if len(vbridges) == 0:
+            for root in domains.get_roots(vn.name):
+                if root not in vname:
                     if nglib.verbose > 2:
-                        print(vid, "not bridged on", vn.name)
-                    vname[vn.name] = vid
-
-                # Search Bridge remote for root node
-                else:
-                    rFound = False
-                    for rvn in vbridges:
-                        if nglib.verbose > 2:
-                            print("Found Root VLAN", rvn.rname)
-
-                        # Mark all members of bridge as found
-                        vfound[rvn.rname] = 1
-
-                        findroot = nglib.py2neo_ses.cypher.execute(
-                            'MATCH (v:VLAN {name:{vname}})<-[:BRIDGE]-(rv:VLAN) '
-                            + 'RETURN rv.name AS rname',
-                            vname=rvn.rname)
-
-                        # Root node has no outgoing BRIDGE relationships
-                        if len(findroot) == 0:
-                            if nglib.verbose > 2:
-                                print("Found root", rvn.rname)
-                            vname[rvn.rname] = vid
-                            rFound = True
-
-                    # I must be the root node since others have bridge relationships
-                    if not rFound:
-                        if nglib.verbose > 2:
-                            print("I'm the root of", vn.name)
-                        vname[vn.name] = vid
+                        print("Found root", root, "for", vn.name)
+                    vname[root] = vid
 
     else:
         raise ResultError("No VID Found", "Expecting VLAN id in range 1-4096: " + vid)
@@ -359,6 +357,135 @@ def get_vlan_bridges(vid):
     return vname
 
 
+class BridgeDomains:
+    """
+    VLAN Bridge Domains from BRIDGE edges (union-find)
+
+    Each connected set of bridged VLANs is a domain. Its roots are the
+    members with no parent bridge (no incoming BRIDGE), or the VLAN
+    searched on if the domain is a loop.
+    """
+
+    def __init__(self):
+        self.parent = dict()
+        self.children = set()
+        self.members = None
+
+    def find(self, vname):
+        """Returns the domain representative for vname"""
+
+        parent = self.parent
+        if vname not in parent:
+            return vname
+
+        root = vname
+        while parent[root] != root:
+            root = parent[root]
+
+        # Path compression
+        while parent[vname] != root:
+            (parent[vname], vname) = (root, parent[vname])
+
+        return root
+
+    def add_bridge(self, pvname, cvname):
+        """Add a pvname -> cvname BRIDGE edge"""
+
+        for vname in (pvname, cvname):
+            if vname not in self.parent:
+                self.parent[vname] = vname
+
+        self.parent[self.find(cvname)] = self.find(pvname)
+        self.children.add(cvname)
+        self.members = None
+
+    def get_members(self, vname):
+        """Returns all VNAMEs in vname's domain"""
+
+        if self.members is None:
+            self.members = dict()
+            for member in self.parent:
+                self.members.setdefault(self.find(member), []).append(member)
+
+        return self.members.get(self.find(vname), [vname])
+
+    def get_roots(self, vname):
+        """Returns the sorted root VNAMEs of vname's domain"""
+
+        roots = sorted(m for m in self.get_members(vname) if m not in self.children)
+        if not roots:
+            roots = [vname]
+
+        return roots
+
+
+def get_bridge_domains(vid):
+    """Load the BRIDGE edges for a VID into BridgeDomains (bridges join equal VIDs)"""
+
+    domains = BridgeDomains()
+
+    bridges = nglib.dbpool.execute(
+        'MATCH (pv:VLAN {vid:{vid}})-[:BRIDGE]->(cv:VLAN) '
+        + 'RETURN pv.name AS pvname, cv.name AS cvname',
+        vid=str(vid))
+
+    for b in bridges:
+        domains.add_bridge(b.pvname, b.cvname)
+
+    return domains
+
+
+class VLANSnapshot:
+    """
+    Every VLAN with its bridge tree properties (see get_bridge_vlans),
+    loaded in one query so reports can build all VID trees in memory
+    """
+
+    def __init__(self):
+        self.vlans = dict()
+        self.vids = dict()
+        self.domains = BridgeDomains()
+
+    def load(self):
+        """Load all VLANs and their BRIDGE domains"""
+
+        results = nglib.dbpool.execute(
+            'MATCH (v:VLAN) '
+            + bridge_vlan_props
+            + 'ORDER BY vname')
+
+        for r in results:
+            self.vlans[r.vname] = r
+            self.vids.setdefault(str(r.vid), []).append(
+                nglib.dbpool.Record(name=r.vname, vid=r.vid))
+
+            for c in r.children:
+                if c['vname']:
+                    self.domains.add_bridge(r.vname, c['vname'])
+
+        logger.debug("VLANSnapshot: Loaded %s VLANs", len(self.vlans))
+
+        return self
+
+    def get_vid(self, vid):
+        """Returns name/vid Records for each VLAN with vid"""
+
+        return self.vids.get(str(vid), [])
+
+    def get_vids(self, vlow, vhigh):
+        """Returns the distinct VIDs in a range sorted numerically"""
+
+        vids = []
+        for vid in self.vids:
+            try:
+                if vlow <= int(vid) <= vhigh:
+                    vids.append(vid)
+            except ValueError:
+                continue
+
+        return sorted(vids, key=int)
+
+
 def get_vlans_on_group(group, vrange):
     """Get all VLANs in a Management group"""
 
@@ -366,61 +493,27 @@ def get_vlans_on_group(group, vrange):
 
     (vlow, vhigh) = nglib.query.vlan.get_vlan_range(vrange)
 
-    vlist = []
-
-    results = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {mgmt:{group}}) RETURN v',
-        group=group)
-
-    if len(results) > 0:
-        for v in results:
-            vlan = v.v
-            vp = getJSONProperties(vlan)
-            vp['root'] = "None"
-
-            # Get NetDB MAC and Port Counts if they Exist
-            (pcount, mcount) = get_vlan_counts(vp['name'])
-            vp['pcount'] = pcount
-            vp['mcount'] = mcount
-
-            if 'desc' not in vp.keys():
-                vp['desc'] = 'None'
-
-            if vlow <= int(vp['vid']) <= vhigh:
-                switches = nglib.py2neo_ses.cypher.execute(
-                    'MATCH (s)<-[e:Switched]-(v:VLAN {name:{name}}) RETURN s.name as name',
-                    name=vp['name'])
-
-                root = nglib.py2neo_ses.cypher.execute(
-                    'MATCH (s)<-[e:Switched]-(v:VLAN {name:{name}}) '
-                    + 'OPTIONAL MATCH (v)-[b:BRIDGE*]-(rv)-[r:ROOT]->(rs) '
-                    + 'OPTIONAL MATCH (v)-[:ROOT]-(lr) '
-                    + 'RETURN s.name as name, rs.name as root, lr.name as lroot',
-                    name=vp['name'])
-
-                # Remote Root Tree Discovery
-                if len(root) > 0:
-                    vp['root'] = root.records[0].root
-
-                    # Local root if no remote root
-                    if root.records[0].lroot:
-                        vp['root'] = root.records[0].lroot
-
-                if len(switches):
-                    scount = 0
-                    slist = []
-                    for s in switches.records:
-                        scount = scount + 1
-                        if s.name != vp['root']:
-                            slist.append(s.name)
-                    vp['switches'] = slist
-                    vp['scount'] = scount
-
-                vlist.append(vp)
-
-        vtotal = len(vlist)
-        sortedList = sorted(vlist, key=lambda k: int(k['vid']))
-        print("Total: " + str(vtotal))
+    # Switches and NetDB counts aggregated per VLAN in one query
+    vlans = nglib.dbpool.execute(
+        'MATCH (v:VLAN {mgmt:{group}}) '
+        + 'WHERE toInt(v.vid) >= {vlow} AND toInt(v.vid) <= {vhigh} '
+        + 'OPTIONAL MATCH (v)-[sw:Switched]->(s) '
+        + 'RETURN v.vid AS vid, v.name AS name, v.desc AS desc, '
+        + 'collect(s.name) AS switches, '
+        + 'SUM(sw.pcount) AS pcount, SUM(sw.mcount) AS mcount '
+        + 'ORDER BY toInt(vid)',
+        group=group, vlow=vlow, vhigh=vhigh)
+
+    # No VLANs in range still prints a table if the group exists
+    found = vlans or nglib.dbpool.execute(
+        'MATCH (v:VLAN {mgmt:{group}}) RETURN v.name LIMIT 1', group=group)
+
+    if found:
+
+        # Bridge domains and roots for the group's VIDs
+        (domains, roots) = get_group_roots(group, vlow, vhigh)
+
+        print("Total: " + str(len(vlans)))
         print()
         print(" VID             Name           Sw/Macs/Ports  Root       Switches")
 
@@ -432,21 +525,27 @@ def get_vlans_on_group(group, vrange):
             tsize = 80
         print("-" * tsize)
 
-        for en in sortedList:
+        for en in vlans:
+
+            # Local root, else the root of the bridge domain
+            root = "None"
+            if en.switches:
+                root = get_domain_root(en.name, domains, roots)
 
             slen = tsize - 65
 
             swl = ''
-            for sw in en['switches']:
-                swl = swl + " " + sw
+            for sw in en.switches:
+                if sw != root:
+                    swl = swl + " " + sw
             swlt = (swl[:slen] + '..') if len(swl) > slen else swl
 
             counts = "{:3>}/{:4>}/{:<4}".format(
-                str(en['scount']), str(en['mcount']), str(en['pcount']))
+                str(len(en.switches)), str(en.mcount), str(en.pcount))
 
             print("{:>4} : {:<25}  {:<12} {:<9} {:}".format(
-                en['vid'], en['desc'], counts,
-                str(en['root']), swlt))
+                en.vid, en.desc or 'None', counts,
+                str(root), swlt))
 
         print()
 
@@ -454,44 +553,63 @@ def get_vlans_on_group(group, vrange):
         print("No VLANs for for Management Group: " + group)
         nglib.query.display_mgmt_groups()
 
-def add_bridge_data(ngtree, parent, child):
-    """Add data to ngtree about a parent bridge"""
 
-    bridge = nglib.bolt_ses.run(
-        'MATCH (pv:VLAN {name:{pvname}})-[e:BRIDGE]->(cv:VLAN {name:{cvname}}) '
-        + 'RETURN e.pswitch AS pswitch, e.cswitch AS cswitch',
-        {"pvname":parent, "cvname":child})
-    
-    for rec in bridge:
-        ngtree["Bridge"] = rec["cswitch"] + ' <-> ' + rec["pswitch"]
+def get_group_roots(group, vlow, vhigh):
+    """
+    Load the BRIDGE domains and ROOT switches of every VLAN sharing a VID
+    with the group (bridges join equal VIDs), returns (BridgeDomains, roots)
+    """
 
-    return ngtree
+    domains = BridgeDomains()
+    roots = dict()
+
+    results = nglib.dbpool.execute(
+        'MATCH (g:VLAN {mgmt:{group}}) '
+        + 'WHERE toInt(g.vid) >= {vlow} AND toInt(g.vid) <= {vhigh} '
+        + 'WITH collect(DISTINCT g.vid) AS vids '
+        + 'MATCH (v:VLAN) WHERE v.vid IN vids '
+        + 'OPTIONAL MATCH (v)-[:BRIDGE]->(cv:VLAN) '
+        + 'WITH v, collect(DISTINCT cv.name) AS children '
+        + 'OPTIONAL MATCH (v)-[:ROOT]-(rs) '
+        + 'RETURN v.name AS vname, children, head(collect(rs.name)) AS root',
+        group=group, vlow=vlow, vhigh=vhigh)
+
+    for r in results:
+        for cvname in r.children:
+            domains.add_bridge(r.vname, cvname)
+        if r.root:
+            roots[r.vname] = r.root
+
+    return (domains, roots)
+
+
+def get_domain_root(vname, domains, roots):
+    """Returns vname's own root switch, else the root of a VLAN bridged to it"""
+
+    if vname in roots:
+        return roots[vname]
+
+    for member in sorted(domains.get_members(vname)):
+        if member in roots:
+            return roots[member]
+
+    return None
 
 
 def get_l3_from_l2(vname):
     """Get L3 Network from L2 VLAN"""
 
-    l3 = nglib.py2neo_ses.cypher.execute(
+    l3 = nglib.dbpool.execute(
         'MATCH (v:VLAN {name:{vname}})<-[sw:L3toL2]-(n:Network)-[e:ROUTED_BY|ROUTED]->(r:Router)'
         + 'return n.cidr AS cidr, n.gateway AS gateway, n.vrf AS vrf, r.name as router',
         vname=vname)
 
     return l3
 
-def get_sw_from_vlan(vname):
-    """Get all switches connected to a VLAN"""
-
-    swtree = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {name:{vname}})-[sw:Switched]->(s:Switch)'
-        + 'return s.name AS name,sw',
-        vname=vname)
-
-    return swtree
-
 def get_root_from_vlan(vname):
     """Find the VLAN Root from a VNAME"""
 
-    root = nglib.py2neo_ses.cypher.execute(
+    root = nglib.dbpool.execute(
         'MATCH (v:VLAN {name:{vname}})-[sw:ROOT]->(s:Switch) return s.name AS root',
         vname=vname)
 
@@ -501,40 +619,9 @@ def get_root_from_vlan(vname):
 def get_vlan_from_vname(vname):
     """Get a VNAME"""
 
-    vlan = nglib.py2neo_ses.cypher.execute(
+    vlan = nglib.dbpool.execute(
         'MATCH (v:VLAN {name:{vname}})'
         + 'return v.name as vname, v.lstp AS lstp, v.lroot AS lroot, v.vid AS vid, v.desc AS desc',
         vname=vname)
 
     return vlan
-
-def get_vlan_counts(vname):
-    """Returns port and mac counts for a vlan from NetDB"""
-
-    counts = nglib.bolt_ses.run(
-        'match(v:VLAN {name:{vname}})-[e:Switched]->(s:Switch) '
-        + 'RETURN SUM(e.pcount) AS pcount, SUM(e.mcount) AS mcount',
-        {"vname": vname})
-
-    for en in counts:
-        return(en['pcount'], en['mcount'])
-
-    return(0, 0)
-
-def get_parent_vlan(vname):
-    """Find the Parent VLAN from here"""
-
-    parent = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {name:{vname}})<-[sw:BRIDGE]-(pv:VLAN) RETURN pv.name AS vname',
-        vname=vname)
-
-    return parent
-
-def get_child_vlans(vname):
-    """Find all child vlans on a VNAME"""
-
-    children = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {name:{vname}})-[sw:BRIDGE]->(cv:VLAN) RETURN cv.name AS vname',
-        vname=vname)
-
-    return children
@@ -58,7 +58,7 @@ def get_vlan_report(vrange, group='.*', report="full", rtype="NGTREE"):
 
             # Get all VLANs as NGTree
             ngtree = get_vlan_data(vrange, rtype)
-            if '_ccount' in ngtree.keys():
+            if ngtree['_ccount']:
                 nglib.query.exp_ngtree(ngtree, rtype)
                 return ngtree
             else:
@@ -72,7 +72,7 @@ def get_vlan_report(vrange, group='.*', report="full", rtype="NGTREE"):
             ngtree = get_vlan_data(vrange, rtype)
 
             # Found some VLANs in Range
-            if '_ccount' in ngtree:
+            if ngtree['_ccount']:
                 etree = nglib.ngtree.get_ngtree("Empty VLAN Report", tree_type="VIDs")
                 clist = ngtree['data']
 
@@ -81,7 +81,7 @@ def get_vlan_report(vrange, group='.*', report="full", rtype="NGTREE"):
                     get_empty_vlans(cv, etree)
 
                 # Found Empty VLANs, count and print
-                if '_ccount' in etree.keys():
+                if etree['_ccount']:
                     etree['Empty VLAN Count'] = etree['_ccount']
                     nglib.query.exp_ngtree(etree, rtype)
                     return etree
@@ -125,15 +125,14 @@ def get_vlan_data(vrange, rtype):
 
     (vlow, vhigh) = nglib.query.vlan.get_vlan_range(vrange)
 
-    vlans = nglib.bolt_ses.run(
-        'MATCH(v:VLAN) WHERE toInt(v.vid) >= {vlow} AND toInt(v.vid) <= {vhigh} '
-        + 'RETURN DISTINCT v.vid AS vid ORDER BY toInt(vid)',
-        {"vlow": vlow, "vhigh": vhigh})
+    # All VLANs, switches, roots, L3 and bridges in one pass
+    snapshot = nglib.query.vlan.VLANSnapshot().load()
 
     pngtree = nglib.ngtree.get_ngtree("Report", tree_type="VIDs")
 
-    for v in vlans:
-        vtree = nglib.query.vlan.search_vlan_id(v['vid'], allSwitches=allSwitches)
+    for vid in snapshot.get_vids(vlow, vhigh):
+        vtree = nglib.query.vlan.search_vlan_id(vid, allSwitches=allSwitches,
+                                                snapshot=snapshot)
         nglib.ngtree.add_child_ngtree(pngtree, vtree)
     return pngtree
 
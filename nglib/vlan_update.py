@@ -34,9 +34,11 @@
 
 import logging
 import csv
-from collections import defaultdict
+from collections import defaultdict, deque, OrderedDict
 import nglib
 import nglib.query.dev
+import nglib.query.vlan
+from nglib.vlanset import VlanSet, parse_vlans
 
 logger = logging.getLogger(__name__)
 
@@ -106,7 +108,7 @@ def import_mgmt_vlan(vdb, ignore_new):
         (mgmt, vid) = vname.split('-')
         vid = str(vid)
 
-        results = nglib.py2neo_ses.cypher.execute(
+        results = nglib.dbpool.execute(
             'MATCH (n:VLAN {name:{vname}}) RETURN n',
             vname=vname)
 
@@ -114,21 +116,21 @@ def import_mgmt_vlan(vdb, ignore_new):
         if len(results) == 0:
             logger.info("New: Inserting VLAN %s", en)
 
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'CREATE (v:VLAN {name:{vname}, vid:{vid}, mgmt:{mgmt}, time:{time}}) RETURN v',
                 vname=vname, vid=vid, mgmt=mgmt, time=time)
 
             # Record New Network Unless Ignoring initial run
             if not ignore_new:
                 # Store a NewVLAN Object for alerting
-                nglib.py2neo_ses.cypher.execute(
+                nglib.dbpool.execute(
                     'CREATE (v:NewVLAN {name:{vname}, time:{time}}) RETURN v',
                     vname=vname, time=time)
 
         # Else update record
         else:
             logger.debug("Updating VLAN %s", vname)
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (v:VLAN {name:{vname}}) SET v += '
                 + '{vid:{vid}, mgmt:{mgmt}, time:{time}} RETURN v',
                 vname=vname, vid=vid, mgmt=mgmt, time=time)
@@ -149,6 +151,7 @@ def import_links(fileName):
     lcsv = csv.DictReader(f)
     ldb = dict()
     vcache = cache_vlans()
+    updates = []
 
     # Load CSV entries into ldb dict
     for en in lcsv:
@@ -169,15 +172,11 @@ def import_links(fileName):
         if (pname, pport) in ldb and (cname, cport) in ldb:
 
             # Set of intersected VLANs between two trunks
-            iset = intersect_vlans(ldb[(pname, pport)]['vlans'], \
-            ldb[(cname, cport)]['vlans'])
-
-            rset = set()
+            iset = parse_vlans(ldb[(pname, pport)]['vlans']) \
+                & parse_vlans(ldb[(cname, cport)]['vlans'])
 
             # If VLAN exists on both switches and is in trunk, then it traverses link
-            for v in iset:
-                if int(v) in vcache[pname] and int(v) in vcache[cname]:
-                    rset.add(v)
+            rset = iset & vcache[pname] & vcache[cname]
 
             if nglib.verbose>3:
                 print("ps", ldb[(pname, pport)]['vlans'])
@@ -185,13 +184,10 @@ def import_links(fileName):
                 print("pvc", vcache[pname])
                 print("cvc", vcache[cname])
             if nglib.verbose>2:
-                print("ON LINK", sorted(rset), "on", pname, pport, cname, cport)
+                print("ON LINK", list(rset), "on", pname, pport, cname, cport)
 
             # Convert set to sorted vstring
-            rlist = []
-            for en in sorted(rset):
-                rlist.append(str(en))
-            vstring = ','.join(rlist)
+            vstring = rset.to_list_string()
 
             # No Vlans on trunk
             if not vstring and nglib.verbose>1:
@@ -204,101 +200,49 @@ def import_links(fileName):
             # Update Link Info
             pldb = ldb[(pname, pport)]
             pldb['_rvlans'] = vstring
-            pldb['rvlans'] = compact_vlans(rset)
-            pldb['cvlans'] = compact_vlans(iset)
+            pldb['rvlans'] = rset.to_string()
+            pldb['cvlans'] = iset.to_string()
             cldb = ldb[(cname, cport)]
             #print("Update Info", pname, pport, cname, cport, pldb, cldb )
-            add_vlans_int(pldb, cldb)
+            updates.append(get_vlans_int(pldb, cldb))
 
         else:
             if nglib.verbose>1:
                 print("Link not found in ldb", (pname, pport), (cname, cport))
 
+    # Write link VLANs in batches of get_vlans_int() rows
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS l '
+        + 'MATCH (ps:Switch {name:l.pname})-'
+        + '[e:NEI|NEI_EQ {pPort:l.pPort, cPort:l.cPort}]->'
+        + '(cs:Switch {name:l.cname}) '
+        + 'SET e += {desc:l.desc, native:l.nv, pPc:l.pPc, cPc:l.cPc, '
+        + 'vlans:l.cvlans, rvlans:l.rvlans, _rvlans:l._rvlans}',
+        updates, name="Trunk Links")
+
 
 def cache_vlans():
     """Build a VLAN Cache from each switch"""
 
-    vcache = defaultdict(set)
+    vcache = defaultdict(VlanSet)
 
     vlans = nglib.bolt_ses.run(
         'MATCH(s:Switch)<-[e:Switched]-(v) ' +
         'RETURN s.name, v.vid')
 
     for v in vlans:
-        vcache[v['s.name']].add(int(v['v.vid']))
+        vcache[v['s.name']] = vcache[v['s.name']].add(v['v.vid'])
 
     return vcache
 
 
-def intersect_vlans(set1, set2):
-    """Reduce VLANS to common range, returns set"""
-
-    set1 = expand_vlans(set1)
-    set2 = expand_vlans(set2)
-
-    iset = set(set1).intersection(set2)
-    return iset
-
-
-def expand_vlans(oset):
-    """Expand a VLAN range to a set"""
-
-    lset = oset.split(',')
-    nset = set()
-
-    # Process vlan ranges eg. 1,2,3-20,4,5 into set
-    for en in lset:
-        sset = en.split('-')
-        if len(sset) > 1:
-            for x in range(int(sset[0]), int(sset[1])+1):
-                nset.add(x)
-        elif en:
-            nset.add(int(en))
-
-    return nset
-
-
-def compact_vlans(oset):
-    """Convert set of vlans to range format"""
-
-    last = 0
-    crange = 0
-    nset = []
-
-    for en in sorted(oset):
-        if last and en == (last+1):
-            if not crange:
-                crange = last
-        elif crange:
-            nset.pop()
-            nset.append(str(crange) + '-' + str(last))
-            crange = 0
-            nset.append(str(en))
-        else:
-            nset.append(str(en))
-        last = en
-
-    if crange:
-        nset.pop()
-        nset.append(str(crange) + '-' + str(last))
-
-    #print("os", sorted(oset), "rs", nset)
-
-    return ",".join(nset)
+def get_vlans_int(pldb, cldb):
+    """Returns the VLAN Info update row for link pldb->cldb"""
 
-def add_vlans_int(pldb, cldb):
-    """Add VLAN Info to link pldb->cldb"""
-
-    nglib.bolt_ses.run(
-        'MATCH (ps:Switch {name:{pname}})-'
-        + '[e:NEI|NEI_EQ {pPort:{pPort}, cPort:{cPort}}]->'
-        + '(cs:Switch {name:{cname}}) '
-        + 'SET e += {desc:{desc}, native:{nv}, pPc:{pPc}, cPc:{cPc}, '
-        + 'vlans:{cvlans}, rvlans:{rvlans}, _rvlans:{_rvlans}} RETURN e',
-        {"pname": pldb['Switch'], "pPort": pldb['Port'], "cname": cldb['Switch'],
-         "cPort": cldb['Port'], "desc": pldb['desc'], "nv": pldb['native'],
-         "pPc": pldb['channel'], "cPc": cldb['channel'], "cvlans": pldb['cvlans'],
-         "rvlans": pldb['rvlans'], "_rvlans": pldb['_rvlans']})
+    return {"pname": pldb['Switch'], "pPort": pldb['Port'], "cname": cldb['Switch'],
+            "cPort": cldb['Port'], "desc": pldb['desc'], "nv": pldb['native'],
+            "pPc": pldb['channel'], "cPc": cldb['channel'], "cvlans": pldb['cvlans'],
+            "rvlans": pldb['rvlans'], "_rvlans": pldb['_rvlans']}
 
 
 def update_vlans():
@@ -323,21 +267,24 @@ def update_vlans():
 def root_election():
     """Kick off a root election for VLANs"""
 
+    # All VLANs and their switch STP values
+    vlans = load_vlan_stp()
+
     # Find the local root for each switch domain
     if nglib.verbose:
         logger.info("Local Switch Domain Root Election")
-    find_local_root()
+    find_local_root(vlans)
 
     # Search all bridge trees for lowest STP and link the root domain to the root
     if nglib.verbose:
         logger.info("Bridged Switch Domain Root Election")
-    find_bridged_root()
+    find_bridged_root(vlans)
 
 
 def update_vlan_desc():
     """Update VLAN descriptions using election process on each switch in domain"""
 
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (v:VLAN) RETURN v.name as vname')
 
     # Get all VLANs
@@ -348,7 +295,7 @@ def update_vlan_desc():
             topDesc = 'Unknown'
 
             # Get vlan desc properties for each switch from relationship
-            results = nglib.py2neo_ses.cypher.execute(
+            results = nglib.dbpool.execute(
                 'MATCH (v:VLAN {name:{vname}})-[e:Switched]-() RETURN e.desc AS desc',
                 vname=vname)
 
@@ -369,281 +316,309 @@ def update_vlan_desc():
             if nglib.verbose > 2:
                 logger.debug("Updating top description for VLAN:%s Desc:%s", vname, topDesc)
 
-            nglib.py2neo_ses.cypher.execute(
+            nglib.dbpool.execute(
                 'MATCH (v:VLAN {name:{vname}}) SET v.desc={topDesc} RETURN v',
                 vname=vname, topDesc=topDesc)
 
 
 def update_bridge_domains():
-    """Update all vlan bridges between vlan management domains"""
+    """
+    Update all vlan bridges between vlan management domains
+
+    Bridges are computed in memory from the switch VLANs, NEI links and
+    existing BRIDGE edges, then new bridges are created and existing ones
+    refreshed in batches.
+    """
+
+    # VIDs on every switch
+    swvlans = defaultdict(set)
+    results = nglib.dbpool.execute(
+        'MATCH (s:Switch)<-[e:Switched]-(v:VLAN) '
+        + 'RETURN s.name AS switch, v.vid AS vid')
+
+    for r in results:
+        swvlans[r.switch].add(str(r.vid))
+
+    # Existing bridges in either direction
+    existing = set()
+    results = nglib.dbpool.execute(
+        'MATCH (pv:VLAN)-[e:BRIDGE]->(cv:VLAN) '
+        + 'RETURN pv.name AS pvlan, cv.name AS cvlan')
+
+    for r in results:
+        existing.add(frozenset((r.pvlan, r.cvlan)))
 
     # Get all Switches and their child neighbors
-    results = nglib.py2neo_ses.cypher.execute(
+    results = nglib.dbpool.execute(
         'MATCH (ps:Switch)-[e:NEI|NEI_EQ]->(cs:Switch) '
         + 'RETURN ps.name as pswitch, ps.mgmt AS pmgmt, cs.name as cswitch, '
         + 'cs.mgmt AS cmgmt, e._rvlans AS rvlans')
 
-    if len(results) > 0:
-        for r in results.records:
-
-            # Different MGMT Domain and adjacent, look to bridge VLANs
-            if r.pmgmt != r.cmgmt:
-
-                # Get all VIDs for both parent and child switches
-                pvlans = nglib.py2neo_ses.cypher.execute(
-                    'MATCH (ps:Switch {name:{pswitch}})<-[e:Switched]-(v:VLAN) '
-                    + 'RETURN v.vid as vid',
-                    pswitch=r.pswitch)
-                cvlans = nglib.py2neo_ses.cypher.execute(
-                    'MATCH (ps:Switch {name:{cswitch}})<-[e:Switched]-(v:VLAN) '
-                    + 'RETURN v.vid as vid',
-                    cswitch=r.cswitch)
-
-                # Bridge VLANs across MGMT Domains if they exist on link
-                if len(pvlans) > 0 and len(cvlans) > 0:
-                    pvdb = dict()
-                    cvdb = dict()
-                    rvlans = set()
-                    if r.rvlans:
-                        rvlans = set(r.rvlans.split(','))
-
-                    # Load dicts of vlan IDs both both parent and child
-                    for p in pvlans.records:
-                        pvdb[p.vid] = 1
-                    for c in cvlans.records:
-                        cvdb[c.vid] = 1
-
-                    # If VIDs Match between parent and child across mgmt domains,
-                    # bridge the two
-                    for vlan in pvdb.keys():
-                        if vlan in cvdb.keys():
-                            if vlan in rvlans:
-                                update_bridge(r.pmgmt, r.cmgmt, vlan, r.pswitch, r.cswitch)
-                            elif nglib.verbose>1:
-                                logger.debug("Switches adjacent, missing rvlans to bridge: " +
-                                             "v:%s, ps:%s, cs:%s, rv:%s",
-                                             vlan, r.pswitch, r.cswitch, rvlans)
-
-
-def update_bridge(pmgmt, cmgmt, vlan, pswitch, cswitch):
-    """Insert or Update a VLAN BRIDGE"""
-
-    if nglib.verbose > 2:
-        print("Bridge: ", pmgmt, cmgmt, vlan, pswitch, cswitch)
-
-    pvlan = pmgmt + "-" + vlan
-    cvlan = cmgmt + "-" + vlan
-    time = nglib.get_time()
-
-    # See if a Bridge Exists
-    results = nglib.py2neo_ses.cypher.execute(
-        'MATCH (pv:VLAN {name:{pvlan}})-[e:BRIDGE]-(cv:VLAN {name:{cvlan}}) RETURN e',
-        pvlan=pvlan, cvlan=cvlan)
+    # First link found for each VLAN pair sets the bridge direction
+    bridges = OrderedDict()
 
-    if len(results) == 0:
-        logger.info("New: Bridge (%s)-[:BRIDGE]->(%s) Relationship", pvlan, cvlan)
+    for r in results:
 
-        nglib.py2neo_ses.cypher.execute(
-            'MATCH (pv:VLAN {name:{pvlan}}), (cv:VLAN {name:{cvlan}}) '
-            + 'CREATE (pv)-[e:BRIDGE {pswitch:{pswitch}, cswitch:{cswitch}, time:{time}}]'
-            + '->(cv) RETURN e',
-            pvlan=pvlan, cvlan=cvlan, pswitch=pswitch, cswitch=cswitch, time=time)
+        # Different MGMT Domain and adjacent, look to bridge VLANs
+        if r.pmgmt != r.cmgmt:
+            rvlans = set()
+            if r.rvlans:
+                rvlans = set(r.rvlans.split(','))
 
-    else:
-        logger.debug("Updating VLAN %s-[:BRIDGE]-%s Relationship", pvlan, cvlan)
+            # If VIDs Match between parent and child across mgmt domains,
+            # bridge the two
+            for vlan in sorted(swvlans[r.pswitch] & swvlans[r.cswitch]):
+                if vlan in rvlans:
+                    if nglib.verbose > 2:
+                        print("Bridge: ", r.pmgmt, r.cmgmt, vlan, r.pswitch, r.cswitch)
 
-        results = nglib.py2neo_ses.cypher.execute(
-            'MATCH (pv:VLAN {name:{pvlan}})-[e:BRIDGE]-(cv:VLAN {name:{cvlan}}) '
-            + 'SET e += {time:{time}} RETURN e',
-            pvlan=pvlan, cvlan=cvlan, pswitch=pswitch, cswitch=cswitch, time=time)
+                    pvlan = r.pmgmt + "-" + vlan
+                    cvlan = r.cmgmt + "-" + vlan
+                    pair = frozenset((pvlan, cvlan))
+                    if pair not in bridges:
+                        bridges[pair] = {"pvlan": pvlan, "cvlan": cvlan,
+                                         "pswitch": r.pswitch, "cswitch": r.cswitch}
 
+                elif nglib.verbose>1:
+                    logger.debug("Switches adjacent, missing rvlans to bridge: " +
+                                 "v:%s, ps:%s, cs:%s, rv:%s",
+                                 vlan, r.pswitch, r.cswitch, rvlans)
 
-def find_local_root():
-    """
-    Go through every Switch in a management domain
-    Find the lowest STP value and assume root within domain
-    """
+    time = nglib.get_time()
+    new = []
+    current = []
+
+    for pair in bridges:
+        bridge = bridges[pair]
+        bridge['time'] = time
+        if pair in existing:
+            logger.debug("Updating VLAN %s-[:BRIDGE]-%s Relationship",
+                         bridge['pvlan'], bridge['cvlan'])
+            current.append(bridge)
+        else:
+            logger.info("New: Bridge (%s)-[:BRIDGE]->(%s) Relationship",
+                        bridge['pvlan'], bridge['cvlan'])
+            new.append(bridge)
 
-    results = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN)-[:Switched]->() RETURN DISTINCT(v.name) AS name, v.vid AS vid')
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS b '
+        + 'MATCH (pv:VLAN {name:b.pvlan}), (cv:VLAN {name:b.cvlan}) '
+        + 'CREATE (pv)-[e:BRIDGE {pswitch:b.pswitch, cswitch:b.cswitch, time:b.time}]->(cv)',
+        new, name="New Bridges")
 
-    # Find the local root for vid on each switch
-    if len(results) > 0:
-        for v in results.records:
-            vname = v.name
-            stpmin = 32768
-            switch = None
-
-            # Get STP values from all Switched Relationships
-            results = nglib.py2neo_ses.cypher.execute(
-                'MATCH (v:VLAN {name:{vname}})-[e:Switched]->(s) '
-                + 'RETURN e.stp AS stp, s.name AS switch ORDER BY switch',
-                vname=vname)
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS b '
+        + 'MATCH (pv:VLAN {name:b.pvlan})-[e:BRIDGE]-(cv:VLAN {name:b.cvlan}) '
+        + 'SET e += {time:b.time}',
+        current, name="Bridges")
 
-            # Find the lowest value
-            for s in results.records:
-                stp = int(s.stp)
-                if stp < stpmin and stp != 0:
-                    stpmin = stp
-                    switch = s.switch
-                    if nglib.verbose > 3:
-                        print("Local Root: ", vname, stp, switch)
 
-            # Update VLAN with lowest value
-            results = nglib.py2neo_ses.cypher.execute(
-                'MATCH (v:VLAN {name:{vname}}) SET v += {lroot:{switch}, lstp:{stp}}',
-                vname=vname, switch=switch, stp=stpmin)
+def load_vlan_stp():
+    """
+    Load every VLAN with its stored local root and the STP value on each of
+    its switches, returns {vname: {vid, lstp, lroot, switches: [(switch, stp)]}}
+    """
 
+    vlans = OrderedDict()
 
-def find_bridged_root():
-    """Go through each VLAN, search all BRIDGED nodes for lowest STP value"""
+    results = nglib.dbpool.execute(
+        'MATCH (v:VLAN) '
+        + 'OPTIONAL MATCH (v)-[e:Switched]->(s) '
+        + 'RETURN v.name AS name, v.vid AS vid, v.lstp AS lstp, v.lroot AS lroot, '
+        + 'collect([s.name, e.stp]) AS switches ORDER BY name')
 
-    # Get all VLANs
-    results = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN) RETURN v.name AS name')
-
-    if len(results) > 0:
-        for r in results.records:
-            vname = r.name
-            stp = 32768
-            rootSwitch = None
-
-            # Find Bridged VLANs first
-            bridged = nglib.py2neo_ses.cypher.execute(
-                'MATCH (v:VLAN {name:{vname}})-[e:BRIDGE*]-(b:VLAN) '
-                + 'RETURN b.name AS name, b.lstp AS lstp, b.lroot AS lroot',
-                vname=vname)
+    for r in results:
+        switches = sorted((sw, stp) for (sw, stp) in r.switches if sw is not None)
+        vlans[r.name] = {"vid": r.vid, "lstp": r.lstp, "lroot": r.lroot,
+                         "switches": switches}
 
-            # Local Values
-            local = nglib.py2neo_ses.cypher.execute(
-                'MATCH (v:VLAN {name:{vname}}) '
-                + 'RETURN v.name AS name, v.lstp AS lstp, v.lroot AS lroot, v.vid as vid',
-                vname=vname)
+    return vlans
 
-            dup = 32768
-            if len(bridged) > 0:
-                for b in bridged:
-
-                    # New Lowest STP Domain
-                    if int(b.lstp) < stp:
-                        #print("Low STP: ",vname,b.name,b.lstp,b.lroot)
-                        stp = int(b.lstp)
-                        dup = stp
-                    elif int(b.lstp) == stp:
-                        dup = stp
-
-            # Check local stp values
-            if len(local) > 0:
-                v = local.records[0]
-
-                # If local root is the root for the BRIDGE domain, create root relationship
-                if int(v.lstp) <= stp:
-                    stp = int(v.lstp)
-                    rootSwitch = v.lroot
-                    vid = v.vid
-
-                    # Link Bridge domain to root
-                    if stp < 32768:
-                        if nglib.verbose > 3:
-                            print("Low STP: ", vname, stp, rootSwitch)
-                        link_vlan_to_root(vname, stp, rootSwitch)
-                        if stp != dup:
-                            update_bridge_direction(vname, vid, rootSwitch)
-                        elif nglib.verbose:
-                            logger.info("Duplicate Root Found across another domain:"
-                                        + " %s rs:%s", vname, rootSwitch)
-
-
-def link_vlan_to_root(vname, stp, rootSwitch):
-    """Create a VLAN -[ROOT]-> Switch Relationship"""
-
-    root = nglib.py2neo_ses.cypher.execute(
-        'MATCH (v:VLAN {name:{vname}})-[e:ROOT]-(s:Switch {name:{rootSwitch}}) RETURN e',
-        vname=vname, rootSwitch=rootSwitch)
 
-    time = nglib.get_time()
+def find_local_root(vlans=None):
+    """
+    Go through every Switch in a management domain
+    Find the lowest STP value and assume root within domain
+    """
 
-    # Create New Root Relationship
-    if len(root) == 0:
-        logger.info("New: Root for VLAN (%s)-[:ROOT]->(%s)", vname, rootSwitch)
+    if vlans is None:
+        vlans = load_vlan_stp()
 
-        nglib.py2neo_ses.cypher.execute(
-            'MATCH (v:VLAN {name:{vname}}),(s:Switch {name:{rootSwitch}}) '
-            + 'CREATE (v)-[e:ROOT {stp:{stp}, time:{time}}]->(s) RETURN e',
-            vname=vname, rootSwitch=rootSwitch, stp=stp, time=time)
+    updates = []
 
-    # Update existing
-    else:
-        logger.debug("Updating Root for VLAN (%s)-[:ROOT]->(%s)", vname, rootSwitch)
+    # Find the local root for vid on each switch
+    for vname in vlans:
+        vlan = vlans[vname]
+        stpmin = 32768
+        switch = None
+
+        if not vlan['switches']:
+            continue
+
+        # Find the lowest value (switches are sorted by name)
+        for (sw, stp) in vlan['switches']:
+            stp = int(stp)
+            if stp < stpmin and stp != 0:
+                stpmin = stp
+                switch = sw
+                if nglib.verbose > 3:
+                    print("Local Root: ", vname, stp, switch)
+
+        # Update VLAN with lowest value if it changed
+        if (vlan['lroot'], vlan['lstp']) != (switch, stpmin):
+            updates.append({"vname": vname, "switch": switch, "stp": stpmin})
+        vlan['lroot'] = switch
+        vlan['lstp'] = stpmin
+
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS u '
+        + 'MATCH (v:VLAN {name:u.vname}) SET v += {lroot:u.switch, lstp:u.stp}',
+        updates, name="Local Roots")
+
+
+def find_bridged_root(vlans=None):
+    """
+    Go through each bridge domain, the VLANs with the lowest STP value are
+    linked to their root switch. A single root also gets its bridges
+    pointed away from it (see find_bridge_reversal)
+    """
 
-        nglib.py2neo_ses.cypher.execute(
-            'MATCH (v:VLAN {name:{vname}})-[e:ROOT]->(s:Switch {name:{rootSwitch}}) '
-            + 'SET e += {stp:{stp}, time:{time}} RETURN e',
-            vname=vname, rootSwitch=rootSwitch, stp=stp, time=time)
+    if vlans is None:
+        vlans = load_vlan_stp()
 
+    # Bridge Domains, bridges by VLAN and switch mgmt groups
+    domains = nglib.query.vlan.BridgeDomains()
+    bridges = defaultdict(list)
 
-def update_bridge_direction(vname, vid, rootSwitch):
-    """Find all directionless bridges and fix directions towards root
-       Keeps a cache of reversed directions
-    """
+    results = nglib.dbpool.execute(
+        'MATCH (pv:VLAN)-[e:BRIDGE]->(cv:VLAN) '
+        + 'RETURN pv.name AS pvname, cv.name AS cvname, '
+        + 'e.pswitch AS pswitch, e.cswitch AS cswitch')
 
-    rmgmt = nglib.query.dev.get_mgmt_domain(rootSwitch)
-    revcache = dict()
+    for r in results:
+        domains.add_bridge(r.pvname, r.cvname)
+        bridges[r.pvname].append((r.cvname, r))
+        bridges[r.cvname].append((r.pvname, r))
 
-    # All directionless bridges
-    bridges = nglib.bolt_ses.run(
-        'MATCH(v:VLAN {name:{vname}})-[e:BRIDGE*]-(rv) RETURN rv.name as name',
-        {"vname": vname})
+    mgmt = dict()
+    results = nglib.dbpool.execute(
+        'MATCH (s:Switch) RETURN s.name AS name, s.mgmt AS mgmt')
+    for r in results:
+        mgmt[r.name] = r.mgmt
 
-    for en in bridges:
+    existing = set()
+    results = nglib.dbpool.execute(
+        'MATCH (v:VLAN)-[e:ROOT]->(s:Switch) RETURN v.name AS vname, s.name AS switch')
+    for r in results:
+        existing.add((r.vname, r.switch))
 
-        # Remote VLAN name
-        rv = en['name']
+    time = nglib.get_time()
+    roots = []
+    reversals = []
+    done = set()
+
+    for vname in vlans:
+
+        # Each domain once
+        domain = domains.find(vname)
+        if domain in done:
+            continue
+        done.add(domain)
+
+        # Lowest STP in the domain
+        members = [m for m in domains.get_members(vname) if m in vlans]
+        stp = 32768
+        for m in members:
+            if vlans[m]['lstp'] is not None and int(vlans[m]['lstp']) < stp:
+                stp = int(vlans[m]['lstp'])
+
+        if stp == 32768:
+            continue
+
+        rvlans = [m for m in members if vlans[m]['lstp'] is not None
+                  and int(vlans[m]['lstp']) == stp]
+
+        # Link Bridge domain to root
+        for rvname in rvlans:
+            rootSwitch = vlans[rvname]['lroot']
+            if nglib.verbose > 3:
+                print("Low STP: ", rvname, stp, rootSwitch)
+
+            if (rvname, rootSwitch) not in existing:
+                logger.info("New: Root for VLAN (%s)-[:ROOT]->(%s)", rvname, rootSwitch)
+            else:
+                logger.debug("Updating Root for VLAN (%s)-[:ROOT]->(%s)", rvname, rootSwitch)
+
+            roots.append({"vname": rvname, "switch": rootSwitch, "stp": stp, "time": time})
+
+            if len(rvlans) > 1 and nglib.verbose:
+                logger.info("Duplicate Root Found across another domain:"
+                            + " %s rs:%s", rvname, rootSwitch)
+
+        # Fix bridge directions towards a single root
+        if len(rvlans) == 1:
+            rvname = rvlans[0]
+            reversal = find_bridge_reversal(
+                rvname, mgmt.get(vlans[rvname]['lroot']), bridges, mgmt)
+            if reversal:
+                reversal['vid'] = vlans[rvname]['vid']
+                logger.info("Update: Reversing Bridge Direction: %s %s %s",
+                            reversal['vid'], reversal['pswitch'], reversal['cswitch'])
+                reversals.append(reversal)
+
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS r '
+        + 'MATCH (v:VLAN {name:r.vname}), (s:Switch {name:r.switch}) '
+        + 'MERGE (v)-[e:ROOT]->(s) '
+        + 'SET e += {stp:r.stp, time:r.time}',
+        roots, name="VLAN Roots")
+
+    nglib.dbpool.write_batches(
+        'UNWIND {batch} AS r '
+        + 'MATCH (pv:VLAN {vid:r.vid})-'
+        + '[e:BRIDGE {pswitch:r.pswitch, cswitch:r.cswitch}]'
+        + '->(cv:VLAN {vid:r.vid}) '
+        + 'CREATE (cv)-[:BRIDGE {pswitch:r.cswitch, cswitch:r.pswitch, '
+        + 'time:e.time, test:r.pswitch}]->(pv) '
+        + 'DELETE e',
+        reversals, name="Bridge Reversals")
+
+
+def find_bridge_reversal(rvname, rmgmt, bridges, mgmt):
+    """
+    Walk the bridges out from root VLAN rvname (BFS, up to 19 bridges) and
+    return the first bridge pointing towards the root as {pswitch, cswitch}
 
-        # Path from remote vlan to root switch
-        rpath = nglib.bolt_ses.run(
-            'MATCH(v:VLAN {name:{vname}}), (s:Switch {name:{rswitch}}), '
-            + 'p = shortestPath((s)-[e:BRIDGE|ROOT*0..20]-(v)) '
-            + 'RETURN e, LENGTH(p) as dist',
-            {"vname": rv, "rswitch": rootSwitch})
+    A bridge points away from the root when its pswitch is in the mgmt group
+    the walk arrived from. Only one bridge is reversed per domain and run.
 
-        # Compares direction of path to root, reverses wrong directions
-        for rec in rpath:
-            lastm = rmgmt
-            for b in rec['e']:
-                props = b.properties
-                if 'pswitch' in props:
-                    cmgmt = nglib.query.dev.get_mgmt_domain(props['pswitch'])
-                    if vname not in revcache \
-                        and lastm != cmgmt:
-                        reverse_bridge(vid, props['pswitch'], props['cswitch'])
-                        revcache[vname] = 1
-                    lastm = nglib.query.dev.get_mgmt_domain(props['cswitch'])
+    Which misdirected bridge is found first depends on walk order. The old
+    per VLAN shortestPath walk followed database order, so it could pick a
+    different bridge on a given run. Each run still fixes one bridge nearest
+    the root, so repeated elections converge on the same directions.
+    """
 
+    lastm = {rvname: rmgmt}
+    depth = {rvname: 0}
+    queue = deque([rvname])
 
-def reverse_bridge(vid, pswitch, cswitch):
-    """Reverse Direction of BRIDGE links towards root"""
+    while queue:
+        vname = queue.popleft()
+        if depth[vname] >= 19:
+            continue
 
-    logger.info("Update: Reversing Bridge Direction: %s %s %s", vid, pswitch, cswitch)
+        for (nvname, bridge) in bridges[vname]:
+            if nvname in lastm:
+                continue
 
-    current = nglib.bolt_ses.run(
-        'MATCH(pv:VLAN {vid:{vid}})-'
-        + '[e:BRIDGE {pswitch:{pswitch}, cswitch:{cswitch}}]'
-        + '->(cv {vid:{vid}}) RETURN pv.name as pvname, cv.name as cvname, e.time as time',
-        {"vid":vid, "pswitch":pswitch, "cswitch":cswitch})
+            if lastm[vname] != mgmt.get(bridge.pswitch):
+                return {"pswitch": bridge.pswitch, "cswitch": bridge.cswitch}
 
-    for rec in current:
-        nglib.bolt_ses.run(
-            'MATCH(pv:VLAN {vid:{vid}})-'
-            + '[e:BRIDGE {pswitch:{pswitch}, cswitch:{cswitch}}]'
-            + '->(cv {vid:{vid}}) DELETE e',
-            {"vid":vid, "pswitch":pswitch, "cswitch":cswitch})
+            lastm[nvname] = mgmt.get(bridge.cswitch)
+            depth[nvname] = depth[vname] + 1
+            queue.append(nvname)
 
-        nglib.bolt_ses.run(
-            'MATCH(pv:VLAN {name:{pvname}}), (cv {name:{cvname}}) '
-            + 'CREATE (cv)-[e:BRIDGE '
-            + '{pswitch:{cswitch}, cswitch:{pswitch}, time:{time}, test:{pswitch}}]->(pv)',
-            {"pvname":rec['pvname'], "cvname":rec['cvname'], "pswitch":pswitch, "cswitch":cswitch, "time":rec['time']})
+    return None
 
 
 def netdb_vlan_import():
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2016 "Jonathan Yantis"
+#
+# This file is a part of NetGrph.
+#
+#    This program is free software: you can redistribute it and/or  modify
+#    it under the terms of the GNU Affero General Public License, version 3,
+#    as published by the Free Software Foundation.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#    As a special exception, the copyright holders give permission to link the
+#    code of portions of this program with the OpenSSL library under certain
+#    conditions as described in each individual source file and distribute
+#    linked combinations including the program with the OpenSSL library. You
+#    must comply with the GNU Affero General Public License in all respects
+#    for all of the code used other than as permitted herein. If you modify
+#    file(s) with this exception, you may extend this exception to your
+#    version of the file(s), but you are not obligated to do so. If you do not
+#    wish to do so, delete this exception statement from your version. If you
+#    delete this exception statement from all source files in the program,
+#    then also delete it in the license file.
+#
+"""
+NetGrph VLAN Sets
+- VlanSet stores VIDs 0-4095 as bits of an int, set algebra is one int op
+- VlanSets are immutable, so cached sets can be shared safely
+- Parses and renders trunk range strings (eg. 1,5,10-20)
+- Parsed range strings are cached, trunk allowed lists repeat across links
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Parsed VlanSets by range string
+parse_cache = dict()
+parse_cache_size = 4096
+
+
+class VlanSet:
+    """A set of VLAN IDs as an integer bitmask (bit n set = VLAN n)"""
+
+    __slots__ = ('bits',)
+
+    def __init__(self, vids=None):
+        self.bits = 0
+        if vids:
+            for vid in vids:
+                self.bits |= 1 << int(vid)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """VlanSet from an integer bitmask"""
+
+        vset = cls()
+        vset.bits = bits
+        return vset
+
+    @classmethod
+    def from_string(cls, vstring):
+        """Parse a VLAN range string eg. 1,2,3-20 (see parse_vlans for a cached parse)"""
+
+        bits = 0
+
+        for en in vstring.split(','):
+            sset = en.split('-')
+            if len(sset) > 1:
+                low = int(sset[0])
+                high = int(sset[1])
+                if high >= low:
+                    bits |= ((1 << (high - low + 1)) - 1) << low
+            elif en:
+                bits |= 1 << int(en)
+
+        return cls.from_bits(bits)
+
+    def __and__(self, other):
+        return VlanSet.from_bits(self.bits & other.bits)
+
+    def __or__(self, other):
+        return VlanSet.from_bits(self.bits | other.bits)
+
+    def __sub__(self, other):
+        return VlanSet.from_bits(self.bits & ~other.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, VlanSet) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __contains__(self, vid):
+        return bool(self.bits >> int(vid) & 1)
+
+    def __iter__(self):
+        """VIDs in ascending order"""
+
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def add(self, vid):
+        """Returns a new VlanSet with vid added"""
+
+        return VlanSet.from_bits(self.bits | 1 << int(vid))
+
+    def ranges(self):
+        """Yields (low, high) runs of consecutive VIDs in ascending order"""
+
+        bits = self.bits
+        while bits:
+            low = (bits & -bits).bit_length() - 1
+            run = bits >> low
+
+            # run ^ (run + 1) is a mask of the trailing ones plus one
+            length = (run ^ (run + 1)).bit_length() - 1
+            yield (low, low + length - 1)
+
+            bits &= ~(((1 << length) - 1) << low)
+
+    def to_string(self):
+        """Render as a compact range string eg. 1-3,5,10-20"""
+
+        nset = []
+        for (low, high) in self.ranges():
+            if low == high:
+                nset.append(str(low))
+            else:
+                nset.append(str(low) + '-' + str(high))
+
+        return ','.join(nset)
+
+    def to_list_string(self):
+        """Render every VID comma separated eg. 1,2,3,5"""
+
+        return ','.join(str(vid) for vid in self)
+
+    def __str__(self):
+        return self.to_string()
+
+    def __repr__(self):
+        return "VlanSet('" + self.to_string() + "')"
+
+
+def parse_vlans(vstring):
+    """Returns a cached VlanSet for a VLAN range string"""
+
+    vset = parse_cache.get(vstring)
+
+    if vset is None:
+        if len(parse_cache) >= parse_cache_size:
+            parse_cache.clear()
+        vset = VlanSet.from_string(vstring)
+        parse_cache[vstring] = vset
+
+    return vset
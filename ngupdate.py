@@ -238,3 +238,15 @@ elif args.clearNodes and args.hours:
 # Must need help
 else:
     parser.print_help()
+
+# Database changed, invalidate caches in running API servers
+updates = (args.full, args.reSeed, args.dropDatabase, args.unetdb, args.id, args.ind,
+           args.ild, args.ivrf, args.inet, args.ivlan, args.uvlan, args.isnet,
+           args.ifile, args.ifw, args.clearEdges and args.hours,
+           args.clearNodes and args.hours)
+
+if any(updates):
+    if args.dropDatabase or args.ifile:
+        nglib.bump_generation('networks', 'topology')
+    else:
+        nglib.bump_generation('topology')
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+""" Check BridgeDomains union-find against a graph walk"""
+import random
+from nglib.query.vlan import BridgeDomains
+
+trials = 300
+
+
+def walk_domain(edges, vname):
+    """Connected VNAMEs from vname over undirected edges"""
+    seen = {vname}
+    todo = [vname]
+    while todo:
+        v = todo.pop()
+        for (p, c) in edges:
+            for (a, b) in ((p, c), (c, p)):
+                if a == v and b not in seen:
+                    seen.add(b)
+                    todo.append(b)
+    return seen
+
+
+def test_domains_match_walk():
+    """Random bridges give the same members and roots as a graph walk"""
+    for _ in range(trials):
+        vnames = ['sw' + str(n) + '-100' for n in range(random.randint(1, 12))]
+        edges = [tuple(random.sample(vnames, 2)) for _ in range(random.randint(0, 10))
+                 if len(vnames) > 1]
+
+        domains = BridgeDomains()
+        for (p, c) in edges:
+            domains.add_bridge(p, c)
+
+        children = {c for (_, c) in edges}
+        for vname in vnames:
+            members = walk_domain(edges, vname)
+            assert set(domains.get_members(vname)) == members
+            roots = sorted(m for m in members if m not in children) or [vname]
+            assert domains.get_roots(vname) == roots
+
+
+def test_roots_and_loops():
+    """Chains root at the top, loops root on the searched VLAN"""
+    domains = BridgeDomains()
+    domains.add_bridge('a-10', 'b-10')
+    domains.add_bridge('b-10', 'c-10')
+    domains.add_bridge('x-10', 'y-10')
+    domains.add_bridge('y-10', 'x-10')
+
+    assert domains.get_roots('c-10') == ['a-10']
+    assert sorted(domains.get_members('b-10')) == ['a-10', 'b-10', 'c-10']
+    assert domains.get_roots('y-10') == ['y-10']
+    assert domains.get_members('z-10') == ['z-10']
+    assert domains.get_roots('z-10') == ['z-10']
+
+
+if __name__ == "__main__":
+    test_domains_match_walk()
+    test_roots_and_loops()
+    print("BridgeDomains OK")
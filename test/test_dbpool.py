@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+""" Check write_batches splits rows into committed batches"""
+import nglib
+import nglib.dbpool
+
+
+class FakePool:
+    """Records each write"""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, statement, params=None):
+        self.writes.append((statement, list(params['batch'])))
+
+
+def write_batches(rows, batch_size=None):
+    """Run write_batches on a fake pool, returns (count, writes)"""
+    pool = FakePool()
+    nglib.dbpool.pool = pool
+    count = nglib.dbpool.write_batches('UNWIND {batch} AS r', rows, batch_size=batch_size)
+    return (count, pool.writes)
+
+
+def test_batches():
+    """Full batches plus a partial one, in order"""
+    (count, writes) = write_batches(list(range(25)), batch_size=10)
+    assert count == 25
+    assert [batch for (_, batch) in writes] == [
+        list(range(10)), list(range(10, 20)), list(range(20, 25))]
+    assert all(statement == 'UNWIND {batch} AS r' for (statement, _) in writes)
+
+
+def test_exact_and_empty():
+    """No empty trailing batch and nothing written for no rows"""
+    (count, writes) = write_batches(list(range(20)), batch_size=10)
+    assert (count, len(writes)) == (20, 2)
+    assert write_batches([], batch_size=10) == (0, [])
+
+
+def test_generator_and_default():
+    """Rows can be a generator, batch size defaults to nglib.batch_size"""
+    batch_size = nglib.batch_size
+    nglib.batch_size = 4
+    (count, writes) = write_batches(iter(range(9)))
+    nglib.batch_size = batch_size
+    assert count == 9
+    assert [len(batch) for (_, batch) in writes] == [4, 4, 1]
+
+
+if __name__ == "__main__":
+    test_batches()
+    test_exact_and_empty()
+    test_generator_and_default()
+    print("write_batches OK")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+""" Check the VRF security path matrix depth limits and rebuilds"""
+import nglib
+import nglib.dbpool
+from nglib.dbpool import Record
+from nglib.query import fwmatrix
+
+loads = []
+
+
+class Path:
+    """Stand in for a bolt Path"""
+
+    def __init__(self, hops):
+        self.relationships = [None] * hops
+
+
+def fake_execute(statement, params=None, **kwparams):
+    """Every VRF pair, guest and mgmt are not connected"""
+    loads.append(statement)
+    hops = {('default', 'default'): 0, ('default', 'guest'): 2, ('guest', 'default'): 2}
+    return [Record(svrf=s, dvrf=d, p=Path(hops[(s, d)]) if (s, d) in hops else None)
+            for s in ('default', 'guest', 'mgmt') for d in ('default', 'guest', 'mgmt')]
+
+
+def test_get_path():
+    """Paths are returned within depth only"""
+    nglib.dbpool.execute = fake_execute
+    matrix = fwmatrix.FWMatrix().load()
+
+    assert len(matrix.paths) == 3
+    assert matrix.get_path('default', 'guest', 2) is matrix.paths[('default', 'guest')]
+    assert matrix.get_path('default', 'guest', 1) is None
+    assert matrix.get_path('default', 'default', 0) is not None
+    assert matrix.get_path('guest', 'mgmt', 20) is None
+
+
+def test_generation():
+    """get_matrix() rebuilds on fw or networks imports only"""
+    gens = {'fw': 1, 'networks': 1}
+    nglib.get_generation = gens.get
+    nglib.dbpool.execute = fake_execute
+    fwmatrix.matrix = None
+    del loads[:]
+
+    fwmatrix.get_matrix()
+    fwmatrix.get_matrix()
+    assert len(loads) == 1
+    gens['fw'] = 2
+    fwmatrix.get_matrix()
+    gens['networks'] = 2
+    fwmatrix.get_matrix()
+    assert len(loads) == 3
+
+
+if __name__ == "__main__":
+    test_get_path()
+    test_generation()
+    print("FWMatrix OK")
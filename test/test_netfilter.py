@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+""" Check NetFilter matching and its compiled Cypher agree"""
+import re
+import itertools
+from nglib.query import NetFilter
+
+vrfs = ('default', 'guest', 'mgmt')
+roles = ('user', 'printer', 'voice', '', None)
+
+filters = (
+    'default',
+    'all',
+    'default:user',
+    'default:user|printer guest',
+    'guest:none mgmt:voice|none',
+    'all:voice default:user',
+    'all:none',
+)
+
+
+def eval_cypher(where, params, vrf, role):
+    """Evaluate the compiled WHERE for v.name = vrf and s.role = role"""
+    expr = re.sub(r'\{(\w+)\}', lambda m: repr(params[m.group(1)]), where)
+    expr = expr.replace('v.name =', repr(vrf) + ' ==')
+    expr = expr.replace('s.role IS NULL', '(' + repr(role) + ' == None)')
+    expr = expr.replace("s.role = ''", '(' + repr(role) + " == '')")
+    expr = expr.replace('s.role', repr(role)).replace(' IN ', ' in ')
+    expr = expr.replace(' OR ', ' or ').replace(' AND ', ' and ')
+    expr = expr.replace('true', 'True').replace('false', 'False')
+    return eval(expr)  # pylint: disable=eval-used
+
+
+def test_match():
+    """Spot check filter semantics"""
+    nf = NetFilter('default:user|none guest')
+    assert nf.match({'VRF': 'default', 'NetRole': 'user'})
+    assert nf.match({'VRF': 'default', 'NetRole': None})
+    assert nf.match({'VRF': 'default', 'NetRole': ''})
+    assert not nf.match({'VRF': 'default', 'NetRole': 'voice'})
+    assert nf.match({'VRF': 'guest', 'NetRole': 'voice'})
+    assert not nf.match({'VRF': 'mgmt', 'NetRole': 'user'})
+
+    nf = NetFilter('all:voice')
+    assert nf.match({'VRF': 'mgmt', 'NetRole': 'voice'})
+    assert not nf.match({'VRF': 'mgmt', 'NetRole': 'user'})
+
+
+def test_cypher_matches_match():
+    """Compiled Cypher selects the same networks as match()"""
+    for fString in filters:
+        nf = NetFilter(fString)
+        (where, params) = nf.cypher()
+        for (vrf, role) in itertools.product(vrfs, roles):
+            expect = nf.match({'VRF': vrf, 'NetRole': role})
+            assert eval_cypher(where, params, vrf, role) == expect, (fString, vrf, role, where)
+
+
+if __name__ == "__main__":
+    test_match()
+    test_cypher_matches_match()
+    print("NetFilter OK")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Check the NetIndex longest prefix match against a brute force search"""
+import random
+import ipaddress
+from nglib.query.netindex import NetIndex
+
+trials = 300
+
+
+def brute_force(nets, ip, vrf=None):
+    """Most specific (cidr, vrf) containing ip the slow way"""
+    addr = ipaddress.ip_address(ip)
+    best = None
+    for (net, nvrf) in nets:
+        if addr.version == net.version and addr in net and (vrf is None or vrf == nvrf):
+            if best is None or net.prefixlen > best.prefixlen:
+                best = net
+    return best
+
+
+def random_nets(count):
+    """Random overlapping IPv4 and IPv6 networks in a few VRFs"""
+    nets = []
+    for _ in range(count):
+        vrf = random.choice(('default', 'guest', 'mgmt'))
+        if random.random() < 0.8:
+            addr = random.randint(0, 2**32 - 1) & 0x0AFFFFFF | 0x0A000000
+            net = ipaddress.ip_network((addr, random.randint(8, 32)), strict=False)
+        else:
+            addr = random.randint(0, 2**16 - 1) << 112 | 0x20010DB8 << 96
+            net = ipaddress.ip_network((addr, random.randint(16, 128)), strict=False)
+        nets.append((net, vrf))
+    return nets
+
+
+def test_lookup_matches_brute_force():
+    """Random networks and addresses match a linear scan, with and without VRF"""
+    for _ in range(trials):
+        nets = random_nets(random.randint(1, 40))
+        netindex = NetIndex()
+        for (net, vrf) in nets:
+            netindex.add(str(net), vrf, vrf + '-' + str(net))
+
+        for _ in range(10):
+            (net, _) = random.choice(nets)
+            ip = net.network_address + random.randint(0, net.num_addresses - 1)
+            for vrf in (None, 'default', 'guest'):
+                expect = brute_force(nets, ip, vrf)
+                found = netindex.find(str(ip), vrf)
+                if expect is None:
+                    assert found is None, (ip, vrf, found)
+                else:
+                    assert found[0] == str(expect), (ip, vrf, found, expect)
+
+
+def test_find_returns_vrfs():
+    """Every VRF with the matching prefix is returned"""
+    netindex = NetIndex()
+    netindex.add('10.1.0.0/16', 'default', 'default-10.1.0.0/16')
+    netindex.add('10.1.1.0/24', 'default', 'default-10.1.1.0/24')
+    netindex.add('10.1.1.0/24', 'guest', 'guest-10.1.1.0/24')
+
+    assert netindex.find('10.1.1.5') == ('10.1.1.0/24', {
+        'default': 'default-10.1.1.0/24', 'guest': 'guest-10.1.1.0/24'})
+    assert netindex.find('10.1.2.5')[0] == '10.1.0.0/16'
+    assert netindex.find('10.2.0.1') is None
+    assert netindex.find('10.1.1.5', vrf='mgmt') is None
+    assert len(netindex) == 2
+
+
+if __name__ == "__main__":
+    test_lookup_matches_brute_force()
+    test_find_returns_vrfs()
+    print("NetIndex OK")
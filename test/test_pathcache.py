@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Check PathCache LRU eviction, max age and generation invalidation"""
+import nglib
+from nglib.query import pathcache
+
+gens = dict()
+
+
+def setup(size=3, ttl=300):
+    """Fresh cache with a fake generation table"""
+    nglib.path_cache = size
+    nglib.path_cache_ttl = ttl
+    nglib.get_generation = gens.get
+    gens['topology'] = 1
+    return pathcache.PathCache()
+
+
+def test_lru():
+    """Least recently used entry is evicted first"""
+    cache = setup(size=3)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == ['A', 'C', 'D']
+    assert len(cache.entries) == 3
+
+
+def test_copies():
+    """Cached values are copied in and out"""
+    cache = setup()
+    value = {'hops': [1]}
+    cache.put('a', value)
+    value['hops'].append(2)
+    cache.get('a')['hops'].append(3)
+    assert cache.get('a') == {'hops': [1]}
+
+
+def test_ttl():
+    """Entries older than path_cache_ttl are misses and dropped"""
+    cache = setup(ttl=0)
+    cache.put('a', 'A')
+    assert cache.get('a') is None
+    assert 'a' not in cache.entries
+    assert cache.misses == 1
+
+
+def test_generation():
+    """A new topology generation clears the cache"""
+    cache = setup()
+    cache.put('a', 'A')
+    assert cache.get('a') == 'A'
+    gens['topology'] = 2
+    assert cache.get('a') is None
+    cache.put('a', 'A2')
+    assert cache.get('a') == 'A2'
+
+
+def test_cached_path():
+    """Decorator caches NGTREE results and restores popt"""
+    setup()
+    pathcache.cache = pathcache.PathCache()
+    calls = []
+
+    @pathcache.cached_path
+    def get_path(src, dst, popt, rtype="NGTREE"):
+        calls.append((src, dst, rtype))
+        popt['depth'] = '20'
+        return {'src': src, 'dst': dst}
+
+    assert get_path('a', 'b', {}) == {'src': 'a', 'dst': 'b'}
+    popt = {}
+    assert get_path('a', 'b', popt) == {'src': 'a', 'dst': 'b'}
+    assert popt == {'depth': '20'}
+    get_path('a', 'b', {}, rtype="TREE")
+    assert calls == [('a', 'b', 'NGTREE'), ('a', 'b', 'TREE')]
+
+
+if __name__ == "__main__":
+    test_lru()
+    test_copies()
+    test_ttl()
+    test_generation()
+    test_cached_path()
+    print("PathCache OK")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+""" Check the in-memory routed path engine on a small topology"""
+import nglib
+import nglib.dbpool
+from nglib.dbpool import Record
+from nglib.query import routegraph
+
+# Two equal cost paths R1-R2-R4 and R1-R3-R4, and a longer R1-R5-R6-R4
+p2p = {
+    'N12': ('R1', 'R2'), 'N13': ('R1', 'R3'), 'N24': ('R2', 'R4'),
+    'N34': ('R3', 'R4'), 'N15': ('R1', 'R5'), 'N56': ('R5', 'R6'),
+    'N64': ('R6', 'R4'),
+}
+stubs = {'SRC': 'R1', 'DST': 'R4'}
+
+
+def fake_execute(statement, params=None, **kwparams):
+    """Answers the two RouteGraph.load() queries"""
+    rows = []
+    lid = 0
+    if 'ROUTED_BY' in statement:
+        for (net, router) in stubs.items():
+            rows.append(Record(net=net, cidr=net + '/24', router=router))
+        return rows
+
+    for (net, routers) in list(p2p.items()) + [(n, (r,)) for (n, r) in stubs.items()]:
+        for router in routers:
+            lid += 1
+            rows.append(Record(net=net, cidr=net + '/24', nvrf='default', vrf='default',
+                               router=router, gateway=net + '-' + router, lid=lid,
+                               vids=[]))
+    return rows
+
+
+def load_graph():
+    """RouteGraph over fake_execute"""
+    nglib.dbpool.execute = fake_execute
+    return routegraph.RouteGraph().load()
+
+
+def test_bfs():
+    """Hop limits and early stop on targets"""
+    adj = {'a': {'b'}, 'b': {'a', 'c'}, 'c': {'b', 'd'}, 'd': {'c'}}
+    assert routegraph.bfs(adj, 'a') == {'a': 0, 'b': 1, 'c': 2, 'd': 3}
+    assert routegraph.bfs(adj, 'a', limit=1) == {'a': 0, 'b': 1}
+    assert 'd' not in routegraph.bfs(adj, 'a', targets={'b'})
+
+
+def test_shortest_links():
+    """Only links on equal cost shortest paths, in both directions"""
+    rgraph = load_graph()
+    links = rgraph.get_routed_links('SRC/24', 'DST/24', 'default', 10)
+
+    found = set((r.r1name, r.r2name, r.distance) for r in links)
+    assert found == {
+        ('R1', 'R2', 1), ('R2', 'R1', 3), ('R1', 'R3', 1), ('R3', 'R1', 3),
+        ('R2', 'R4', 3), ('R4', 'R2', 5), ('R3', 'R4', 3), ('R4', 'R3', 5),
+    }
+    for r in links:
+        (net, r1) = r.r1ip.split('-')
+        assert (r1, r.r2ip) == (r.r1name, net + '-' + r.r2name)
+        assert set(p2p[net]) == {r.r1name, r.r2name}
+    assert [r.distance for r in links] == sorted(r.distance for r in links)
+
+
+def test_depth_and_vrf():
+    """No links past depth hops or in another VRF"""
+    rgraph = load_graph()
+    assert rgraph.get_routed_links('SRC/24', 'DST/24', 'default', 3) == []
+    assert rgraph.get_routed_links('SRC/24', 'DST/24', 'guest', 10) == []
+    assert rgraph.get_routed_links('SRC/24', 'DST/24', 'default', 4)
+
+
+def test_generation():
+    """get_graph() reloads when the networks generation changes"""
+    gens = {'networks': 1}
+    nglib.get_generation = gens.get
+    nglib.dbpool.execute = fake_execute
+    routegraph.graph = None
+
+    rgraph = routegraph.get_graph()
+    assert routegraph.get_graph() is rgraph
+    gens['networks'] = 2
+    assert routegraph.get_graph() is not rgraph
+
+
+if __name__ == "__main__":
+    test_bfs()
+    test_shortest_links()
+    test_depth_and_vrf()
+    test_generation()
+    print("RouteGraph OK")
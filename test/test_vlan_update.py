@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+""" Check the in-memory VLAN bridge computation and root election"""
+from collections import defaultdict, OrderedDict
+import nglib
+import nglib.dbpool
+from nglib.dbpool import Record
+from nglib import vlan_update
+
+writes = dict()
+
+
+def fake_write_batches(statement, rows, name="Rows", batch_size=None):
+    """Save rows by batch name"""
+    writes[name] = list(rows)
+    return len(writes[name])
+
+
+def fake_db(rows):
+    """Patch dbpool with query rows picked by a statement substring"""
+    def execute(statement, params=None, **kwparams):
+        for (match, result) in rows:
+            if match in statement:
+                return [Record(r) for r in result]
+        raise AssertionError("Unexpected query: " + statement)
+
+    nglib.dbpool.execute = execute
+    nglib.dbpool.write_batches = fake_write_batches
+    nglib.get_time = lambda: 'now'
+    writes.clear()
+
+
+def bridge(pvlan, cvlan, pswitch, cswitch):
+    """Expected bridge write row"""
+    return {'pvlan': pvlan, 'cvlan': cvlan, 'pswitch': pswitch, 'cswitch': cswitch,
+            'time': 'now'}
+
+
+def test_update_bridge_domains():
+    """Bridges follow trunk VLANs across mgmt groups, first link sets direction"""
+    swvlans = {'a1': (10, 20, 30), 'a2': (10,), 'b1': (10, 20), 'c1': (10,)}
+    mgmt = {'a1': 'A', 'a2': 'A', 'b1': 'B', 'c1': 'C'}
+    links = (('a1', 'b1', '10,20,30'), ('b1', 'a1', '10,20'), ('a1', 'a2', '10'),
+             ('b1', 'c1', ''), ('c1', 'b1', '10'))
+
+    fake_db((
+        ('Switched', [{'switch': s, 'vid': v} for s in swvlans for v in swvlans[s]]),
+        ('BRIDGE', [{'pvlan': 'B-20', 'cvlan': 'A-20'}]),
+        ('NEI', [{'pswitch': p, 'pmgmt': mgmt[p], 'cswitch': c, 'cmgmt': mgmt[c],
+                  'rvlans': rv} for (p, c, rv) in links]),
+    ))
+
+    vlan_update.update_bridge_domains()
+
+    assert writes['New Bridges'] == [bridge('A-10', 'B-10', 'a1', 'b1'),
+                                     bridge('C-10', 'B-10', 'c1', 'b1')]
+    assert writes['Bridges'] == [bridge('A-20', 'B-20', 'a1', 'b1')]
+
+
+def reversal_bridges(edges):
+    """bridges argument for find_bridge_reversal from (pv, cv, pswitch, cswitch)"""
+    bridges = defaultdict(list)
+    for (pv, cv, pswitch, cswitch) in edges:
+        rec = Record(pswitch=pswitch, cswitch=cswitch)
+        bridges[pv].append((cv, rec))
+        bridges[cv].append((pv, rec))
+    return bridges
+
+
+def test_find_bridge_reversal():
+    """The first bridge pointing back at the root is reversed"""
+    mgmt = {'a1': 'A', 'b1': 'B', 'b2': 'B', 'c1': 'C'}
+
+    # A-10 -> B-10 -> C-10, all pointing away from the root
+    bridges = reversal_bridges((('A-10', 'B-10', 'a1', 'b1'),
+                                ('B-10', 'C-10', 'b2', 'c1')))
+    assert vlan_update.find_bridge_reversal('A-10', 'A', bridges, mgmt) is None
+
+    # C-10 -> B-10 points at the root
+    bridges = reversal_bridges((('A-10', 'B-10', 'a1', 'b1'),
+                                ('C-10', 'B-10', 'c1', 'b2')))
+    assert vlan_update.find_bridge_reversal('A-10', 'A', bridges, mgmt) == {
+        'pswitch': 'c1', 'cswitch': 'b2'}
+
+    # Rooted on B-10 both point at the root, the first walked is reversed
+    assert vlan_update.find_bridge_reversal('B-10', 'B', bridges, mgmt) == {
+        'pswitch': 'a1', 'cswitch': 'b1'}
+    bridges = reversal_bridges((('B-10', 'A-10', 'b1', 'a1'),))
+    assert vlan_update.find_bridge_reversal('A-10', 'A', bridges, mgmt) == {
+        'pswitch': 'b1', 'cswitch': 'a1'}
+
+
+def test_find_bridge_reversal_depth():
+    """Bridges more than 19 hops out are not walked"""
+    mgmt = dict(('s' + str(n), 'M' + str(n)) for n in range(25))
+    edges = [('V' + str(n), 'V' + str(n + 1), 's' + str(n), 's' + str(n + 1))
+             for n in range(24)]
+
+    edges[18] = ('V19', 'V18', 's19', 's18')
+    bridges = reversal_bridges(edges)
+    assert vlan_update.find_bridge_reversal('V0', 'M0', bridges, mgmt) is not None
+
+    edges[18] = ('V18', 'V19', 's18', 's19')
+    edges[19] = ('V20', 'V19', 's20', 's19')
+    bridges = reversal_bridges(edges)
+    assert vlan_update.find_bridge_reversal('V0', 'M0', bridges, mgmt) is None
+
+
+def test_root_election():
+    """Local roots by lowest STP, bridged roots by lowest local STP per domain"""
+    vlans = OrderedDict((
+        ('A-10', {'vid': '10', 'lstp': None, 'lroot': None,
+                  'switches': [('a1', '4106'), ('a2', '8202')]}),
+        ('B-10', {'vid': '10', 'lstp': 4106, 'lroot': 'b1',
+                  'switches': [('b1', '4106'), ('b2', '0')]}),
+        ('C-10', {'vid': '10', 'lstp': None, 'lroot': None,
+                  'switches': [('c1', '24586')]}),
+        ('D-20', {'vid': '20', 'lstp': None, 'lroot': None,
+                  'switches': [('d1', '8212')]}),
+    ))
+
+    fake_db((
+        ('BRIDGE', [{'pvname': 'A-10', 'cvname': 'B-10', 'pswitch': 'a1', 'cswitch': 'b1'},
+                    {'pvname': 'C-10', 'cvname': 'B-10', 'pswitch': 'c1', 'cswitch': 'b2'}]),
+        ('ROOT', [{'vname': 'D-20', 'switch': 'd1'}]),
+        ('Switch', [{'name': s, 'mgmt': s[0].upper()}
+                    for s in ('a1', 'a2', 'b1', 'b2', 'c1', 'd1')]),
+    ))
+
+    vlan_update.find_local_root(vlans)
+    assert writes['Local Roots'] == [
+        {'vname': 'A-10', 'switch': 'a1', 'stp': 4106},
+        {'vname': 'C-10', 'switch': 'c1', 'stp': 24586},
+        {'vname': 'D-20', 'switch': 'd1', 'stp': 8212},
+    ]
+
+    vlan_update.find_bridged_root(vlans)
+    assert [(r['vname'], r['switch'], r['stp']) for r in writes['VLAN Roots']] == [
+        ('A-10', 'a1', 4106), ('B-10', 'b1', 4106), ('D-20', 'd1', 8212)]
+
+    # Duplicate roots in a domain reverse nothing
+    assert writes['Bridge Reversals'] == []
+
+    vlans['B-10']['lstp'] = 8192
+    vlan_update.find_bridged_root(vlans)
+    assert [r['vname'] for r in writes['VLAN Roots']] == ['A-10', 'D-20']
+    assert writes['Bridge Reversals'] == [{'pswitch': 'c1', 'cswitch': 'b2', 'vid': '10'}]
+
+
+if __name__ == "__main__":
+    test_update_bridge_domains()
+    test_find_bridge_reversal()
+    test_find_bridge_reversal_depth()
+    test_root_election()
+    print("VLAN bridges and roots OK")
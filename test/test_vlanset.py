@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+""" Check VlanSet against the original set based expand/compact_vlans"""
+import random
+from nglib.vlanset import VlanSet, parse_vlans
+
+trials = 200
+seed = 2069
+
+
+def old_expand_vlans(oset):
+    """Expand a VLAN range to a set (pre-VlanSet)"""
+
+    lset = oset.split(',')
+    nset = set()
+
+    for en in lset:
+        sset = en.split('-')
+        if len(sset) > 1:
+            for x in range(int(sset[0]), int(sset[1])+1):
+                nset.add(x)
+        elif en:
+            nset.add(int(en))
+
+    return nset
+
+
+def old_compact_vlans(oset):
+    """Convert set of vlans to range format (pre-VlanSet)"""
+
+    last = 0
+    crange = 0
+    nset = []
+
+    for en in sorted(oset):
+        if last and en == (last+1):
+            if not crange:
+                crange = last
+        elif crange:
+            nset.pop()
+            nset.append(str(crange) + '-' + str(last))
+            crange = 0
+            nset.append(str(en))
+        else:
+            nset.append(str(en))
+        last = en
+
+    if crange:
+        nset.pop()
+        nset.append(str(crange) + '-' + str(last))
+
+    return ",".join(nset)
+
+
+def random_vids():
+    """Random VIDs 1-4094 with some long runs (VID 0 is never trunked)"""
+    vids = set()
+    for _ in range(random.randint(0, 8)):
+        low = random.randint(1, 4094)
+        vids.update(range(low, min(4094, low + random.choice((0, 1, 2, 50, 1000))) + 1))
+    vids.update(random.sample(range(1, 4095), random.randint(0, 30)))
+    return vids
+
+
+def test_matches_old():
+    """Parse, render and set algebra match the set implementation"""
+    random.seed(seed)
+    for _ in range(trials):
+        vids = random_vids()
+        other = random_vids()
+        vstring = old_compact_vlans(vids)
+
+        assert VlanSet(vids).to_string() == vstring
+        assert set(VlanSet.from_string(vstring)) == old_expand_vlans(vstring) == vids
+        assert VlanSet.from_string(vstring) == VlanSet(vids)
+        assert len(VlanSet(vids)) == len(vids)
+        assert list(VlanSet(vids)) == sorted(vids)
+
+        ostring = old_compact_vlans(other)
+        assert set(parse_vlans(vstring) & parse_vlans(ostring)) == vids & other
+        assert set(parse_vlans(vstring) | parse_vlans(ostring)) == vids | other
+        assert set(parse_vlans(vstring) - parse_vlans(ostring)) == vids - other
+
+
+def test_strings():
+    """Unsorted and overlapping range strings"""
+    assert VlanSet.from_string('20,1-3,2,5,4').to_string() == '1-5,20'
+    assert VlanSet.from_string('').to_string() == ''
+    assert VlanSet.from_string('1-4094').to_string() == '1-4094'
+    assert VlanSet([3, 1, 2]).to_list_string() == '1,2,3'
+    assert 4094 in VlanSet.from_string('4000-4094')
+    assert 100 not in VlanSet.from_string('1-99,101')
+
+
+def test_immutable():
+    """add() leaves cached parses alone"""
+    vset = parse_vlans('1-10')
+    assert vset.add(20).to_string() == '1-10,20'
+    assert parse_vlans('1-10').to_string() == '1-10'
+
+
+if __name__ == "__main__":
+    test_matches_old()
+    test_strings()
+    test_immutable()
+    print("VlanSet OK")